@@ -0,0 +1,112 @@
+"""
+# @describe: 使用本地 http.server 桩服务验证 AsyncRequestControl，检查并发数是否受 concurrency 限制、执行失败的用例是否返回异常
+# 运行方式: python -m benchmarks.async_request_stub_check --cases 20 --concurrency 5 --delay 0.2
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Text
+from utils.other_tools.requests_tool.async_request_control import AsyncRequestControl
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """ /ok 延迟 delay 秒后返回 200，/error 返回 500，同时统计同时处理的最大请求数 """
+
+    delay = 0.2
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(cls.delay)
+            _ok = self.path.startswith("/ok")
+            body = json.dumps({"code": 0 if _ok else 1}).encode('utf-8')
+            self.send_response(200 if _ok else 500)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def stub_case(url: Text, detail: Text) -> Dict:
+    """ 构造与 RequestControl 入参一致的用例，断言状态码为 200 """
+    return {
+        "url": url,
+        "method": "GET",
+        "detail": detail,
+        "assert_data": {"status_code": 200},
+        "headers": {},
+        "requestType": "NONE",
+        "is_run": None,
+        "data": None,
+        "dependence_case": False,
+        "dependence_case_data": None,
+        "current_request_set_cache": None,
+        "sql": None,
+        "setup_sql": None,
+        "teardown": None,
+        "teardown_sql": None,
+        "sleep": None
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="AsyncRequestControl 桩服务检查")
+    parser.add_argument("--cases", type=int, default=20, help="正常用例数量")
+    parser.add_argument("--concurrency", type=int, default=5, help="最大并发数")
+    parser.add_argument("--delay", type=float, default=0.2, help="桩服务每个请求的处理时长，单位为秒")
+    args = parser.parse_args()
+
+    StubHandler.delay = args.delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    cases = [stub_case(f"{host}/ok/{i}", f"正常用例_{i}") for i in range(args.cases)]
+    # 状态码断言失败的用例，以及连接失败的用例(端口 1 上没有服务)
+    cases.append(stub_case(f"{host}/error", "断言失败用例"))
+    cases.append(stub_case("http://127.0.0.1:1/refused", "连接失败用例"))
+
+    start = time.perf_counter()
+    try:
+        results = AsyncRequestControl(cases, concurrency=args.concurrency, teardown_switch=False).run()
+    finally:
+        server.shutdown()
+        server.server_close()
+    elapsed = time.perf_counter() - start
+
+    errors = []
+    if StubHandler.max_in_flight > args.concurrency:
+        errors.append(f"同时处理的请求数 {StubHandler.max_in_flight} 超过了最大并发数 {args.concurrency}")
+    if args.concurrency > 1 and args.cases > 1 and StubHandler.max_in_flight < 2:
+        errors.append("请求没有并发执行")
+    if any(isinstance(i, BaseException) for i in results[:args.cases]):
+        errors.append("正常用例执行失败: " + repr([i for i in results[:args.cases] if isinstance(i, BaseException)]))
+    if not isinstance(results[-2], AssertionError):
+        errors.append(f"断言失败用例应返回 AssertionError，实际为 {results[-2]!r}")
+    if not isinstance(results[-1], BaseException):
+        errors.append(f"连接失败用例应返回异常，实际为 {results[-1]!r}")
+
+    print(f"用例数: {len(cases)}, 最大并发数: {args.concurrency}, "
+          f"桩服务同时处理的最大请求数: {StubHandler.max_in_flight}, 耗时: {elapsed:.2f}s")
+    for i in errors:
+        print(f"检查失败: {i}")
+    print("检查通过" if not errors else "检查失败")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
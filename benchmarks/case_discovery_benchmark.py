@@ -0,0 +1,93 @@
+"""
+# @describe: 用例发现基准测试，对比不同文件数量下 yaml 加载器、顺序解析、进程池并发解析的耗时
+# 运行方式: python -m benchmarks.case_discovery_benchmark --files 50 200 800 --cases 5 --workers 4
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, List, Text
+import yaml
+from utils.other_tools.read_files_tools.get_all_files_path import get_all_files
+from utils.other_tools.read_files_tools.get_yaml_data_analysis import load_case_files
+
+CASE_TEMPLATE = """
+{case_id}:
+  host: http://127.0.0.1
+  url: /api/benchmark/{index}
+  method: POST
+  detail: 用例发现基准测试
+  headers:
+    Content-Type: application/json;
+  requestType: json
+  is_run:
+  data:
+    name: benchmark
+    index: {index}
+    items: [1, 2, 3]
+  dependence_case: False
+  dependence_case_data:
+  assert:
+    code:
+      jsonpath: $.code
+      type: ==
+      value: 200
+      AssertType:
+  sql:
+"""
+
+
+def write_case_files(dir_path: Text, file_count: int, case_count: int) -> List[Text]:
+    """ 生成 file_count 个 yaml 用例文件，每个文件包含 case_count 条用例 """
+    for i in range(file_count):
+        with open(os.path.join(dir_path, f"benchmark_{i}.yaml"), 'w', encoding='utf-8') as file:
+            file.write("case_common:\n  allureEpic: 基准测试\n  allureFeature: 用例发现\n  allureStory: 用例发现\n")
+            for j in range(case_count):
+                file.write(CASE_TEMPLATE.format(case_id=f"benchmark_{i}_{j}", index=j))
+    return sorted(get_all_files(file_path=dir_path, yaml_data_switch=True))
+
+
+def timeit(func: Callable, repeat: int) -> float:
+    """ 执行 repeat 次，返回最短耗时，单位为秒 """
+    _times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        _times.append(time.perf_counter() - start)
+    return min(_times)
+
+
+def parse_only(file_paths: List[Text], loader) -> None:
+    """ 只解析 yaml，不做用例校验 """
+    for i in file_paths:
+        with open(i, 'r', encoding='utf-8') as file:
+            yaml.load(file, Loader=loader)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="用例发现基准测试")
+    parser.add_argument("--files", type=int, nargs="+", default=[50, 200, 800], help="yaml 文件数量")
+    parser.add_argument("--cases", type=int, default=5, help="每个文件中的用例数量")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程池进程数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测试的执行次数，取最短耗时")
+    args = parser.parse_args()
+
+    _c_loader = getattr(yaml, 'CFullLoader', None)
+    print(f"libyaml: {'已安装' if _c_loader is not None else '未安装'}, 进程数: {args.workers}")
+    print(f"{'文件数':>8}{'FullLoader':>14}{'CFullLoader':>14}{'顺序解析':>12}{'并发解析':>12}")
+    for file_count in args.files:
+        dir_path = tempfile.mkdtemp(prefix="case_discovery_")
+        try:
+            file_paths = write_case_files(dir_path, file_count, args.cases)
+            full = timeit(lambda: parse_only(file_paths, yaml.FullLoader), args.repeat)
+            c_full = timeit(lambda: parse_only(file_paths, _c_loader), args.repeat) if _c_loader else float('nan')
+            serial = timeit(lambda: load_case_files(file_paths, max_workers=1), args.repeat)
+            parallel = timeit(lambda: load_case_files(file_paths, max_workers=args.workers), args.repeat)
+            print(f"{file_count:>10}{full:>14.3f}{c_full:>14.3f}{serial:>14.3f}{parallel:>14.3f}")
+        finally:
+            shutil.rmtree(dir_path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
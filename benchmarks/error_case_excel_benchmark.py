@@ -0,0 +1,84 @@
+"""
+# @describe: 失败用例 excel 报告基准测试，对比只写模式逐行写入与逐个单元格写入并设置样式的耗时
+# 运行方式: python -m benchmarks.error_case_excel_benchmark --cases 10000 --repeat 3
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List
+from openpyxl import Workbook
+from openpyxl.styles import Alignment
+from utils.other_tools.allure_data.error_case_excel import ErrorCaseExcel
+
+
+def fake_failed_case(index: int) -> Dict:
+    """ 构造 allure 报告中执行异常的用例结果，请求数据从 parameters 中读取，不需要附件文件 """
+    parameters = {
+        "url": f"http://127.0.0.1/api/benchmark/{index}",
+        "method": "POST",
+        "headers": {"Content-Type": "application/json"},
+        "requestType": "JSON",
+        "data": {"name": "benchmark", "index": index, "items": list(range(20))},
+        "dependence_case_data": None,
+        "assert_data": {"code": {"jsonpath": "$.code", "type": "==", "value": 0, "AssertType": None}},
+        "sql": None
+    }
+    return {
+        "uid": f"{index:032x}",
+        "name": f"test_benchmark[失败用例基准测试_{index}]",
+        "status": "broken",
+        "parameters": [{"name": "in_data", "value": repr(parameters)}],
+        "testStage": {"status": "broken", "statusMessage": "ConnectionError: " + "x" * 200, "steps": []},
+        "time": {"duration": 120}
+    }
+
+
+def write_by_cell(file_path: str, rows: List[List[str]]) -> None:
+    """ 逐个单元格写入并设置样式，与原 xlwings 实现的写入方式一致 """
+    w_book = Workbook()
+    sheet = w_book.active
+    alignment = Alignment(wrap_text=True)
+    for row_index, row in enumerate(rows, start=2):
+        for column_index, value in enumerate(row, start=1):
+            cell = sheet.cell(row=row_index, column=column_index, value=value)
+            cell.alignment = alignment
+    w_book.save(file_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="失败用例 excel 报告基准测试")
+    parser.add_argument("--cases", type=int, default=10000, help="失败用例数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测试的执行次数，取最小值")
+    args = parser.parse_args()
+
+    cases = [fake_failed_case(i) for i in range(args.cases)]
+    dir_path = tempfile.mkdtemp(prefix="error_case_excel_benchmark_")
+    try:
+        excel = ErrorCaseExcel(file_path=os.path.join(dir_path, "write_only.xlsx"))
+        start = time.perf_counter()
+        rows = [excel.case_row(i) for i in cases]
+        extract = time.perf_counter() - start
+
+        results = {"只写模式": [], "逐个单元格": []}
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            excel.write_rows(rows)
+            results["只写模式"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            write_by_cell(os.path.join(dir_path, "by_cell.xlsx"), rows)
+            results["逐个单元格"].append(time.perf_counter() - start)
+
+        print(f"失败用例数量: {args.cases}, 提取用例数据耗时: {extract:.3f}s")
+        print(f"{'写入方式':<12}{'耗时(s)':>10}{'每秒行数':>12}{'文件大小(KB)':>14}")
+        for name, file_name in (("只写模式", "write_only.xlsx"), ("逐个单元格", "by_cell.xlsx")):
+            _best = min(results[name])
+            _size = os.path.getsize(os.path.join(dir_path, file_name)) / 1024
+            print(f"{name:<12}{_best:>12.3f}{args.cases / _best:>14.0f}{_size:>16.1f}")
+    finally:
+        shutil.rmtree(dir_path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+# @describe: 请求日志基准测试，对比同步写入、队列模式以及截断响应内容时，每条请求日志占用业务线程的耗时
+# 运行方式: python -m benchmarks.logging_benchmark --requests 2000 --body-kb 1 64 512 --max-body-length 2000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Text
+from utils.logging_tool.log_control import LogHandler, TruncatedText
+from utils.logging_tool.log_decorator import _log_msg
+
+
+def fake_response(body_kb: int) -> SimpleNamespace:
+    """ 构造与 ResponseData 字段一致的请求结果 """
+    return SimpleNamespace(
+        detail="日志基准测试",
+        url="http://127.0.0.1/api/benchmark",
+        method="POST",
+        headers={"Content-Type": "application/json"},
+        request_body={"name": "benchmark", "items": list(range(20))},
+        response_data='{"code": 0, "data": "' + "x" * body_kb * 1024 + '"}',
+        res_time=12.5,
+        status_code=200
+    )
+
+
+def run_case(dir_path: Text, name: Text, requests: int, body_kb: int, max_length: int, use_queue: bool):
+    """
+    写入 requests 条请求日志
+    :return: (业务线程中每条日志的平均耗时(微秒), 包含等待后台线程写入完成的总耗时(秒))
+    """
+    handler = LogHandler(os.path.join(dir_path, f"{name}.log"))
+    # 屏幕输出写入空设备，只比较日志处理本身的耗时
+    _devnull = open(os.devnull, 'w', encoding='utf-8')
+    handler.handlers[0].setStream(_devnull)
+    if use_queue:
+        handler.start_queue(max_size=10000)
+    res = fake_response(body_kb)
+    start = time.perf_counter()
+    for _ in range(requests):
+        handler.logger.info(
+            _log_msg, res.detail, res.url, res.method, TruncatedText(res.headers),
+            TruncatedText(res.request_body, max_length), TruncatedText(res.response_data, max_length),
+            res.res_time, res.status_code
+        )
+    caller = time.perf_counter() - start
+    handler.stop_queue()
+    total = time.perf_counter() - start
+    for i in handler.handlers:
+        handler.logger.removeHandler(i)
+        i.close()
+    _devnull.close()
+    return caller / requests * 1e6, total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="请求日志基准测试")
+    parser.add_argument("--requests", type=int, default=2000, help="每项测试写入的请求日志数量")
+    parser.add_argument("--body-kb", type=int, nargs="+", default=[1, 64, 512], help="响应内容大小，单位为 KB")
+    parser.add_argument("--max-body-length", type=int, default=2000, help="截断后响应内容的最大长度")
+    args = parser.parse_args()
+
+    print(f"{'响应大小':>8}{'模式':>16}{'单条耗时(us)':>16}{'总耗时(s)':>12}")
+    for body_kb in args.body_kb:
+        dir_path = tempfile.mkdtemp(prefix="logging_benchmark_")
+        try:
+            for mode, use_queue, max_length in (
+                    ("同步", False, 0),
+                    ("同步+截断", False, args.max_body_length),
+                    ("队列", True, 0),
+                    ("队列+截断", True, args.max_body_length)):
+                per_request, total = run_case(
+                    dir_path, f"{body_kb}_{use_queue}_{max_length}", args.requests, body_kb, max_length, use_queue
+                )
+                print(f"{str(body_kb) + 'KB':>10}{mode:>14}{per_request:>18.1f}{total:>14.3f}")
+        finally:
+            shutil.rmtree(dir_path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
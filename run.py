@@ -1,14 +1,16 @@
 import os
+import subprocess
 import traceback
 import pytest
 from utils.other_tools.models import NotificationType
-from utils.other_tools.allure_data.allure_report_data import AllureFileClean
+from utils.other_tools.metrics_plugin import metrics_plugin
 from utils.logging_tool.log_control import INFO
 from utils.notify.wechat_send import WeChatSend
 from utils.notify.ding_talk import DingTalkSendMsg
 from utils.notify.send_mail import SendEmail
 from utils.notify.lark import FeiShuTalkChatBot
 from utils.other_tools.allure_data.error_case_excel import ErrorCaseExcel
+from utils.other_tools.allure_data.allure_report_data import AllureFileClean
 from utils import config
 
 
@@ -32,8 +34,9 @@ def run():
         # 判断现有的测试用例，如果未生成测试代码，则自动生成
         # TestCaseAutomaticGeneration().get_case_automatic()
 
+        # metrics_plugin 在执行过程中直接收集用例结果，通知不需要等待 allure 报告生成
         pytest.main(['-s', '-W', 'ignore:Module already imported:pytest.PytestWarning',
-                     '--alluredir', './report/tmp', "--clean-alluredir"])
+                     '--alluredir', './report/tmp', "--clean-alluredir"], plugins=[metrics_plugin])
 
         """
                    --reruns: 失败重跑次数
@@ -47,9 +50,15 @@ def run():
                     "--reruns=3", "--reruns-delay=2"
                    """
 
-        os.system(r"allure generate ./report/tmp -o ./report/html --clean")
+        # 失败用例 excel 报告依赖 allure html 报告中的数据，开启时始终生成
+        generate_report = config.allure_report.generate or config.excel_report
+        report_process = None
+        if generate_report and not config.allure_report.background:
+            os.system(r"allure generate ./report/tmp -o ./report/html --clean")
+            # html 报告重新生成后，清除之前读取的失败用例数据
+            AllureFileClean.clear_cache()
 
-        allure_data = AllureFileClean().get_case_count()
+        allure_data = metrics_plugin.metrics()
         notification_mapping = {
             NotificationType.DING_TALK.value: DingTalkSendMsg(allure_data).send_ding_notification,
             NotificationType.WECHAT.value: WeChatSend(allure_data).send_wechat_notification,
@@ -62,16 +71,29 @@ def run():
             for i in notify_type:
                 notification_mapping.get(i.lstrip(""))()
 
+        # 通知发送完成后，在后台生成 allure html 报告
+        if generate_report and config.allure_report.background:
+            report_process = subprocess.Popen("allure generate ./report/tmp -o ./report/html --clean", shell=True)
+
         if config.excel_report:
+            if report_process is not None:
+                report_process.wait()
+                AllureFileClean.clear_cache()
             ErrorCaseExcel().write_case()
 
-        # 程序运行之后，自动启动报告，如果不想启动报告，可注释这段代码
-        os.system(f"allure serve ./report/tmp -h 127.0.0.1 -p 8080")
+        # 程序运行之后，自动启动报告，如果不想启动报告，可将配置文件中的 allure_report.serve 设置为 False
+        if config.allure_report.serve:
+            os.system(f"allure serve ./report/tmp -h 127.0.0.1 -p 8080")
+
+        # 等待后台生成的 allure html 报告完成后再退出
+        if report_process is not None:
+            report_process.wait()
+            AllureFileClean.clear_cache()
 
     except Exception:
         # 如有异常，相关异常发送邮件
         e = traceback.format_exc()
-        send_email = SendEmail(AllureFileClean.get_case_count())
+        send_email = SendEmail(metrics_plugin.metrics())
         send_email.error_mail(e)
         raise
 
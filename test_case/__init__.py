@@ -1,20 +1,54 @@
 from common.setting import ensure_path_sep
-from utils.read_files_tools.get_yaml_data_analysis import CaseData
-from utils.read_files_tools.get_all_files_path import get_all_files
+from utils.other_tools.read_files_tools.get_yaml_data_analysis import CaseData, load_case_files
+from utils.other_tools.read_files_tools.get_all_files_path import get_all_files
 from utils.cache_process.cache_control import CacheHandler, _cache_config
+from utils.cache_process.case_cache import _init_case_cache
+from utils.cache_process.case_pool import LazyCasePool
+from utils import config
 
 
 # 定义一个名为`write_case_process`的函数。
 def write_case_process():
     """
     获取所有用例，写入用例池中
-    :return:
+    :return: 开启懒加载时返回懒加载用例池，否则返回 None
     """
 
-    # 循环获取所有存放用例的文件路径，并将解析yaml格式的数据存到`case_process`中。
-    for i in get_all_files(file_path=ensure_path_sep("\\data"), yaml_data_switch=True):
-        # 利用`CaseData`类读取`i`文件的yaml格式数据，并调用`case_process`方法，将测试用例数据处理后返回到`case_process`数组中。
-        case_process = CaseData(i).case_process(case_id_switch=True)
+    # 获取用例编译缓存，未开启缓存时为 None。
+    case_cache = _init_case_cache()
+    # 获取所有存放用例的文件路径。
+    file_paths = get_all_files(file_path=ensure_path_sep("\\data"), yaml_data_switch=True)
+    # 开启了懒加载用例池时，只建立 case_id -> 文件 的索引，用例第一次被获取时才解析、校验对应的 yaml 文件。
+    if config.case_pool.lazy:
+        case_pool = LazyCasePool(
+            file_paths,
+            loader=lambda file_path: CaseData(file_path).case_process(case_id_switch=True),
+            case_cache=case_cache
+        )
+        CacheHandler.set_lazy_loader(case_pool.load)
+        return case_pool
+    # 开启了用例编译缓存时，先读取未修改的 yaml 文件对应的用例数据。
+    case_data = {}
+    if case_cache is not None:
+        for i in file_paths:
+            _cases = case_cache.get(i)
+            if _cases is not None:
+                case_data[i] = _cases
+    # 剩余需要解析的文件统一批量解析，文件数量较多时使用进程池并发解析，并将解析结果写入用例编译缓存。
+    _load_paths = [i for i in file_paths if i not in case_data]
+    _load_cases = load_case_files(
+        _load_paths,
+        max_workers=config.case_loader.max_workers,
+        min_files=config.case_loader.min_files
+    )
+    for i, _cases in zip(_load_paths, _load_cases):
+        case_data[i] = _cases
+        if case_cache is not None:
+            case_cache.set(i, _cases)
+    # 按文件顺序将用例写入用例池中，保证重复 case_id 的检测结果与顺序解析时一致。
+    for i in file_paths:
+        # 取出`i`文件解析后的用例数据。
+        case_process = case_data[i]
         # 判断`case_process`的值是否为`None`。
         if case_process is not None:
             # 如果`case_process`的值不为`None`，则遍历其中的每个测试用例数据。
@@ -33,9 +67,16 @@ def write_case_process():
                         raise ValueError(f"case_id: {k} 存在重复项, 请修改case_id\n"
                                          f"文件路径: {i}")
 
+    # 所有用例写入用例池后，删除已经不存在的 yaml 文件对应的缓存，并保存用例编译缓存。
+    if case_cache is not None:
+        case_cache.prune(file_paths)
+        case_cache.save()
+        case_cache.log_stats()
+    return None
 
-# 调用`write_case_process`函数开始执行代码
-write_case_process()
+
+# 调用`write_case_process`函数开始执行代码，开启懒加载时`case_pool`为懒加载用例池，测试结束时需要调用`close`方法。
+case_pool = write_case_process()
 '''
 以上代码是一个用于读取测试用例文件，并将测试用例数据写入缓存池的函数。
 总的来说，以上代码的功能就是将所有配置好的测试用例数据，读取后写入到缓存池中，以便后面的测试用例运行时能够实时获取并使用数据。
@@ -1,18 +1,48 @@
 import pytest
 import time
 import allure
-import requests
-import ast
 import json
 from common.setting import ensure_path_sep
-from utils.other_tools.requests_tool.request_control import cache_regular
-from utils.logging_tool.log_control import INFO, ERROR, WARNING
+from test_case import case_pool
+from utils.other_tools.requests_tool.request_control import RequestControl
+from utils.other_tools.read_files_tools.regular_control import literal_resolve
+from utils.other_tools.requests_tool.session_control import session_pool
+from utils.cache_process.dependent_cache import dependent_cache
+from utils.mysql_tool.mysql_control import mysql_pool
+from utils.other_tools.requests_tool.dependent_case import DependentCase
+from utils.other_tools.requests_tool.teardown_queue import teardown_queue
+from utils.other_tools.metrics_plugin import metrics_plugin
+from utils.other_tools.requests_tool.upload_control import upload_stats
+from utils.other_tools.requests_tool.dependency_scheduler import CaseDependencyGraph, DependencyScheduler
+from utils.logging_tool.log_control import INFO, ERROR, WARNING, start_queue_logging, stop_queue_logging
+from utils.logging_tool.phase_timer import phase_timer
+from utils.logging_tool.event_log import event_log
 from utils.other_tools.models import TestCase
 from utils.other_tools.read_files_tools.clean_files import del_file
-from utils.other_tools.allure_data.allure_tools import allure_step, allure_step_no
+from utils.other_tools.allure_data.allure_tools import allure_step, allure_step_no, allure_result_broken, NODEID_LABEL
 from utils.cache_process.cache_control import CacheHandler
 from utils import config
 
+# 根据配置文件开启日志队列模式，日志由后台线程写入屏幕和文件，测试结束时等待队列中的日志全部写入。
+if config.log.queue:
+    start_queue_logging(config.log.queue_size)
+
+# 根据配置文件开启用例分阶段耗时统计，统计结果在测试结束时导出。
+phase_timer.configure(
+    switch=config.phase_timing.switch,
+    path=ensure_path_sep(config.phase_timing.path),
+    allure=config.phase_timing.allure
+)
+
+# 根据配置文件开启结构化请求日志，测试结束时将缓冲区中的记录写入文件。
+event_log.configure(
+    switch=config.event_log.switch,
+    path=ensure_path_sep(config.event_log.path),
+    max_bytes=config.event_log.max_bytes,
+    backup_count=config.event_log.backup_count,
+    buffer_size=config.event_log.buffer_size
+)
+
 
 # @pytest.fixture是Pytest测试框架中使用的装饰器，用于标识一个函数为Pytest用例的fixture函数。通过fixture函数，我们可以在测试用例执行前或执行后，为测试用例提供一些前置条件或后置操作，比如初始化数据库连接、生成测试数据、删除临时文件等等。函数参数中的socpe参数和autouse参数是fixture函数的两个重要参数，分别用于指定fixture函数的作用域和自动调用情况。scope参数用于指定fixture函数的作用范围。常用的值包括：function（默认值）表示仅在当前测试用例中使用，每个测试用例都会重新创建；module表示在当前测试模块中使用，多个测试用例共用，每个测试模块执行前创建；session表示在整个测试session中使用，多个测试模块共用，整个测试会话只创建一次。autouse参数用于指定fixture函数是否自动调用。当autouse=True时，fixture函数会自动被执行；当autouse=False时，需要通过测试用例的参数显式调用才会执行。默认值为False。
 @pytest.fixture(scope="session", autouse=False)
@@ -41,8 +71,8 @@ def init_info_accessToken():
         'Lang': 'en',
         'Currency': 'US',
     }
-    # 这里使用 requests 库发送了一个 GET 请求，并将响应结果转换为 JSON 格式。在本例中，该请求会向指定的 URL 发送一个 GET 请求，获取访问令牌。
-    response = requests.request("GET", url, headers=headers, data=payload).json()
+    # 这里通过 RequestControl.send_request 发送了一个 GET 请求，并将响应结果转换为 JSON 格式。开启连接池时，该请求与后续用例共用同一个 host 的长连接。
+    response = RequestControl.send_request(method="GET", url=url, headers=headers, data=payload).json()
     # 这行代码从响应结果中获取到访问令牌，并赋值给一个变量 AccessToken。
     AccessToken = response['data']['accessToken']
     # 这行代码将获取到的访问令牌更新到一个缓存中。在本例中，使用的缓存是 CacheHandler 类中的 update_cache() 方法。
@@ -52,6 +82,16 @@ def init_info_accessToken():
 # 总的来说，这个函数的主要功能就是请求指定 URL，获取访问令牌，并将访问令牌保存到缓存中，以供后续使用。
 
 
+# 定义了一个函数 get_item_case_id，用于获取 pytest 用例对应的 case_id。
+def get_item_case_id(item):
+    # 自动生成的测试代码中，模块变量 case_id 保存了当前模块的用例ID列表，参数化的 in_data 与它一一对应，通过参数化的下标即可获取到 case_id。
+    _case_ids = getattr(getattr(item, "module", None), "case_id", None)
+    _callspec = getattr(item, "callspec", None)
+    if _case_ids and _callspec is not None and "in_data" in _callspec.indices:
+        return _case_ids[_callspec.indices["in_data"]]
+    return None
+
+
 # 这是一个 Pytest 的 hook 函数，用于修改测试用例集合。
 def pytest_collection_modifyitems(items):
     for item in items:
@@ -61,29 +101,20 @@ def pytest_collection_modifyitems(items):
         item._nodeid = item.nodeid.encode("utf-8").decode("unicode_escape")
     # 这两行代码使用 Python 中的字符串编码和解码函数 encode() 和 decode()，将 item 对象中的名称和节点 ID 转换为中文，以便于控制台的显示。
 
-    # 这里指定要运行的测试用例的名称。
-    appoint_items = ["test_Register", "test_LOGIN"]
-    # 定义一个空列表来接收筛选出来的测试用例。
-    run_items = []
-    # 对于要运行的每个测试用例名称，遍历所有测试用例。
-    for i in appoint_items:
-        for item in items:
-            # 获取测试用例名称中的模块名称部分，这个部分是测试用例名称中的第一个 "[]" 内的内容，用于唯一标识所属模块。
-            module_item = item.name.split("[")[0]
-            # 如果当前测试用例的模块名称与要运行的测试用例名称一致，则将其添加到 run_items 列表中。
-            if i == module_item:
-                run_items.append(item)
-
-    # 遍历要运行的测试用例列表，以及所有测试用例的列表，获取当前测试用例在两个列表中的索引值。
-    for i in run_items:
-        run_index = run_items.index(i)
-        items_index = items.index(i)
-
-        # 如果当前测试用例不在要运行的测试用例列表的最前面，就将它调整到最前面位置。首先从 items 中找到当前测试用例应该在的位置（即：run_index），然后使用 python 的交换变量值的语法将当前测试用例的位置与 run_index 位置的测试用例交换，从而达到把当前测试用例放到最前面的目的。
-        if run_index != items_index:
-            n_data = items[run_index]
-            run_index = items.index(n_data)
-            items[items_index], items[run_index] = items[run_index], items[items_index]
+    _item_case_ids = [get_item_case_id(item) for item in items]
+    # 读取用例池，生成用例依赖关系图，懒加载用例池时会先加载本次收集到的用例所引用的用例。如果 dependence_case_data、teardown 之间存在循环引用，则在收集阶段直接报错。
+    graph = CaseDependencyGraph.from_cache_pool(case_ids=_item_case_ids)
+    graph.check_cycle()
+    # 按依赖关系对本次收集到的用例进行拓扑排序，被依赖的用例（例如注册、登录）会被调整到依赖它的用例之前，其余用例保持收集时的顺序，原有顺序已经满足依赖关系的模块不会被打乱。
+    _order = graph.topological_order(dict.fromkeys(i for i in _item_case_ids if i in graph.cases))
+    _rank = {case_id: index for index, case_id in enumerate(_order)}
+    # 无法识别 case_id 的用例，跟随前一个用例的位置。
+    _item_rank = []
+    _last_rank = -1
+    for _case_id in _item_case_ids:
+        _last_rank = _rank.get(_case_id, _last_rank)
+        _item_rank.append(_last_rank)
+    items[:] = [item for _, _, item in sorted(zip(_item_rank, range(len(items)), items))]
 
 
 # 总之，这段代码主要是解决pytest测试用例的名称显示和测试用例的执行顺序问题，从而为自动化测试提供更好的支持。
@@ -110,13 +141,45 @@ def pytest_configure(config):
    config.addinivalue_line("markers", '回归测试')
    '''
 
+@pytest.fixture(scope="session", autouse=True)
+# 定义了一个函数 dependency_warm_up，在所有用例执行前，按依赖关系并发预执行本次用例依赖的所有用例，执行结果写入依赖用例缓存，用例执行时直接复用。
+def dependency_warm_up(request, init_info_accessToken):
+    if config.dependency_scheduler.switch is False:
+        return
+    # 只有缓存作用域为 session 时，预执行的结果才能在整个测试会话中复用。
+    if dependent_cache.scope != 'session':
+        WARNING.logger.warning("依赖用例缓存作用域不是 session，预执行的结果无法复用，已跳过依赖用例并发调度")
+        return
+    _item_case_ids = [get_item_case_id(i) for i in request.session.items]
+    graph = CaseDependencyGraph.from_cache_pool(case_ids=_item_case_ids)
+    _case_ids = graph.dependence_closure(_item_case_ids)
+    # 依赖分支之间没有关联的用例，会分配到线程池中并发执行。
+    DependencyScheduler(graph, max_workers=config.dependency_scheduler.max_workers).run(
+        func=DependentCase.dependent_request,
+        case_ids=_case_ids
+    )
+
+
+@pytest.fixture(scope="module", autouse=True)
+# 定义了一个函数 dependent_cache_scope，每个测试模块开始执行前调用，依赖用例缓存作用域为 module 时，会在这里清空上一个模块的缓存结果。
+def dependent_cache_scope():
+    dependent_cache.module_start()
+
+
+@pytest.fixture(scope="function", autouse=True)
+# 定义了一个函数 deferred_teardown_label，开启延迟后置处理时，在 allure 中为每个用例记录 nodeid，后置处理在用例结束后执行失败时，通过该标签修改发起它的用例的结果。
+def deferred_teardown_label(request):
+    if config.teardown_queue.switch:
+        allure.dynamic.label(NODEID_LABEL, request.node.nodeid)
+
+
 @pytest.fixture(scope="function", autouse=True)
 # 自定义函数case_skip，它接受一个参数 in_data，表示输入的测试用例对象。
 def case_skip(in_data):
     # 这里的意思是将输入参数 in_data 转换为一个 TestCase 类对象，并将其赋值给 in_data 变量。该类对象用于存储测试用例的相关信息，例如 URL、请求方式、请求头、请求数据、依赖数据和预期数据等信息。
     in_data = TestCase(**in_data)
     # 这行代码用于判断测试用例是否需要跳过。in_data.is_run 表示测试用例是否被标记为执行，这个标记通常是用于控制测试用例的执行。如果该标记为 False，则说明该测试用例被标记为跳过，因此函数会调用 pytest 的 skip() 方法来跳过该测试用例的执行。
-    if ast.literal_eval(cache_regular(str(in_data.is_run))) is False:
+    if literal_resolve(in_data.is_run) is False:
         # 这行代码用于添加更详细的测试用例名称。allure.dynamic.title() 方法可以用于添加 Allure 报告的测试用例名称，并支持一些动态的参数，例如本例中的 in_data.detail，该参数代表测试用例的详细描述信息。这样，可以在 Allure 报告中看到更详细的测试用例的名称。
         allure.dynamic.title(in_data.detail)
         # 这几行代码使用 Allure Test Report 库的 allure_step() 和 allure_step_no() 方法，用于添加更详细的测试用例的报告信息。例如，该函数调用了多次 allure_step_no() 方法，用于展示测试用例中的操作步骤，并且将测试用例的请求 URL 和请求方式作为展示的参数。此外，该函数还将测试用例的请求头、请求数据、依赖数据和预期数据等信息，通过调用 allure_step() 方法添加到了 Allure 报告中。
@@ -133,6 +196,40 @@ def case_skip(in_data):
 # 总的来说，这个函数的作用是用于处理 pytest 测试套件中的跳过用例，并添加更详细的测试用例名称和报告信息。其中，函数调用了 Allure Test Report 库的方法，使得测试用例结果更加详尽、易读和易于维护。
 
 
+@pytest.fixture(scope="function", autouse=True)
+# 定义了一个函数 phase_timing_attach，每个用例执行完成后，在 allure 中展示该用例各阶段的耗时。
+def phase_timing_attach(request):
+    yield
+    if phase_timer.enabled and phase_timer.allure:
+        allure_step("阶段耗时: ", phase_timer.case_summary(request.node.nodeid))
+
+
+# 定义了一个Pytest的会话结束函数，等待所有延迟后置处理执行完成，存在执行失败的后置处理时，将测试结果标记为失败。
+def pytest_sessionfinish(session):
+    _failures = teardown_queue.drain()
+    # 将发起失败后置处理的用例记为 broken，通知和通过率中会统计到该用例，同时修改该用例的 allure 结果并添加失败原因。
+    for _nodeid, _ in _failures:
+        metrics_plugin.mark_broken(_nodeid)
+    _alluredir = getattr(session.config.option, "allure_report_dir", None)
+    if _failures and _alluredir:
+        _errors = {}
+        for _nodeid, _error in _failures:
+            _errors[_nodeid] = f"{_errors[_nodeid]}\n{_error!r}" if _nodeid in _errors else repr(_error)
+        allure_result_broken(_alluredir, _errors)
+    if _failures and session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+    # 延迟后置处理执行完成后，导出所有用例的分阶段耗时。
+    _path = phase_timer.export()
+    if _path is not None:
+        INFO.logger.info("用例分阶段耗时已导出: %s", _path)
+
+
+# 定义了一个Pytest的退出函数，在所有 pytest 输出完成后执行，关闭结构化请求日志，等待队列中的日志全部写入后切换回同步模式。
+def pytest_unconfigure(config):
+    event_log.close()
+    stop_queue_logging()
+
+
 # 定义了一个Pytest的测试用例收尾函数，用于生成测试报告并收集测试结果。
 def pytest_terminal_summary(terminalreporter):
     # 这几行代码用于统计测试结果的各项指标。其中，terminalreporter.stats 属性是一个字典对象，存储了测试用例的各项状态，例如 'passed'、'failed'、'error'、'skipped' 等，这些属性的值是一个列表，其中每个元素都表示一个测试用例对象。这里的代码使用列表解析式和 len() 函数来计算各个状态的测试用例数。另外，_TOTAL 变量表示测试套件中全部测试用例的数量，_TIMES 记录了测试用例的执行时长。
@@ -156,4 +253,24 @@ def pytest_terminal_summary(terminalreporter):
     except ZeroDivisionError:
         INFO.logger.info("用例成功率: 0.00 %")
 
+    # 展示执行失败的延迟后置处理，以及发起后置处理的用例。
+    if teardown_queue.failures:
+        terminalreporter.write_sep("=", f"延迟后置处理失败 {len(teardown_queue.failures)} 个")
+        for _nodeid, _error in teardown_queue.failures:
+            terminalreporter.write_line(f"{_nodeid} - {_error!r}")
+
+    # 所有用例执行完成后，关闭 http 连接池，并将每个 host 的请求数、新建连接数、复用连接数记录到日志中。
+    session_pool.close()
+    # 记录依赖用例结果缓存的命中次数和未命中次数。
+    dependent_cache.log_stats()
+    # 存在上传文件的用例时，记录上传文件的打开、关闭次数，以及同时打开的最大文件数。
+    if upload_stats.opened:
+        upload_stats.log_stats()
+    # 开启了数据库开关时，关闭数据库连接池，并将借出次数、等待次数、新建连接数记录到日志中。
+    if mysql_pool is not None:
+        mysql_pool.close()
+    # 开启了懒加载用例池时，保存用例编译缓存，并记录实际加载的用例文件数。
+    if case_pool is not None:
+        case_pool.close()
+
 # 总的来说，这段代码的作用是在 pytest 测试运行结束后，统计各个状态的测试用例数和用例成功率，然后将这些信息记录到日志中，方便开发人员查看和分析测试结果。
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""
+# @describe: 框架自身的单元测试公共配置，运行方式: python -m pytest tests
+# 单元测试不读取 test_case 中的接口用例，也不依赖被测服务，配置文件中未填写的配置使用 Config 中的默认值
+"""
+import copy
+import os
+import pytest
+from pydantic import BaseModel, ValidationError
+from common.setting import ensure_path_sep
+from utils import config
+from utils.other_tools.models import Config
+
+# 日志模块导入时会创建日志文件，先确保日志目录存在
+os.makedirs(ensure_path_sep("\\logs"), exist_ok=True)
+
+
+def _default_config() -> None:
+    """ 将 Config 中有默认值的配置写入 utils.config，已经存在的配置不覆盖 """
+    for name, field in Config.__fields__.items():
+        if hasattr(config, name):
+            continue
+        if not field.required:
+            setattr(config, name, copy.deepcopy(field.default))
+        elif isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+            # 必填的配置类所有字段都有默认值时(如 mysql_db)，使用默认配置
+            try:
+                setattr(config, name, field.type_())
+            except ValidationError:
+                pass
+    if not hasattr(config, 'host'):
+        config.host = "http://127.0.0.1"
+
+
+_default_config()
+
+
+@pytest.fixture
+def cache_pool():
+    """ 用例池和缓存共用的 _cache_config，测试结束后恢复原有内容 """
+    from utils.cache_process import cache_control
+    _backup = dict(cache_control._cache_config)
+    cache_control._cache_config.clear()
+    yield cache_control._cache_config
+    cache_control._cache_config.clear()
+    cache_control._cache_config.update(_backup)
+    cache_control.CacheHandler.set_lazy_loader(None)
@@ -0,0 +1,59 @@
+"""
+# @describe: allure 用例执行结果流式读取测试
+"""
+import json
+import pytest
+from utils.other_tools.allure_data.allure_report_data import AllureFileClean, FAILED_STATUS, iter_testcases
+
+STATUSES = ["passed", "failed", "broken", "skipped", "passed", "failed", "passed"]
+
+
+@pytest.fixture
+def test_cases_dir(tmp_path):
+    """ 生成 allure 报告中 data/test-cases 目录结构的用例执行结果，部分文件放在子目录中 """
+    for index, status in enumerate(STATUSES):
+        folder = tmp_path / "sub" if index % 2 else tmp_path
+        folder.mkdir(exist_ok=True)
+        (folder / f"{index}.json").write_text(json.dumps({
+            "name": f"用例_{index}", "fullName": f"test_case/test_{index}.py#test_{index}", "status": status
+        }, ensure_ascii=False), encoding='utf-8')
+    return str(tmp_path)
+
+
+def names(cases):
+    return sorted(i["name"] for i in cases)
+
+
+def test_returns_all_cases_without_statuses(test_cases_dir):
+    assert names(iter_testcases(test_cases_dir)) == [f"用例_{i}" for i in range(len(STATUSES))]
+
+
+@pytest.mark.parametrize("statuses", [FAILED_STATUS, ["passed"], ("skipped",), []])
+def test_filters_by_status(test_cases_dir, statuses):
+    cases = list(iter_testcases(test_cases_dir, statuses=statuses, chunk_size=2))
+    assert names(cases) == sorted(f"用例_{i}" for i, s in enumerate(STATUSES) if s in statuses)
+    assert all(i["status"] in statuses for i in cases)
+
+
+def test_process_pool_keeps_order(test_cases_dir):
+    sequential = list(iter_testcases(test_cases_dir, statuses=FAILED_STATUS, chunk_size=1))
+    parallel = list(iter_testcases(test_cases_dir, statuses=FAILED_STATUS, max_workers=2, chunk_size=1))
+    assert parallel == sequential
+    assert len(parallel) == 3
+
+
+def test_missing_directory(tmp_path):
+    assert list(iter_testcases(str(tmp_path / "missing"))) == []
+
+
+def test_failed_testcases_are_read_once(test_cases_dir, tmp_path):
+    AllureFileClean.clear_cache()
+    try:
+        failed = AllureFileClean.get_failed_testcases(test_cases_dir)
+        assert names(failed) == ["用例_1", "用例_2", "用例_5"]
+        (tmp_path / "7.json").write_text(json.dumps({"name": "用例_7", "fullName": "", "status": "failed"}))
+        assert AllureFileClean.get_failed_testcases(test_cases_dir) is failed
+        AllureFileClean.clear_cache()
+        assert len(AllureFileClean.get_failed_testcases(test_cases_dir)) == 4
+    finally:
+        AllureFileClean.clear_cache()
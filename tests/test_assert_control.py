@@ -0,0 +1,81 @@
+"""
+# @describe: 断言计划测试，相同的 assert_data 只编译一次，未使用 $cache{} 的断言数据只解析一次
+"""
+import json
+import pytest
+from utils.assertion import assert_control
+from utils.assertion.assert_control import Assert, AssertPlan
+
+RESPONSE = json.dumps({"code": 0, "data": {"id": 10, "items": [1, 2, 3]}})
+
+
+def assert_data(**kwargs):
+    data = {
+        "status_code": 200,
+        "code": {"jsonpath": "$.code", "type": "==", "value": 0, "AssertType": None},
+        "items": {"jsonpath": "$.data.items", "type": "len_eq", "value": 3, "AssertType": None}
+    }
+    data.update(kwargs)
+    return data
+
+
+def run_assert(data, status_code=200, response=RESPONSE):
+    Assert(data, {"sql": None}, {}, response, status_code).assert_type_handle()
+
+
+@pytest.fixture(autouse=True)
+def clear_plans():
+    AssertPlan._plans.clear()
+    yield
+    AssertPlan._plans.clear()
+
+
+def test_plan_is_reused_for_same_assert_data():
+    plan = AssertPlan.compile(assert_data())
+    assert AssertPlan.compile(assert_data()) is plan
+    assert AssertPlan.compile(assert_data(status_code=201)) is not plan
+    assert plan.has_status_code and plan.status_code == 200
+    assert [i.raw["jsonpath"] for i in plan.items] == ["$.code", "$.data.items"]
+
+
+def test_plans_are_bounded(monkeypatch):
+    monkeypatch.setattr(AssertPlan, "maxsize", 2)
+    first = AssertPlan.compile(assert_data(status_code=1))
+    AssertPlan.compile(assert_data(status_code=2))
+    AssertPlan.compile(assert_data(status_code=3))
+    assert len(AssertPlan._plans) == 2
+    assert AssertPlan.compile(assert_data(status_code=1)) is not first
+
+
+def test_static_items_resolve_once(monkeypatch):
+    calls = []
+    _literal_resolve = assert_control.literal_resolve
+    monkeypatch.setattr(assert_control, "literal_resolve", lambda data: calls.append(data) or _literal_resolve(data))
+    data = assert_data()
+    run_assert(data)
+    run_assert(data)
+    assert len(calls) == 2
+
+
+def test_cache_items_resolve_every_time(cache_pool):
+    data = assert_data(id={"jsonpath": "$.data.id", "type": "==", "value": "$cache{int:user_id}", "AssertType": None})
+    cache_pool["user_id"] = 10
+    run_assert(data)
+    cache_pool["user_id"] = 11
+    with pytest.raises(AssertionError):
+        run_assert(data)
+
+
+def test_failed_assertions():
+    with pytest.raises(AssertionError, match="响应状态码断言失败"):
+        run_assert(assert_data(), status_code=500)
+    with pytest.raises(AssertionError):
+        run_assert(assert_data(code={"jsonpath": "$.code", "type": "==", "value": 1, "AssertType": None}))
+    with pytest.raises(AssertionError, match="jsonpath数据提取失败"):
+        run_assert(assert_data(code={"jsonpath": "$.missing", "type": "==", "value": 1, "AssertType": None}))
+
+
+def test_without_status_code():
+    data = assert_data()
+    data.pop("status_code")
+    run_assert(data, status_code=500)
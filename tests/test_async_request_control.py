@@ -0,0 +1,52 @@
+"""
+# @describe: AsyncRequestControl 并发执行测试，使用本地 http.server 桩服务
+"""
+import threading
+from http.server import ThreadingHTTPServer
+import pytest
+from benchmarks.async_request_stub_check import StubHandler, stub_case
+from utils.other_tools.requests_tool.async_request_control import AsyncRequestControl
+
+
+@pytest.fixture
+def stub_host():
+    StubHandler.delay = 0.1
+    StubHandler.in_flight = 0
+    StubHandler.max_in_flight = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrency_is_bounded(stub_host):
+    cases = [stub_case(f"{stub_host}/ok/{i}", f"正常用例_{i}") for i in range(12)]
+    results = AsyncRequestControl(cases, concurrency=4, teardown_switch=False).run()
+    assert [i.status_code for i in results] == [200] * 12
+    assert 2 <= StubHandler.max_in_flight <= 4
+
+
+def test_results_keep_case_order(stub_host):
+    cases = [stub_case(f"{stub_host}/ok/{i}", f"正常用例_{i}") for i in range(6)]
+    results = AsyncRequestControl(cases, concurrency=3, teardown_switch=False).run()
+    assert [i.url for i in results] == [i['url'] for i in cases]
+
+
+def test_failed_cases_return_exceptions(stub_host):
+    cases = [
+        stub_case(f"{stub_host}/ok/0", "正常用例"),
+        stub_case(f"{stub_host}/error", "断言失败用例"),
+        stub_case("http://127.0.0.1:1/refused", "连接失败用例")
+    ]
+    results = AsyncRequestControl(cases, concurrency=3, teardown_switch=False).run()
+    assert results[0].status_code == 200
+    assert isinstance(results[1], AssertionError)
+    assert isinstance(results[2], Exception) and not isinstance(results[2], AssertionError)
+
+
+def test_is_run_false_case_is_not_sent(stub_host):
+    case = stub_case(f"{stub_host}/ok/0", "不执行的用例")
+    case['is_run'] = False
+    assert AsyncRequestControl([case], teardown_switch=False).run() == [None]
+    assert StubHandler.max_in_flight == 0
@@ -0,0 +1,101 @@
+"""
+# @describe: 懒加载用例池测试，只解析被获取的用例所在的 yaml 文件
+"""
+import pytest
+import yaml
+from utils.cache_process.cache_control import CacheHandler
+from utils.cache_process.case_cache import CompiledCaseCache
+from utils.cache_process.case_pool import LazyCasePool
+
+LOGIN_YAML = """\
+# 公共参数
+case_common:
+  allureEpic: 开发平台接口
+login_01:
+  host: ${{host()}}
+  url: /login
+  'login_02':
+    nested: 不是用例ID
+"login_03":
+  url: /login
+"""
+
+ORDER_YAML = """\
+order_01:
+  url: /order
+  data:
+    - order_02: 列表项
+"""
+
+
+class Loader:
+    """ 记录每个文件被解析的次数 """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, file_path):
+        self.calls.append(file_path)
+        with open(file_path, 'r', encoding='utf-8') as file:
+            data = yaml.safe_load(file)
+        return [{k: v} for k, v in data.items() if k != 'case_common']
+
+
+@pytest.fixture
+def case_files(tmp_path):
+    login, order = tmp_path / "login.yaml", tmp_path / "order.yaml"
+    login.write_text(LOGIN_YAML, encoding='utf-8')
+    order.write_text(ORDER_YAML, encoding='utf-8')
+    return [str(login), str(order)]
+
+
+def test_scan_case_ids_only_reads_top_level_keys(case_files):
+    assert LazyCasePool.scan_case_ids(case_files[0]) == ["login_01", "login_03"]
+    assert LazyCasePool.scan_case_ids(case_files[1]) == ["order_01"]
+
+
+def test_duplicate_case_id_raises(case_files, tmp_path):
+    duplicate = tmp_path / "duplicate.yaml"
+    duplicate.write_text("order_01:\n  url: /order\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="order_01"):
+        LazyCasePool(case_files + [str(duplicate)], Loader())
+
+
+def test_file_is_loaded_on_first_get(cache_pool, case_files):
+    loader = Loader()
+    pool = LazyCasePool(case_files, loader)
+    CacheHandler.set_lazy_loader(pool.load)
+    assert loader.calls == []
+    assert CacheHandler.get_cache("order_01")["url"] == "/order"
+    assert CacheHandler.get_cache("order_01")["url"] == "/order"
+    assert loader.calls == [case_files[1]]
+    assert "login_01" not in cache_pool
+    assert pool.load("not_exists") is False
+
+
+def test_loaded_cases_do_not_overwrite_cache(cache_pool, case_files):
+    cache_pool["login_01"] = {"url": "/already_loaded"}
+    pool = LazyCasePool(case_files, Loader())
+    assert pool.load("login_03") is True
+    assert cache_pool["login_01"] == {"url": "/already_loaded"}
+
+
+def test_close_prunes_and_saves_case_cache(cache_pool, case_files, tmp_path):
+    cache_path = str(tmp_path / "cache" / "case_cache.pickle")
+    case_cache = CompiledCaseCache(cache_path)
+    loader = Loader()
+    pool = LazyCasePool(case_files, loader, case_cache)
+    pool.load("order_01")
+    pool.close()
+
+    # 第二次运行直接读取编译缓存，不再解析 yaml 文件
+    cache_pool.clear()
+    reloaded = CompiledCaseCache(cache_path)
+    loader = Loader()
+    LazyCasePool(case_files[1:], loader, reloaded).load("order_01")
+    assert loader.calls == []
+    assert reloaded.hits == 1
+
+    # 用例文件被删除后，close 时删除对应的缓存
+    LazyCasePool(case_files[:1], Loader(), reloaded).close()
+    assert CompiledCaseCache(cache_path).get(case_files[1]) is None
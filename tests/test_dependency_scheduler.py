@@ -0,0 +1,111 @@
+"""
+# @describe: 用例依赖关系图的拓扑排序、循环依赖检测以及依赖调度测试
+"""
+import threading
+import pytest
+from utils.other_tools.exceptions import DependencyCycleError
+from utils.other_tools.requests_tool.dependency_scheduler import CaseDependencyGraph, DependencyScheduler
+
+
+def case(depends=(), teardown=(), set_cache=None, data=None):
+    """ 构造只包含依赖关系相关字段的用例 """
+    return {
+        "url": "/api", "method": "GET", "requestType": "NONE", "data": data,
+        "dependence_case": bool(depends),
+        "dependence_case_data": [{"case_id": i, "dependent_data": []} for i in depends] or None,
+        "teardown": [{"case_id": i} for i in teardown] or None,
+        "current_request_set_cache": [{"name": set_cache}] if set_cache else None
+    }
+
+
+def test_order_unchanged_when_dependencies_satisfied():
+    graph = CaseDependencyGraph({"a": case(), "b": case(depends=["a"]), "c": case()})
+    assert graph.topological_order() == ["a", "b", "c"]
+
+
+def test_dependencies_are_hoisted_before_dependents():
+    graph = CaseDependencyGraph({
+        "order": case(depends=["login"], teardown=["cancel"]),
+        "other": case(),
+        "cancel": case(),
+        "login": case()
+    })
+    assert graph.topological_order() == ["login", "cancel", "order", "other"]
+
+
+def test_soft_dependency_from_cache_reference():
+    graph = CaseDependencyGraph({
+        "query": case(data={"token": "$cache{int:token}"}),
+        "login": case(set_cache="token")
+    })
+    assert graph.soft == {"query": ["login"], "login": []}
+    assert graph.topological_order() == ["login", "query"]
+
+
+def test_hard_cycle_raises():
+    graph = CaseDependencyGraph({
+        "a": case(depends=["b"]), "b": case(depends=["c"]), "c": case(depends=["a"]), "d": case()
+    })
+    with pytest.raises(DependencyCycleError, match="a -> b -> c -> a"):
+        graph.check_cycle()
+
+
+def test_soft_cycle_does_not_raise():
+    graph = CaseDependencyGraph({
+        "a": case(set_cache="x", data="$cache{y}"),
+        "b": case(set_cache="y", data="$cache{x}")
+    })
+    graph.check_cycle()
+    assert sorted(graph.topological_order()) == ["a", "b"]
+
+
+def test_dependence_closure():
+    graph = CaseDependencyGraph({
+        "a": case(), "b": case(depends=["a"]), "c": case(depends=["b"]), "d": case()
+    })
+    assert graph.dependence_closure(["c"]) == {"a", "b"}
+
+
+def test_scheduler_runs_dependencies_first():
+    graph = CaseDependencyGraph({
+        "login": case(), "order": case(depends=["login"]), "pay": case(depends=["order"]), "other": case()
+    })
+    finished, lock = [], threading.Lock()
+
+    def func(case_id):
+        with lock:
+            finished.append(case_id)
+        return case_id.upper()
+
+    results = DependencyScheduler(graph, max_workers=4).run(func, graph.cases)
+    assert results == {"login": "LOGIN", "order": "ORDER", "pay": "PAY", "other": "OTHER"}
+    assert finished.index("login") < finished.index("order") < finished.index("pay")
+
+
+def test_scheduler_skips_cases_whose_dependency_failed():
+    graph = CaseDependencyGraph({
+        "login": case(), "order": case(depends=["login"]), "pay": case(depends=["order"]), "other": case()
+    })
+    called = []
+
+    def func(case_id):
+        called.append(case_id)
+        if case_id == "login":
+            raise ValueError("登录失败")
+        return case_id
+
+    results = DependencyScheduler(graph, max_workers=2).run(func, graph.cases)
+    assert sorted(called) == ["login", "other"]
+    assert isinstance(results["login"], ValueError)
+    assert isinstance(results["order"], RuntimeError)
+    assert isinstance(results["pay"], RuntimeError)
+    assert results["other"] == "other"
+
+
+def test_scheduler_breaks_soft_cycle():
+    graph = CaseDependencyGraph({
+        "a": case(set_cache="x", data="$cache{y}"),
+        "b": case(set_cache="y", data="$cache{x}")
+    })
+    results = DependencyScheduler(graph).run(lambda i: i, ["a", "b"])
+    assert results == {"a": "a", "b": "b"}
@@ -0,0 +1,84 @@
+"""
+# @describe: 依赖用例执行结果缓存测试
+"""
+import threading
+import time
+import pytest
+from utils.cache_process.dependent_cache import DependentCaseCache
+
+
+class Counter:
+    """ 记录依赖用例的执行次数 """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"result_{self.calls}"
+
+
+def test_invalid_scope_raises():
+    with pytest.raises(ValueError):
+        DependentCaseCache(scope='class')
+
+
+def test_scope_none_always_executes():
+    cache, func = DependentCaseCache(scope='none'), Counter()
+    assert cache.get_or_execute("login_01", {"name": "a"}, func) == "result_1"
+    assert cache.get_or_execute("login_01", {"name": "a"}, func) == "result_2"
+    assert cache.stats() == {"scope": "none", "hits": 0, "misses": 2}
+
+
+def test_session_scope_hits_same_fingerprint():
+    cache, func = DependentCaseCache(scope='session'), Counter()
+    assert cache.get_or_execute("login_01", {"name": "a"}, func) == "result_1"
+    assert cache.get_or_execute("login_01", {"name": "a"}, func) == "result_1"
+    # 替换后的用例内容变化时，请求指纹不同，重新执行
+    assert cache.get_or_execute("login_01", {"name": "b"}, func) == "result_2"
+    cache.module_start()
+    assert cache.get_or_execute("login_01", {"name": "a"}, func) == "result_1"
+    assert func.calls == 2
+    assert cache.stats() == {"scope": "session", "hits": 2, "misses": 2}
+
+
+def test_module_scope_clears_on_module_start():
+    cache, func = DependentCaseCache(scope='module'), Counter()
+    cache.get_or_execute("login_01", None, func)
+    cache.get_or_execute("login_01", None, func)
+    cache.module_start()
+    assert cache.get_or_execute("login_01", None, func) == "result_2"
+    assert func.calls == 2
+
+
+def test_ttl_expires(monkeypatch):
+    cache, func = DependentCaseCache(scope='session', ttl=10), Counter()
+    _now = time.time()
+    monkeypatch.setattr(time, "time", lambda: _now)
+    cache.get_or_execute("login_01", None, func)
+    monkeypatch.setattr(time, "time", lambda: _now + 5)
+    assert cache.get_or_execute("login_01", None, func) == "result_1"
+    monkeypatch.setattr(time, "time", lambda: _now + 11)
+    assert cache.get_or_execute("login_01", None, func) == "result_2"
+
+
+def test_concurrent_calls_execute_once():
+    cache = DependentCaseCache(scope='session')
+    calls = []
+
+    def func():
+        calls.append(1)
+        time.sleep(0.05)
+        return "result"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_execute("login_01", None, func)))
+        for _ in range(8)
+    ]
+    for i in threads:
+        i.start()
+    for i in threads:
+        i.join()
+    assert results == ["result"] * 8
+    assert len(calls) == 1
@@ -0,0 +1,71 @@
+"""
+# @describe: 失败用例 excel 测试，每条失败用例按原有 A~L 列的顺序写入一行
+"""
+import pytest
+from openpyxl import load_workbook
+from utils.other_tools.allure_data.error_case_excel import ErrorCaseExcel
+
+
+def broken_case(index):
+    """ 未发送请求就中断的用例，数据全部来自 allure 中的 parameters """
+    parameters = {
+        "url": f"http://127.0.0.1/api/{index}", "method": "POST", "requestType": "JSON",
+        "headers": {"Content-Type": "application/json"}, "data": {"id": index, "name": "张三"},
+        "dependence_case_data": [{"case_id": "login_01"}], "sql": None,
+        "assert_data": {"status_code": 200}
+    }
+    return {
+        "uid": f"uid_{index}",
+        "name": f"test_api[用例_{index}]",
+        "parameters": [{"name": "in_data", "value": repr(parameters)}],
+        "testStage": {"status": "broken", "statusMessage": f"ConnectionError: 用例_{index}\x07", "steps": []},
+        "time": {"duration": 100 + index}
+    }
+
+
+def old_row(case_data, data):
+    """ 原有 xlwings 写法中 A~L 列依次写入的内容 """
+    return [str(i) for i in (
+        case_data.get_uid(data), case_data.get_case_name(data), case_data.get_case_url(data),
+        case_data.get_method(data), case_data.get_request_type(data), case_data.get_headers(data),
+        case_data.get_case_data(data), case_data.get_dependence_case(data), case_data.get_assert(data),
+        case_data.get_sql(data), case_data.get_case_time(data), case_data.get_response(data)
+    )]
+
+
+@pytest.fixture
+def excel(tmp_path):
+    return ErrorCaseExcel(str(tmp_path / "Files" / "自动化异常测试用例.xlsx"))
+
+
+def read_rows(path):
+    sheet = load_workbook(path, read_only=True)["异常用例"]
+    return [list(i) for i in sheet.iter_rows(values_only=True)]
+
+
+def test_rows_match_old_columns(excel):
+    cases = [broken_case(i) for i in range(3)]
+    assert excel.write_rows(excel.case_row(i) for i in cases) == 3
+    rows = read_rows(excel._file_path)
+    assert rows[0] == ErrorCaseExcel.HEADERS
+    assert len(rows[0]) == 12
+    for case, row in zip(cases, rows[1:]):
+        expected = old_row(excel.case_data, case)
+        # 控制字符在 excel 中不合法，写入前会被删除
+        expected[11] = expected[11].replace("\x07", "")
+        assert row == expected
+    assert rows[1][:5] == ["uid_0", "用例_0", "http://127.0.0.1/api/0", "POST", "JSON"]
+    assert rows[1][10] == "100ms"
+
+
+def test_long_cell_is_truncated(excel):
+    value = ErrorCaseExcel.cell_value("x" * (ErrorCaseExcel.MAX_CELL_LENGTH + 10))
+    assert len(value) == ErrorCaseExcel.MAX_CELL_LENGTH
+    assert value.endswith(ErrorCaseExcel.TRUNCATED_SUFFIX)
+    excel.write_rows([[value] + [""] * 11])
+    assert read_rows(excel._file_path)[1][0] == value
+
+
+def test_empty_rows_write_header_only(excel):
+    assert excel.write_rows([]) == 0
+    assert read_rows(excel._file_path) == [ErrorCaseExcel.HEADERS]
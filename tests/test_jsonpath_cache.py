@@ -0,0 +1,53 @@
+"""
+# @describe: jsonpath 表达式编译缓存测试，提取结果与 jsonpath 库保持一致
+"""
+import pytest
+from jsonpath import jsonpath as lib_jsonpath
+from utils.other_tools.jsonpath_cache import compile_jsonpath, jsonpath
+
+DATA = {
+    "code": 0,
+    "msg": None,
+    "data": {
+        "id": 10,
+        "user-name": "张三",
+        "list": [{"id": 1, "tags": ["a", "b"]}, {"id": 2, "tags": []}],
+        "empty": {},
+        "flag": False,
+        "0": "字符串 key"
+    }
+}
+
+
+@pytest.mark.parametrize("expr", [
+    "$",
+    "$.code",
+    "$.msg",
+    "$.data.id",
+    "$.data.user-name",
+    "$.data.list[0].id",
+    "$.data.list.[1].id",
+    "$.data.list[0].tags[1]",
+    "$.data.list[5].id",
+    "$.data.flag",
+    "$.data.empty",
+    "$.data.missing",
+    "$.code.missing",
+    "$.data.0",
+    "$..id",
+    "$.data.list[*].id",
+    "$.data.list[?(@.id==2)].tags",
+    "$.data.list[-1:].id"
+])
+def test_parity_with_jsonpath(expr):
+    assert jsonpath(DATA, expr) == lib_jsonpath(DATA, expr)
+
+
+def test_simple_paths_are_pre_split():
+    assert compile_jsonpath("$.data.list[0].id").tokens == ("data", "list", "0", "id")
+    assert compile_jsonpath("$..id").tokens is None
+    assert compile_jsonpath("$.data.list[*].id").tokens is None
+
+
+def test_expressions_are_cached():
+    assert compile_jsonpath("$.data.id") is compile_jsonpath("$.data.id")
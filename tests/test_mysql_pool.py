@@ -0,0 +1,147 @@
+"""
+# @describe: mysql 连接池测试，使用模拟的数据库连接，不需要真实的 mysql 服务
+"""
+import threading
+import pymysql
+import pytest
+from utils import config
+from utils.mysql_tool import mysql_control
+from utils.mysql_tool.mysql_pool import MysqlConnectionPool
+
+
+class FakeConnection:
+    """ 记录 ping、rollback、close 调用情况的数据库连接 """
+
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.pings = 0
+        self.rollbacks = 0
+        self.closed = False
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.alive:
+            raise pymysql.err.OperationalError(2006, "MySQL server has gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+        if not self.alive:
+            raise pymysql.err.OperationalError(2006, "MySQL server has gone away")
+
+    def close(self):
+        self.closed = True
+
+
+class Creator:
+    """ 记录创建的所有连接 """
+
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        conn = FakeConnection()
+        self.connections.append(conn)
+        return conn
+
+
+def test_connection_is_reused():
+    creator = Creator()
+    pool = MysqlConnectionPool(creator, max_size=2)
+    for _ in range(3):
+        with pool.connection() as conn:
+            assert conn is creator.connections[0]
+    assert conn.rollbacks == 3
+    assert pool.stats() == {"size": 1, "idle": 1, "checkouts": 3, "waits": 0, "creations": 1, "discards": 0}
+
+
+def test_checkout_waits_until_released():
+    creator = Creator()
+    pool = MysqlConnectionPool(creator, max_size=1, timeout=5)
+    first = pool.acquire()
+    threading.Timer(0.1, pool.release, args=(first,)).start()
+    assert pool.acquire() is first
+    assert pool.waits == 1 and len(creator.connections) == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    pool = MysqlConnectionPool(Creator(), max_size=1, timeout=0.05)
+    pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+
+def test_ping_only_after_idle_interval():
+    creator = Creator()
+    pool = MysqlConnectionPool(creator, ping_interval=60)
+    pool.release(pool.acquire())
+    pool.release(pool.acquire())
+    assert creator.connections[0].pings == 0
+
+
+def test_dead_connection_is_replaced_after_ping():
+    creator = Creator()
+    pool = MysqlConnectionPool(creator, ping_interval=0)
+    first = pool.acquire()
+    pool.release(first)
+    first.alive = False
+    second = pool.acquire()
+    assert first.pings == 1 and first.closed
+    assert second is creator.connections[1]
+    assert pool.stats()["size"] == 1 and pool.discards == 1
+
+
+def test_failed_rollback_discards_connection():
+    creator = Creator()
+    pool = MysqlConnectionPool(creator)
+    conn = pool.acquire()
+    conn.alive = False
+    pool.release(conn)
+    assert conn.closed
+    assert pool.stats()["idle"] == 0 and pool.stats()["size"] == 0
+
+
+def test_failed_creation_frees_slot():
+    calls = []
+
+    def creator():
+        calls.append(1)
+        if len(calls) == 1:
+            raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+        return FakeConnection()
+
+    pool = MysqlConnectionPool(creator, max_size=1, timeout=0.05)
+    with pytest.raises(pymysql.err.OperationalError):
+        pool.acquire()
+    assert isinstance(pool.acquire(), FakeConnection)
+
+
+def test_close_discards_idle_connections():
+    creator = Creator()
+    pool = MysqlConnectionPool(creator)
+    busy = pool.acquire()
+    idle = pool.acquire()
+    pool.release(idle)
+    pool.close()
+    assert idle.closed and not busy.closed
+    pool.release(busy)
+    assert busy.closed
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+def test_init_pool_connects_with_config(monkeypatch):
+    connect_kwargs = []
+    monkeypatch.setattr(config.mysql_db, "switch", True)
+    monkeypatch.setattr(config.mysql_db, "host", "127.0.0.1")
+    monkeypatch.setattr(config.mysql_db, "pool_size", 3)
+    monkeypatch.setattr(pymysql, "connect", lambda **kwargs: connect_kwargs.append(kwargs) or FakeConnection())
+    pool = mysql_control._init_mysql_pool()
+    assert pool.max_size == 3
+    with pool.connection():
+        pass
+    assert connect_kwargs == [{
+        "host": "127.0.0.1", "user": config.mysql_db.user,
+        "password": config.mysql_db.password, "port": config.mysql_db.port
+    }]
+    monkeypatch.setattr(config.mysql_db, "switch", False)
+    assert mysql_control._init_mysql_pool() is None
@@ -0,0 +1,111 @@
+"""
+# @describe: 用例分阶段耗时统计测试
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from utils.logging_tool.phase_timer import PhaseTimer
+
+
+class Clock:
+    """ 手动推进的 perf_counter """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def tick(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    _clock = Clock()
+    monkeypatch.setattr(time, "perf_counter", _clock)
+    return _clock
+
+
+@pytest.fixture
+def timer():
+    _timer = PhaseTimer()
+    _timer.configure(True)
+    return _timer
+
+
+def test_disabled_timer_records_nothing():
+    timer = PhaseTimer()
+    with timer.bind("case"), timer.phase("http"):
+        pass
+    assert timer.summary() == {"total": {"total_ms": 0, "phases": {}}, "cases": {}}
+
+
+def test_nested_phases_record_self_time(timer, clock):
+    with timer.bind("case"):
+        with timer.phase("request"):
+            clock.tick(0.002)
+            with timer.phase("http"):
+                clock.tick(0.010)
+            with timer.phase("log"):
+                clock.tick(0.001)
+        with timer.phase("http"):
+            clock.tick(0.005)
+    assert timer.case_summary("case") == {
+        "total_ms": 18.0,
+        "phases": {
+            "http": {"count": 2, "total_ms": 15.0},
+            "request": {"count": 1, "total_ms": 2.0},
+            "log": {"count": 1, "total_ms": 1.0}
+        }
+    }
+
+
+def test_timed_decorator(timer, clock):
+    @timer.timed("render")
+    def render():
+        clock.tick(0.003)
+        return "ok"
+
+    with timer.bind("case"):
+        assert render() == "ok"
+    assert timer.case_summary("case")["phases"] == {"render": {"count": 1, "total_ms": 3.0}}
+
+
+def test_bind_restores_previous_nodeid(timer):
+    with timer.bind("outer"):
+        with timer.bind("inner"):
+            assert timer.current_nodeid() == "inner"
+        assert timer.current_nodeid() == "outer"
+    # 未通过 bind 指定时使用 PYTEST_CURRENT_TEST
+    assert timer.current_nodeid() == "tests/test_phase_timer.py::test_bind_restores_previous_nodeid"
+    with timer.bind(""):
+        assert timer.current_case() == "session"
+
+
+def test_bound_records_to_submitting_case(timer):
+    def teardown():
+        with timer.phase("teardown"):
+            return timer.current_case()
+
+    with timer.bind("case_a"):
+        task = timer.bound(teardown)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # 提交任务时已经离开 case_a，后台线程中的耗时仍然记录到 case_a 下
+        assert executor.submit(task).result() == "case_a"
+    assert timer.case_summary("case_a")["phases"]["teardown"]["count"] == 1
+    assert list(timer.summary()["cases"]) == ["case_a"]
+
+
+def test_summary_and_export(timer, clock, tmp_path):
+    for nodeid, seconds in (("case_a", 0.004), ("case_b", 0.006)):
+        with timer.bind(nodeid), timer.phase("http"):
+            clock.tick(seconds)
+    path = timer.export(str(tmp_path / "report" / "phase_timing.json"))
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    assert data["total"] == {"total_ms": 10.0, "phases": {"http": {"count": 2, "total_ms": 10.0}}}
+    assert set(data["cases"]) == {"case_a", "case_b"}
+    timer.configure(False)
+    assert timer.export(str(tmp_path / "disabled.json")) is None
@@ -0,0 +1,61 @@
+"""
+# @describe: 按数据结构替换占位符测试，结果与原有 ast.literal_eval(cache_regular(str(data))) 的写法保持一致
+"""
+import ast
+import pytest
+from tests.test_template_control import old_cache_regular, old_regular
+from utils.other_tools.read_files_tools.regular_control import Context, literal_resolve, resolve_data
+
+CACHE = {"user_id": 10, "name": "张三", "ids": [1, 2], "flag": "True", "info": {"age": 18}}
+
+
+@pytest.fixture
+def cache(cache_pool):
+    cache_pool.update(CACHE)
+    return cache_pool
+
+
+@pytest.mark.parametrize("data", [
+    {"id": "$cache{int:user_id}", "name": "$cache{name}", "path": "/user/$cache{user_id}"},
+    {"ids": "$cache{list:ids}", "info": "$cache{dict:info}", "nested": [{"id": "$cache{int:user_id}"}, 1, None]},
+    {"count": 3, "enabled": True, "price": 1.5, "empty": None, "missing": "$cache{missing}"},
+    ["$cache{name}", {"$cache{name}": "$cache{int:user_id}"}],
+    {"is_run": "$cache{bool:flag}"},
+    "'$cache{bool:flag}'",
+    True,
+    None
+])
+def test_literal_resolve_parity(cache, data):
+    assert literal_resolve(data) == ast.literal_eval(old_cache_regular(str(data)))
+
+
+def test_literal_resolve_bare_string(cache):
+    # 原有写法中不带引号的字符串无法通过 ast.literal_eval 解析，现在直接返回替换后的结果
+    assert literal_resolve("$cache{name}") == "张三"
+    assert literal_resolve("$cache{bool:flag}") is True
+    assert literal_resolve("$cache{missing}") == "$cache{missing}"
+
+
+def test_resolve_data_parity_with_functions(cache):
+    Context.register("fixed_int", lambda: 7)
+    try:
+        data = {"x": "${{int:fixed_int()}}", "y": "id_${{fixed_int()}}", "z": "$cache{int:user_id}"}
+        expected = ast.literal_eval(old_cache_regular(old_regular(str(data))))
+        assert resolve_data(data, func_switch=True) == expected
+        # 关闭 func_switch 时 ${{}} 原样保留
+        assert resolve_data(data)["x"] == "${{int:fixed_int()}}"
+    finally:
+        Context.unregister("fixed_int")
+
+
+def test_typed_value_is_a_copy(cache):
+    data = resolve_data({"ids": "$cache{list:ids}"})
+    data["ids"].append(3)
+    assert cache["ids"] == [1, 2]
+
+
+def test_non_string_leaves_are_not_copied():
+    body = {"items": list(range(3)), "file": b"bytes"}
+    data = resolve_data(body)
+    assert data == body
+    assert data["file"] is body["file"]
@@ -0,0 +1,119 @@
+"""
+# @describe: 用例模板编译测试，编译后的模板与原有逐个正则替换的结果保持一致
+"""
+import re
+import pytest
+from jsonpath import jsonpath
+from utils.cache_process.cache_control import CacheHandler
+from utils.other_tools.read_files_tools import template_control
+from utils.other_tools.read_files_tools.regular_control import Context, cache_regular, regular, sql_regular
+from utils.other_tools.read_files_tools.template_control import MAX_CACHED_LENGTH, compile_template
+
+_VALUE_TYPES = ['int:', 'bool:', 'list:', 'dict:', 'tuple:', 'float:']
+
+
+def old_cache_regular(value):
+    """ 原有的 cache_regular 实现 """
+    for regular_data in re.findall(r"\$cache\{(.*?)\}", value):
+        if any(i in regular_data for i in _VALUE_TYPES) is True:
+            value_types = regular_data.split(":")[0]
+            regular_data = regular_data.split(":")[1]
+            pattern = re.compile(r'\'\$cache\{' + value_types + ":" + regular_data + r'\}\'')
+        else:
+            pattern = re.compile(r'\$cache\{' + regular_data.replace('$', "\\$").replace('[', '\\[') + r'\}')
+        try:
+            value = re.sub(pattern, str(CacheHandler.get_cache(regular_data)), value)
+        except Exception:
+            pass
+    return value
+
+
+def old_regular(target):
+    """ 原有的 regular 实现，函数从 Context 实例中获取 """
+    regular_pattern = r'\${{(.*?)}}'
+    while re.findall(regular_pattern, target):
+        key = re.search(regular_pattern, target).group(1)
+        if any(i in key for i in _VALUE_TYPES) is True:
+            key = key.split(":")[1]
+            pattern = r'\'\${{(.*?)}}\''
+        else:
+            pattern = regular_pattern
+        func_name, value_name = key.split("(")[0], key.split("(")[1][:-1]
+        func = Context.instance().get_function(func_name)
+        value_data = func() if value_name == "" else func(*value_name.split(","))
+        target = re.sub(pattern, str(value_data), target, 1)
+    return target
+
+
+def old_sql_regular(value, res):
+    """ 原有的 sql_regular 实现 """
+    for i in re.findall(r"\$json\((.*?)\)\$", value):
+        pattern = re.compile(r'\$json\(' + i.replace('$', "\\$").replace('[', '\\[') + r'\)\$')
+        value = re.sub(pattern, str(jsonpath(res, i)[0]), value, count=1)
+    return value
+
+
+@pytest.fixture
+def functions():
+    Context.register("fixed_int", lambda: 7)
+    Context.register("join", lambda *args: "-".join(args))
+    yield
+    Context.unregister("fixed_int")
+    Context.unregister("join")
+
+
+@pytest.mark.parametrize("value", [
+    "{'id': '$cache{int:user_id}', 'name': '$cache{name}', 'token': 'Bearer $cache{token}'}",
+    "/api/user/$cache{user_id}/orders?page=$cache{page}&user=$cache{user_id}",
+    "$cache{missing} and $cache{name}",
+    "{'ids': '$cache{list:ids}', 'raw': $cache{ids}}",
+    "没有占位符的字符串",
+    ""
+])
+def test_cache_regular_parity(cache_pool, value):
+    cache_pool.update({"user_id": 10, "name": "张三", "token": "abc", "page": 2, "ids": [1, 2]})
+    assert cache_regular(value) == old_cache_regular(value)
+
+
+@pytest.mark.parametrize("value", [
+    "{'x': '${{int:fixed_int()}}', 'y': '${{join(a,b)}}', 'z': 'pre-${{fixed_int()}}'}",
+    "/api/${{join(v1,user)}}/${{fixed_int()}}",
+    "{'host': '${{host()}}'}",
+    "没有占位符的字符串"
+])
+def test_regular_parity(functions, value):
+    assert regular(value) == old_regular(value)
+
+
+@pytest.mark.parametrize("value", [
+    "select * from user where id = $json($.data.id)$ and name = '$json($.data.name)$'",
+    "delete from orders where id in ($json($.data.orders[0])$, $json($.data.orders[1])$)"
+])
+def test_sql_regular_parity(value):
+    res = {"data": {"id": 3, "name": "李四", "orders": [11, 12]}}
+    assert sql_regular(value, res) == old_sql_regular(value, res)
+
+
+def test_tokens_keep_surrounding_quotes():
+    tokens = compile_template("a'$cache{int:id}'b").tokens
+    assert tokens[0] == "a" and tokens[2] == "b"
+    assert (tokens[1].kind, tokens[1].name, tokens[1].value_type, tokens[1].quoted) == ('cache', 'id', 'int', True)
+
+
+def test_unhandled_kinds_are_kept():
+    source = "$cache{a} ${{fixed_int()}} $json($.a)$"
+    assert compile_template(source).render() == source
+    assert compile_template(source).render(cache_handler=lambda t: "1") == "1 ${{fixed_int()}} $json($.a)$"
+
+
+def test_short_sources_are_cached():
+    assert compile_template("/api/$cache{user_id}") is compile_template("/api/$cache{user_id}")
+
+
+def test_long_sources_bypass_cache():
+    source = "$cache{name}" + "x" * MAX_CACHED_LENGTH
+    _size = template_control._compile_cached.cache_info().currsize
+    first = compile_template(source)
+    assert first is not compile_template(source)
+    assert first.render(cache_handler=lambda t: "1") == "1" + "x" * MAX_CACHED_LENGTH
+    assert template_control._compile_cached.cache_info().currsize == _size
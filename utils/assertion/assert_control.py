@@ -1,26 +1,99 @@
 """
 断言类型封装，支持json响应断言、数据库断言
 """
-import ast
-import json
-from typing import Text, Any
-from jsonpath import jsonpath
+import threading
+from collections import OrderedDict
+from typing import Text, Any, Dict, List, Union
+from utils.other_tools.jsonpath_cache import jsonpath
 from utils.other_tools.models import AssertMethod
 from utils.logging_tool.log_control import WARNING
-from utils.read_files_tools.regular_control import cache_regular
+from utils.logging_tool.phase_timer import phase_timer
+from utils.other_tools.read_files_tools.regular_control import literal_resolve
 from utils.other_tools.models import load_module_functions
 from utils.assertion import assert_type
 from utils.other_tools.exceptions import AssertTypeError
+from utils.other_tools.json_tool import loads
 from utils import config
 
 
+# 定义了一个变量 _functions_mapping，用于缓存 assert_type 模块中的断言函数，只在第一次使用时加载。
+_functions_mapping: Union[Dict, None] = None
+
+
+# 定义了一个名为 _has_placeholder 的函数，用于判断断言数据中是否使用了 $cache{} 缓存数据。
+def _has_placeholder(data: Any) -> bool:
+    if isinstance(data, str):
+        return "$cache{" in data
+    if isinstance(data, dict):
+        return any(_has_placeholder(k) or _has_placeholder(v) for k, v in data.items())
+    if isinstance(data, (list, tuple)):
+        return any(_has_placeholder(i) for i in data)
+    return False
+
+
+# 定义了一个名为 AssertItem 的类，表示编译后的单条断言。
+class AssertItem:
+    """ 单条断言，未使用 $cache{} 的断言数据只替换、解析一次 """
+
+    __slots__ = ('raw', 'dynamic', '_resolved')
+
+    def __init__(self, raw: Any):
+        # raw 为用例中的原始断言数据，dynamic 表示断言数据中是否使用了缓存数据，使用了缓存数据时，每次断言都需要重新替换。
+        self.raw = raw
+        self.dynamic = _has_placeholder(raw)
+        self._resolved = None if self.dynamic else literal_resolve(raw)
+
+    def resolve(self) -> Any:
+        """ 获取替换缓存数据后的断言数据 """
+        if self.dynamic:
+            return literal_resolve(self.raw)
+        return self._resolved
+
+
+# 定义了一个名为 AssertPlan 的类，表示编译后的断言计划，同一份断言数据只编译一次。
+class AssertPlan:
+    """ 断言计划，将用例的 assert_data 拆分为状态码断言和其他断言，按断言数据内容缓存 """
+
+    # 编译后的断言计划缓存，超过 maxsize 时删除最早的缓存。
+    maxsize = 4096
+    _plans: "OrderedDict[Text, AssertPlan]" = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, assert_data: Dict):
+        # 状态码断言单独保存，在其他断言之前校验。
+        self.has_status_code = "status_code" in assert_data
+        self.status_code = assert_data.get("status_code")
+        self.items: List[AssertItem] = [AssertItem(v) for k, v in assert_data.items() if k != "status_code"]
+
+    @classmethod
+    def compile(cls, assert_data: Dict) -> "AssertPlan":
+        """
+        获取断言计划，相同内容的断言数据直接复用已编译的断言计划
+        :param assert_data: 用例中的原始断言数据
+        :return:
+        """
+        key = repr(assert_data)
+        with cls._lock:
+            plan = cls._plans.get(key)
+            if plan is not None:
+                cls._plans.move_to_end(key)
+                return plan
+        plan = cls(assert_data)
+        with cls._lock:
+            cls._plans[key] = plan
+            if len(cls._plans) > cls.maxsize:
+                cls._plans.popitem(last=False)
+        return plan
+
+
 # 一个名为 AssertUtil 的类，用于封装测试用例中的断言操作。
 class AssertUtil:
 
     # 这是 AssertUtil 类的构造方法，用于初始化该类的各种属性。
-    def __init__(self, assert_data, sql_data, request_data, response_data, status_code):
+    def __init__(self, assert_data, sql_data, request_data, response_data, status_code, response=None):
         """
             :param  response_data：请求的响应数据。
+            :param  response：请求返回的 ResponseData，可选参数，传入时直接使用其中解析后的响应结果。
             :param  request_data：请求的请求数据。
             :param  sql_data：SQL 语句执行的结果。
             :param  assert_data：测试用例中的断言部分数据。
@@ -35,27 +108,36 @@ class AssertUtil:
         self.assert_data = assert_data
         self.sql_switch = config.mysql_db.switch
         self.status_code = status_code
+        self.response = response
+        # 替换缓存数据后的断言数据，以及它对应的原始断言数据，同一条断言数据只替换一次。
+        self._resolved_source = None
+        self._resolved = None
+        # 解析后的响应数据，所有断言共用，只解析一次。
+        self._response = None
 
     # @staticmethod 是 Python 中的一个装饰器，用于将一个方法定义为静态方法。在 Python 中，静态方法是属于类的，而不是属于实例的。因此在静态方法中，不能使用 self 关键字来访问实例属性和方法，而是要使用类属性和方法。
     @staticmethod
-    # 定义了一个名为literal_eval()的静态方法。这个方法接收一个参数attr，对该参数执行了cache_regular(str(attr))方法后，再使用Python内置的ast模块的literal_eval()方法对其进行转换，并返回转换后的结果。
+    # 定义了一个名为literal_eval()的静态方法。这个方法接收一个参数attr，对该参数执行literal_resolve()方法，按数据结构替换其中的缓存数据，并返回替换后的结果。
     def literal_eval(attr):
-        # ast.literal_eval()方法帮助我们将一个字符串表达式解析为Python数据类型，比如将字符串'["a", 1, {"key": "value"}]'解析为List类型["a", 1, {"key": "value"}]。在cache_regular()方法中，它的主要功能是在字符串中寻找形如$cache{xxx}的字符串，并从缓存中获取与xxx相关的数据，再进行替换。这样在literal_eval()方法中，我们传递给它的是一个字符串，我们需要对这个字符串中嵌入的缓存变量进行处理后再进行转换。
-        return ast.literal_eval(cache_regular(str(attr)))
+        # literal_resolve()方法会遍历dict、list，只在叶子节点的字符串中寻找形如$cache{xxx}的占位符，并从缓存中获取与xxx相关的数据进行替换，不再需要先str()再ast.literal_eval()，其余数据保持原有的数据类型。
+        return literal_resolve(attr)
 
     # 总之，这段代码提供了一种从缓存中获取数据并将其与外部程序进行交互的机制，并对字符串表达式进行操作和转换。这对于处理数据表达式和进行数据序列化非常有用。
 
     # @property是一个Python内置的装饰器，用于将一个方法转换为属性。当我们将@property应用于一个类的方法时，它会将该方法转换为只读属性，这意味着我们可以像访问属性一样使用该方法，而不是函数。
     @property
-    # 定义了一个名为get_assert_data()的属性方法，该方法返回实例的assert_data属性，并调用cache_regular()方法将assert_data属性中包含的缓存字符串转换成实际数据类型后返回。
+    # 定义了一个名为get_assert_data()的属性方法，该方法返回实例的assert_data属性，并调用literal_resolve()方法将assert_data属性中包含的缓存字符串替换成实际数据后返回。
     def get_assert_data(self):
         # 该代码段使用Python中的assert语句检查self.assert_data是否为None。如果self.assert_data为None，则会触发一条异常，该异常描述了所在类及其缺失的属性。代码中使用%运算符连接字符串，%s表示需要被替换的格式化字符串。由于self.__class__.__name__表示当前实例所属的类名，因此，当检查失败时，错误消息将会包含所属类的名称。
         assert self.assert_data is not None, (
                 "'%s' should either include a `assert_data` attribute, "
                 % self.__class__.__name__
         )
-        # 该代码行通过调用ast.literal_eval()方法将cache_regular()方法解析后的字符串转换为Python字典或列表对象，并将其作为属性方法的返回值返回。
-        return ast.literal_eval(cache_regular(str(self.assert_data)))
+        # 该代码行通过调用literal_resolve()方法按数据结构替换缓存数据，直接得到Python字典或列表对象，并将其作为属性方法的返回值返回。同一条断言数据只替换一次，后续的属性方法直接复用替换结果。
+        if self._resolved_source is not self.assert_data:
+            self._resolved = literal_resolve(self.assert_data)
+            self._resolved_source = self.assert_data
+        return self._resolved
 
     @property
     # 定义了一个名为get_type()的属性方法，该方法返回实例的assert_data字典中的type属性对应的枚举值
@@ -137,14 +219,19 @@ class AssertUtil:
     @staticmethod
     # 定义了一个名为functions_mapping()的静态方法。该方法调用了load_module_functions()函数并将其结果返回。具体来说，该方法返回了一个名为assert_type模块中所有函数的字典，该字典的键为函数名，值为函数的内存地址。
     def functions_mapping():
-        # 该代码行调用load_module_functions()函数，并将返回的字典作为该方法的返回值。该字典中包含了assert_type模块中所有函数的名称和内存地址。
-        return load_module_functions(assert_type)
+        global _functions_mapping
+        # 该代码行调用load_module_functions()函数，并将返回的字典作为该方法的返回值。该字典中包含了assert_type模块中所有函数的名称和内存地址。只在第一次调用时加载，后续直接复用。
+        if _functions_mapping is None:
+            _functions_mapping = load_module_functions(assert_type)
+        return _functions_mapping
 
     @property
     # 定义了get_response_data方法，它有一个self参数。self表示实例本身，在这里，它的作用是让方法可以访问对象的其他属性和方法。
     def get_response_data(self):
-        # 我们使用json.loads这个函数将response_data这个字符串转换为Python对象。
-        return json.loads(self.response_data)
+        # 我们使用loads这个函数将response_data这个字符串转换为Python对象。所有断言共用同一个解析结果，只解析一次；传入了 ResponseData 时，直接复用其中已经解析的响应结果。
+        if self._response is None:
+            self._response = self.response.response_json if self.response is not None else loads(self.response_data)
+        return self._response
 
     @property
     # 定义了sql_switch_handle方法。该方法的作用是用于处理数据库开关的状态，并判断是否要打印断言数据。
@@ -220,41 +307,24 @@ class Assert(AssertUtil):
 
     # 定义名为 assert_data_list 的方法。
     def assert_data_list(self):
-        # 初始化一个空列表 assert_list，用于存储每一项测试数据的断言结果。
-        assert_list = []
-        # 遍历 assert_data 字典中的键值对，assert_data 是 AssertUtil 类中的一个数据成员，存储了当前测试用例所需要验证的数据。
-        for k, v in self.assert_data.items():
-            # 根据键 k 是不是 "status_code" 来判断当前项是不是用于验证响应状态码。
-            if k == "status_code":
-                # 如果当前项用于验证响应状态码，那么使用断言方法 assert 判断 self.status_code 是否等于 v，如果不等于，则抛出异常信息 "响应状态码断言失败"。
-                assert self.status_code == v, "响应状态码断言失败"
-            # 如果当前项不是用于验证响应状态码，那么将其对应的值 v 添加到 assert_list 中。
-            else:
-                assert_list.append(v)
-        # 遍历结束后返回 assert_list 列表，其中包含了每一项测试数据所对应的断言结果。
-        return assert_list
-
-    # 定义了名为 assert_type_handle 的方法。
+        # 获取编译后的断言计划，相同内容的断言数据只编译一次。
+        plan = AssertPlan.compile(self.assert_data)
+        # 如果断言数据中包含用于验证响应状态码的 "status_code"，那么使用断言方法 assert 判断 self.status_code 是否等于期望值，如果不等于，则抛出异常信息 "响应状态码断言失败"。
+        if plan.has_status_code:
+            assert self.status_code == plan.status_code, "响应状态码断言失败"
+        # 返回其余的断言，每一项都是编译后的 AssertItem。
+        return plan.items
+
+    # 定义了名为 assert_type_handle 的方法，所有断言的耗时计入 assert 阶段。
+    @phase_timer.timed("assert")
     def assert_type_handle(self):
-        # 使用 for 循环遍历 self.assert_data_list() 方法返回的每一项测试数据的断言结果，并将其赋值给变量 i。
+        # 使用 for 循环遍历 self.assert_data_list() 方法返回的每一项断言，并将其赋值给变量 i。
         for i in self.assert_data_list():
-            # 将变量 i 赋值给 self.assert_data 成员变量，这样的话，在后面的方法中就能使用 self.assert_data 来引用当前遍历到的测试数据了。
-            self.assert_data = i
-            #使用
-            super()
-            #调用继承自
-            AssertUtil
-            '''
-            类的
-            assert_type_handle
-            方法，该方法的作用是根据当前测试数据的类型，进行对应的验证。这里使用
-            '''
-
-            super()
-            '''
-            目的是将具体的实现交给父类去处理，而当前方法只负责调用，以达到代码的重用性。
-            '''
-
+            # 将原始断言数据赋值给 self.assert_data 成员变量，同时直接使用编译后的断言数据，这样在后面的方法中就不需要再次替换缓存数据了。
+            self.assert_data = i.raw
+            self._resolved_source = i.raw
+            self._resolved = i.resolve()
+            # 使用 super() 调用继承自 AssertUtil 类的 assert_type_handle 方法，根据当前断言数据的类型，进行对应的验证。所有断言共用同一个解析后的响应数据。
             super().assert_type_handle()
 
 # 这个类提供了一种便利的方式来进行多个断言的校验，只需要传入一个断言数据字典，该类就会按照断言类型和断言数值进行校验，并抛出校验失败的异常信息。
@@ -3,7 +3,7 @@
 """
 
 import os
-from typing import Any, Text, Union
+from typing import Any, Callable, Text, Union
 from common.setting import ensure_path_sep
 from utils.other_tools.exceptions import ValueNotFoundError
 
@@ -87,6 +87,10 @@ class Cache:
 _cache_config = {}
 
 
+# 定义了一个变量_lazy_loader，用于保存懒加载用例池的加载方法。开启懒加载后，用例数据只有在第一次被获取时才会解析并写入_cache_config中。
+_lazy_loader: Union[Callable[[Text], bool], None] = None
+
+
 # 定义了一个名为CacheHandler的类。
 class CacheHandler:
 
@@ -96,8 +100,17 @@ class CacheHandler:
         try:
             return _cache_config[cache_data]
         except KeyError:
+            # 缓存中不存在时，如果开启了懒加载用例池，并且cache_data是一个尚未加载的用例ID，则加载对应的用例文件后再次获取。
+            if _lazy_loader is not None and _lazy_loader(cache_data):
+                return _cache_config[cache_data]
             raise ValueNotFoundError(f"{cache_data}的缓存数据未找到，请检查是否将该数据存入缓存中")
 
+    @staticmethod
+    # 这个set_lazy_loader()静态方法接收一个参数loader，用于设置懒加载用例池的加载方法。loader接收用例ID，加载成功返回True，传入None则关闭懒加载。
+    def set_lazy_loader(loader: Union[Callable[[Text], bool], None]) -> None:
+        global _lazy_loader
+        _lazy_loader = loader
+
     @staticmethod
     # 这个update_cache()静态方法接收两个参数，cache_name和value。它将value添加或更新到_cache_config字典中指定cache_name的键。
     def update_cache(*, cache_name, value):
@@ -0,0 +1,168 @@
+"""
+用例编译缓存，yaml 文件未修改时直接读取上一次解析、校验后的用例数据
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from typing import Callable, Dict, Iterable, List, Text, Union
+from utils.logging_tool.log_control import INFO, WARNING
+
+
+# 定义了 CompiledCaseCache 类，以 pickle 文件的形式保存每个 yaml 文件解析后的用例数据。
+class CompiledCaseCache:
+    """ 用例编译缓存，缓存键为文件路径，通过修改时间、文件大小和内容哈希判断文件是否发生变化 """
+
+    # 缓存格式版本号，缓存内容的结构发生变化时需要修改，旧版本的缓存文件会被直接丢弃。
+    version = 2
+
+    def __init__(self, cache_path: Text, fingerprint: Text = "") -> None:
+        """
+        :param cache_path: 缓存文件路径
+        :param fingerprint: 配置指纹，配置文件或用例解析逻辑发生变化时，所有缓存失效
+        """
+        self.cache_path = cache_path
+        self.fingerprint = fingerprint
+        # _index 的键为 yaml 文件路径，值为 {"mtime", "size", "sha1", "cases"}。
+        self._index: Dict[Text, Dict] = {}
+        self._lock = threading.Lock()
+        # 缓存内容是否发生变化，未变化时不需要重新写入缓存文件。
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        """ 读取缓存文件，版本号或配置指纹不一致时丢弃 """
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'rb') as file:
+                data = pickle.load(file)
+        # 缓存文件损坏时，不影响用例执行，重新解析所有用例即可。
+        except Exception as exc:
+            WARNING.logger.warning("用例编译缓存读取失败，将重新解析所有用例: %r", exc)
+            return
+        if not isinstance(data, dict) or data.get('version') != self.version \
+                or data.get('fingerprint') != self.fingerprint:
+            return
+        self._index = data.get('files', {})
+
+    @classmethod
+    def file_hash(cls, file_path: Text) -> Text:
+        """ 计算文件内容的 sha1 """
+        with open(file_path, 'rb') as file:
+            return hashlib.sha1(file.read()).hexdigest()
+
+    def get(self, file_path: Text) -> Union[List, None]:
+        """
+        获取文件对应的用例缓存，文件发生变化或没有缓存时返回 None
+        :param file_path: yaml 文件路径
+        :return:
+        """
+        entry = self._index.get(file_path)
+        if entry is None or not self._is_fresh(file_path, entry):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry['cases']
+
+    def _is_fresh(self, file_path: Text, entry: Dict) -> bool:
+        """ 判断缓存对应的文件是否未发生变化 """
+        stat = os.stat(file_path)
+        if entry['size'] != stat.st_size:
+            return False
+        # 修改时间变化时，再比较文件内容的哈希，避免 git checkout 等操作只修改了时间导致缓存失效。
+        if entry['mtime'] != stat.st_mtime_ns:
+            if entry['sha1'] != self.file_hash(file_path):
+                return False
+            with self._lock:
+                entry['mtime'] = stat.st_mtime_ns
+                self._dirty = True
+        return True
+
+    def set(self, file_path: Text, cases: List) -> None:
+        """
+        写入文件对应的用例缓存
+        :param file_path: yaml 文件路径
+        :param cases: 解析、校验后的用例数据
+        :return:
+        """
+        stat = os.stat(file_path)
+        with self._lock:
+            self._index[file_path] = {
+                "mtime": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha1": self.file_hash(file_path),
+                "cases": cases
+            }
+            self._dirty = True
+
+    def load_cases(self, file_path: Text, loader: Callable[[], List]) -> List:
+        """
+        命中缓存则直接返回用例数据，否则调用 loader 解析用例并写入缓存
+        :param file_path: yaml 文件路径
+        :param loader: 解析用例的方法
+        :return:
+        """
+        cases = self.get(file_path)
+        if cases is not None:
+            return cases
+        cases = loader()
+        self.set(file_path, cases)
+        return cases
+
+    def prune(self, file_paths: Iterable[Text]) -> None:
+        """ 删除已经不存在的 yaml 文件对应的缓存 """
+        _file_paths = set(file_paths)
+        with self._lock:
+            for i in [i for i in self._index if i not in _file_paths]:
+                self._index.pop(i)
+                self._dirty = True
+
+    def save(self) -> None:
+        """ 缓存内容发生变化时，写入缓存文件，先写临时文件再替换，避免并发运行时读取到不完整的文件 """
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        _tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with self._lock:
+            with open(_tmp_path, 'wb') as file:
+                pickle.dump(
+                    {"version": self.version, "fingerprint": self.fingerprint, "files": self._index},
+                    file,
+                    protocol=pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(_tmp_path, self.cache_path)
+            self._dirty = False
+
+    def log_stats(self) -> None:
+        """ 将缓存命中情况记录到日志中 """
+        INFO.logger.info(
+            "用例编译缓存统计: 命中 %s 个文件, 重新解析 %s 个文件", self.hits, self.misses
+        )
+
+
+def config_fingerprint() -> Text:
+    """
+    生成配置指纹，配置文件内容或用例解析相关的代码发生变化时，指纹随之变化
+    用例数据中的 url 拼接了 host，sql 也会受数据库开关影响，因此需要整体比较配置内容
+    """
+    from utils import config
+    from utils.other_tools import models
+    from utils.other_tools.read_files_tools import get_yaml_data_analysis
+    _source_mtime = [os.stat(i.__file__).st_mtime_ns for i in (models, get_yaml_data_analysis)]
+    return hashlib.md5(f"{config.dict()}{_source_mtime}".encode('utf-8')).hexdigest()
+
+
+def _init_case_cache() -> Union[CompiledCaseCache, None]:
+    """ 读取配置文件中的用例编译缓存配置，未开启时返回 None """
+    from utils import config
+    from common.setting import ensure_path_sep
+    if config.case_cache.switch is False:
+        return None
+    return CompiledCaseCache(
+        cache_path=ensure_path_sep(config.case_cache.path),
+        fingerprint=config_fingerprint()
+    )
@@ -0,0 +1,103 @@
+"""
+懒加载用例池，先建立 case_id -> 文件 的索引，用例第一次被获取时才解析、校验对应的 yaml 文件
+"""
+
+import threading
+from typing import Callable, Dict, List, Set, Text, Union
+from utils.cache_process.cache_control import CacheHandler, _cache_config
+from utils.cache_process.case_cache import CompiledCaseCache
+from utils.logging_tool.log_control import INFO
+
+
+# 定义了 LazyCasePool 类，用于按需加载用例数据。
+class LazyCasePool:
+    """
+    懒加载用例池，只解析被执行的用例，以及它们依赖的用例所在的文件
+    未加载的文件中写入 $cache{} 缓存的用例不在用例池中，因此不会作为 soft 依赖参与排序
+    """
+
+    def __init__(
+            self,
+            file_paths: List[Text],
+            loader: Callable[[Text], List],
+            case_cache: Union[CompiledCaseCache, None] = None) -> None:
+        """
+        :param file_paths: 所有 yaml 用例文件路径
+        :param loader: 解析单个 yaml 文件的方法，返回值与 CaseData.case_process(case_id_switch=True) 一致
+        :param case_cache: 用例编译缓存，为 None 时每次都重新解析
+        """
+        self.file_paths = file_paths
+        self.loader = loader
+        self.case_cache = case_cache
+        # index 的键为用例ID，值为用例所在的文件路径。
+        self.index: Dict[Text, Text] = {}
+        self._loaded: Set[Text] = set()
+        # 加载文件时，用例中的 $cache{} 替换等操作可能再次触发加载，因此使用可重入锁。
+        self._lock = threading.RLock()
+        self.build_index()
+
+    @classmethod
+    def scan_case_ids(cls, file_path: Text) -> List[Text]:
+        """
+        只扫描 yaml 文件中顶格书写的 key，不做完整的 yaml 解析，得到文件中的所有用例ID
+        :param file_path: yaml 文件路径
+        :return:
+        """
+        _case_ids = []
+        with open(file_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                # 缩进的内容、注释、列表项以及文档分隔符都不是用例ID。
+                if not line.strip() or line[0] in " \t#-." or ":" not in line:
+                    continue
+                _key = line.split(":", 1)[0].strip().strip("'\"")
+                if _key and _key != 'case_common':
+                    _case_ids.append(_key)
+        return _case_ids
+
+    def build_index(self) -> None:
+        """ 建立 case_id -> 文件 的索引，同时检测重复的 case_id """
+        for file_path in self.file_paths:
+            for case_id in self.scan_case_ids(file_path):
+                if case_id in self.index:
+                    raise ValueError(f"case_id: {case_id} 存在重复项, 请修改case_id\n"
+                                     f"文件路径: {file_path}")
+                self.index[case_id] = file_path
+
+    def load_file(self, file_path: Text) -> None:
+        """ 解析 yaml 文件，并将其中的所有用例写入用例池 """
+        with self._lock:
+            if file_path in self._loaded:
+                return
+            if self.case_cache is not None:
+                cases = self.case_cache.load_cases(file_path, lambda: self.loader(file_path))
+            else:
+                cases = self.loader(file_path)
+            for case in cases or []:
+                for case_id, case_data in case.items():
+                    # 用例池中已存在的数据不覆盖，与全量加载时的处理方式一致。
+                    if case_id not in _cache_config:
+                        CacheHandler.update_cache(cache_name=case_id, value=case_data)
+            self._loaded.add(file_path)
+
+    def load(self, case_id: Text) -> bool:
+        """
+        加载用例ID所在的文件
+        :param case_id: 用例ID
+        :return: 加载后用例池中是否存在该用例
+        """
+        file_path = self.index.get(case_id)
+        if file_path is None:
+            return False
+        self.load_file(file_path)
+        return case_id in _cache_config
+
+    def close(self) -> None:
+        """ 测试结束时调用，删除已经不存在的 yaml 文件对应的缓存并保存用例编译缓存，将用例加载情况记录到日志中 """
+        if self.case_cache is not None:
+            self.case_cache.prune(self.file_paths)
+            self.case_cache.save()
+            self.case_cache.log_stats()
+        INFO.logger.info(
+            "懒加载用例池统计: 共 %s 个用例文件, 实际加载 %s 个文件",
+            len(self.file_paths), len(self._loaded)
+        )
@@ -0,0 +1,119 @@
+"""
+依赖用例执行结果缓存
+"""
+
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, Text
+from utils.logging_tool.log_control import INFO
+
+
+# 定义了 DependentCaseCache 类，用于缓存依赖用例的执行结果，同一个依赖用例只需要执行一次。
+class DependentCaseCache:
+    """ 依赖用例结果缓存，支持 session / module / none 三种作用域 """
+
+    # 支持的缓存作用域：session 整个测试会话共用；module 每个测试模块开始时清空；none 不缓存，每次都重新执行。
+    scopes = ('session', 'module', 'none')
+
+    def __init__(self, scope: Text = 'none', ttl: float = 0) -> None:
+        # 校验作用域是否填写正确，填写错误时直接抛出异常，避免静默失效。
+        if scope not in self.scopes:
+            raise ValueError(f"依赖用例缓存作用域只支持 {self.scopes}，当前填写内容: {scope}")
+        self.scope = scope
+        # ttl 为缓存有效时长，单位为秒，0 表示在作用域内一直有效。
+        self.ttl = ttl
+        # _results 的键为 (case_id, 请求指纹)，值为 (写入时间, 执行结果)。
+        self._results: Dict = {}
+        # 每个缓存键对应一把锁，保证并发执行时同一个依赖用例只会被执行一次。
+        self._key_locks: Dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def fingerprint(cls, case_data: Any) -> Text:
+        """
+        生成请求指纹，依赖用例的 $cache{} 数据发生变化时，指纹随之变化，缓存自动失效
+        :param case_data: 替换完缓存数据后的用例内容
+        :return:
+        """
+        return hashlib.md5(str(case_data).encode('utf-8')).hexdigest()
+
+    def _key_lock(self, key) -> threading.Lock:
+        """ 获取缓存键对应的锁 """
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def _get(self, key):
+        """ 读取未过期的缓存，不存在或已过期返回 None """
+        _value = self._results.get(key)
+        if _value is None:
+            return None
+        _set_time, _result = _value
+        if self.ttl and time.time() - _set_time > self.ttl:
+            self._results.pop(key, None)
+            return None
+        return _value
+
+    def get_or_execute(self, case_id: Text, case_data: Any, func: Callable) -> Any:
+        """
+        命中缓存则直接返回依赖用例的执行结果，否则执行 func 并写入缓存
+        :param case_id: 依赖用例 ID
+        :param case_data: 依赖用例内容，用于生成请求指纹
+        :param func: 执行依赖用例的方法
+        :return:
+        """
+        if self.scope == 'none':
+            with self._lock:
+                self.misses += 1
+            return func()
+
+        key = (case_id, self.fingerprint(case_data))
+        with self._key_lock(key):
+            _value = self._get(key)
+            if _value is not None:
+                with self._lock:
+                    self.hits += 1
+                return _value[1]
+            result = func()
+            self._results[key] = (time.time(), result)
+            with self._lock:
+                self.misses += 1
+            return result
+
+    def clear(self) -> None:
+        """ 清空所有缓存结果 """
+        with self._lock:
+            self._results.clear()
+            self._key_locks.clear()
+
+    def module_start(self) -> None:
+        """ 测试模块开始时调用，作用域为 module 时清空缓存 """
+        if self.scope == 'module':
+            self.clear()
+
+    def stats(self) -> Dict:
+        """ 缓存命中统计 """
+        return {"scope": self.scope, "hits": self.hits, "misses": self.misses}
+
+    def log_stats(self) -> None:
+        """ 将缓存命中情况记录到日志中 """
+        INFO.logger.info(
+            "依赖用例缓存统计(作用域: %s): 命中 %s 次, 未命中 %s 次",
+            self.scope, self.hits, self.misses
+        )
+
+
+def _init_dependent_cache() -> DependentCaseCache:
+    """ 读取配置文件中的依赖用例缓存配置 """
+    from utils import config
+    return DependentCaseCache(
+        scope=config.dependent_cache.scope,
+        ttl=config.dependent_cache.ttl
+    )
+
+
+dependent_cache = _init_dependent_cache()
@@ -0,0 +1,136 @@
+"""
+结构化请求日志，每个请求以一行 json 的形式写入 jsonl 文件，便于跨多次运行统计接口耗时的变化趋势
+文件写入使用缓冲区，文件大小达到上限时按 events.jsonl.1、events.jsonl.2 ... 的顺序轮转
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Text, Union
+from utils.logging_tool.phase_timer import phase_timer
+
+
+class RequestEventLog:
+    """ 结构化请求日志 """
+
+    def __init__(self):
+        self.enabled = False
+        self.path: Union[Text, None] = None
+        self.max_bytes = 0
+        self.backup_count = 0
+        self.buffer_size = 0
+        # 本次运行的标识，用于区分同一个文件中不同运行产生的记录
+        self.run_id: Union[Text, None] = None
+        self._file = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def configure(
+            self,
+            switch: bool,
+            path: Union[Text, None] = None,
+            max_bytes: int = 50 * 1024 * 1024,
+            backup_count: int = 5,
+            buffer_size: int = 64 * 1024) -> None:
+        """
+        开启或关闭结构化请求日志
+        :param switch: 是否开启
+        :param path: jsonl 文件路径
+        :param max_bytes: 单个文件的最大字节数，达到后轮转，0 表示不轮转
+        :param backup_count: 轮转后保留的历史文件数量
+        :param buffer_size: 写入缓冲区大小，单位为字节
+        """
+        self.close()
+        self.enabled = switch and bool(path)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer_size = buffer_size
+        self.run_id = time.strftime('%Y%m%d%H%M%S')
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, 'ab', buffering=self.buffer_size)
+        self._size = self._file.tell()
+
+    def _rotate(self) -> None:
+        """ 关闭当前文件，历史文件的编号依次加 1，超出 backup_count 的文件被覆盖 """
+        self._file.close()
+        self._file = None
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                _src = f"{self.path}.{i}"
+                if os.path.exists(_src):
+                    os.replace(_src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    @classmethod
+    def body_digest(cls, body: Any) -> Dict:
+        """ 计算请求内容、响应内容的字节数和 sha1，非字符串的内容按 json 序列化后计算 """
+        if body is None:
+            return {"size": 0, "sha1": None}
+        if isinstance(body, bytes):
+            _data = body
+        elif isinstance(body, str):
+            _data = body.encode('utf-8')
+        else:
+            _data = json.dumps(body, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')
+        return {"size": len(_data), "sha1": hashlib.sha1(_data).hexdigest()}
+
+    def event(self, res) -> Dict:
+        """ 根据请求结果生成一条记录，阶段耗时只包含请求完成前已经统计的阶段 """
+        _request = self.body_digest(res.request_body)
+        _response = self.body_digest(res.response_data)
+        _event = {
+            "ts": round(time.time(), 3),
+            "run_id": self.run_id,
+            "case_id": getattr(res.yaml_data, 'case_id', None),
+            "url": res.url,
+            "method": res.method,
+            "status": res.status_code,
+            "res_time": res.res_time,
+            "request_size": _request['size'],
+            "request_sha1": _request['sha1'],
+            "response_size": _response['size'],
+            "response_sha1": _response['sha1']
+        }
+        if phase_timer.enabled:
+            _phases = phase_timer.case_summary(phase_timer.current_case())['phases']
+            _event['phases'] = {k: v['total_ms'] for k, v in _phases.items()}
+        return _event
+
+    def write(self, res) -> None:
+        """ 写入一条请求记录 """
+        if not self.enabled:
+            return
+        _line = json.dumps(self.event(res), ensure_ascii=False, separators=(',', ':'), default=str)
+        _data = (_line + "\n").encode('utf-8')
+        with self._lock:
+            if self._file is None:
+                self._open()
+            if self.max_bytes and self._size and self._size + len(_data) > self.max_bytes:
+                self._rotate()
+            self._file.write(_data)
+            self._size += len(_data)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        """ 将缓冲区中的记录写入文件并关闭文件 """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+event_log = RequestEventLog()
+# 未在 pytest 中使用(如压测模式)时，程序退出前将缓冲区中的记录写入文件
+atexit.register(event_log.close)
@@ -1,9 +1,12 @@
 """
 日志封装，可设置不同等级的日志颜色
 """
+import atexit
+import copy
 import logging
+import queue
 from logging import handlers
-from typing import Text
+from typing import Text, Union
 import colorlog
 import time
 from common.setting import ensure_path_sep
@@ -64,6 +67,40 @@ class LogHandler:
         self.logger.addHandler(screen_output)
         self.logger.addHandler(time_rotating)
         self.log_path = ensure_path_sep('\\logs\\log.log')
+        # 保存屏幕输出和文件写入的处理器，切换为队列模式时交给后台线程处理。
+        self.handlers = [screen_output, time_rotating]
+        # 队列模式下的后台监听线程和队列处理器，同步模式时为 None。
+        self.listener: Union[handlers.QueueListener, None] = None
+        self.queue_handler: Union[handlers.QueueHandler, None] = None
+
+    # 定义了一个名为 start_queue 的方法，将日志切换为队列模式：业务线程只把日志记录放入队列，由后台线程格式化并写入屏幕和文件。
+    def start_queue(self, max_size: int = 10000) -> None:
+        """
+        切换为队列模式
+        :param max_size: 队列最大长度，队列已满时业务线程等待后台线程写入，避免日志堆积占用过多内存
+        """
+        # 已经是队列模式时，不重复切换。
+        if self.listener is not None:
+            return
+        _queue = queue.Queue(maxsize=max(max_size, 0))
+        self.queue_handler = LazyQueueHandler(_queue)
+        # 先添加队列处理器再移除原处理器，切换过程中的日志不会丢失。
+        self.logger.addHandler(self.queue_handler)
+        for i in self.handlers:
+            self.logger.removeHandler(i)
+        self.listener = handlers.QueueListener(_queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    # 定义了一个名为 stop_queue 的方法，等待队列中的日志全部写入后，切换回同步模式。
+    def stop_queue(self) -> None:
+        """ 停止队列模式，队列中剩余的日志会在停止前全部写入 """
+        if self.listener is None:
+            return
+        for i in self.handlers:
+            self.logger.addHandler(i)
+        self.logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+        self.listener, self.queue_handler = None, None
 
     # @classmethod 装饰器用于将一个普通的方法转换为类方法，使其能够访问类属性，而不仅仅是实例属性。在类方法中，我们可以通过 cls 参数来直接访问类属性，而不需要创建类的实例对象。
     @classmethod
@@ -87,6 +124,57 @@ class LogHandler:
         return formatter
 
 
+# 定义了一个名为 LazyQueueHandler 的类，继承自 QueueHandler，用于将日志记录放入队列。
+class LazyQueueHandler(handlers.QueueHandler):
+    """
+    日志记录放入队列，由后台线程格式化，业务线程中只在必要时做字符串格式化
+    参数中包含可变容器时，后台线程格式化前参数可能已经被修改，因此在业务线程中先生成日志内容
+    """
+
+    # 参数属于这些类型时，需要在业务线程中生成日志内容。
+    mutable_types = (dict, list, set, bytearray)
+    # 用于在业务线程中生成异常堆栈文本。
+    exc_formatter = logging.Formatter()
+
+    # QueueHandler 默认会在业务线程中格式化整条日志，这里只在参数为可变容器或带有异常信息时生成日志内容，其余格式化交给后台线程中的处理器。
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 复制一份日志记录，避免修改其他处理器使用的日志记录。
+        record = copy.copy(record)
+        # 参数可能是元组，也可能是单个字典(logger.info("%(name)s", {...}))。
+        _args = record.args if isinstance(record.args, tuple) else (record.args,)
+        if record.exc_info or any(isinstance(i, self.mutable_types) for i in _args):
+            record.msg = record.getMessage()
+            record.args = None
+        # 与 QueueHandler.prepare 一致，生成异常堆栈文本后删除 exc_info，不在队列中持有异常的栈帧。
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    # 队列已满时等待后台线程写入，不丢弃日志。
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.queue.put(record)
+
+
+# 定义了一个名为 TruncatedText 的类，用于在日志中截断过长的内容。
+class TruncatedText:
+    """ 日志中较长的内容(如响应内容)在格式化时才转换为字符串并截断，未输出的日志不做处理 """
+
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value, limit: int = 0):
+        # value 为需要输出的内容，limit 为最大长度，0 表示不截断。
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = str(self.value)
+        if self.limit and len(text) > self.limit:
+            return f"{text[:self.limit]}...(共 {len(text)} 个字符，已截断)"
+        return text
+
+
 # 用 time.strftime() 函数获取当前系统时间，并将其转换为 %Y-%m-%d 格式的日期字符串，赋值给 now_time_day 变量。
 now_time_day = time.strftime("%Y-%m-%d", time.localtime())
 # 定义一个 INFO 变量，使用 LogHandler 类初始化一个 LogHandler 对象，并指定日志文件路径和日志级别参数。ensure_path_sep() 函数用于确保日志文件路径中使用的是正确的路径分隔符，“/” 或 “\”。
@@ -94,4 +182,19 @@ INFO = LogHandler(ensure_path_sep(f"\\logs\\info-{now_time_day}.log"), level='in
 # 定义一个 ERROR 变量，使用 LogHandler 类初始化一个 LogHandler 对象，并指定日志文件路径和日志级别参数。
 ERROR = LogHandler(ensure_path_sep(f"\\logs\\error-{now_time_day}.log"), level='error')
 # 定义一个 WARNING 变量，使用 LogHandler 类初始化一个 LogHandler 对象，并指定日志文件路径但未指定日志级别参数，此时默认记录 WARNING 级别及以上的日志消息。
-WARNING = LogHandler(ensure_path_sep(f'\\logs\\warning-{now_time_day}.log'))
\ No newline at end of file
+WARNING = LogHandler(ensure_path_sep(f'\\logs\\warning-{now_time_day}.log'))
+
+# 定义了一个名为 start_queue_logging 的函数，将 INFO、ERROR、WARNING 全部切换为队列模式。
+def start_queue_logging(max_size: int = 10000) -> None:
+    for i in (INFO, ERROR, WARNING):
+        i.start_queue(max_size)
+
+
+# 定义了一个名为 stop_queue_logging 的函数，等待队列中的日志全部写入后，切换回同步模式。
+def stop_queue_logging() -> None:
+    for i in (INFO, ERROR, WARNING):
+        i.stop_queue()
+
+
+# 程序退出时，确保队列中剩余的日志全部写入。
+atexit.register(stop_queue_logging)
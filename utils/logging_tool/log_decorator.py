@@ -2,10 +2,25 @@
 日志装饰器，控制程序日志输入，默认为 True
 如设置 False，则程序不会打印日志
 """
-import ast
 from functools import wraps
-from utils.read_files_tools.regular_control import cache_regular
-from utils.logging_tool.log_control import INFO, ERROR
+from utils.other_tools.read_files_tools.regular_control import literal_resolve
+from utils.logging_tool.log_control import INFO, ERROR, TruncatedText
+from utils.logging_tool.phase_timer import phase_timer
+from utils.logging_tool.event_log import event_log
+from utils import config
+
+
+# 定义了请求日志的格式，使用多个字符串将请求的各个方面（如请求路径、请求方式等）用换行符连接在一起。具体内容可以根据需要进行增删改。
+_log_msg = "\n======================================================\n" \
+           "用例标题: %s\n" \
+           "请求路径: %s\n" \
+           "请求方式: %s\n" \
+           "请求头:   %s\n" \
+           "请求内容: %s\n" \
+           "接口响应内容: %s\n" \
+           "接口响应时长: %s ms\n" \
+           "Http状态码: %s\n" \
+           "====================================================="
 
 
 # 定义了一个装饰器函数log_decorator()，并对参数switch进行了注释。
@@ -24,27 +39,34 @@ def log_decorator(switch: bool):
 
             # 判断日志为开启状态，才打印日志，这里调用了原函数，并将其返回值赋给了res变量。
             res = func(*args, **kwargs)
-            # 判断日志开关为开启状态，这里判断日志开关switch是否为True（即是否需要打印日志）。
-            if switch:
-                # 这里定义了一个日志信息的字符串_log_msg，用于记录请求的详细信息。使用多个格式化字符串（以斜杠\连接）将请求的各个方面（如请求路径、请求方式等）格式化成字符串，并用换行符连接在一起。具体内容可以根据需要进行增删改。
-                _log_msg = f"\n======================================================\n" \
-                           f"用例标题: {res.detail}\n" \
-                           f"请求路径: {res.url}\n" \
-                           f"请求方式: {res.method}\n" \
-                           f"请求头:   {res.headers}\n" \
-                           f"请求内容: {res.request_body}\n" \
-                           f"接口响应内容: {res.response_data}\n" \
-                           f"接口响应时长: {res.res_time} ms\n" \
-                           f"Http状态码: {res.status_code}\n" \
-                           "====================================================="
-                # 这里的cache_regular()是一个缓存函数的调用，它的作用是将res.is_run转换成字符串并加密缓存，具体实现过程可以简单理解成它用于优化性能。ast.literal_eval()函数可以安全地解析成Python字面量的字符串，并将其转换成相应的数据类型。因为res.is_run可能是一个bool值或None，所以这里需要将解析后的数据赋值给变量_is_run。
-                _is_run = ast.literal_eval(cache_regular(str(res.is_run)))
-                # 这里判断应该将日志信息记录在哪个日志文件中。如果用例执行成功且res.is_run为True或None，则将日志信息记录到INFO日志文件中并进行绿色输出。
-                if _is_run in (True, None) and res.status_code == 200:
-                    INFO.logger.info(_log_msg)
-                # 如果用例执行失败，则将日志信息记录到ERROR日志文件中，并进行红色输出。
-                else:
-                    ERROR.logger.error(_log_msg)
+            # 判断日志开关为开启状态，这里判断日志开关switch是否为True（即是否需要打印日志）。打印日志的耗时计入 log 阶段。is_run 为 False 的用例没有请求结果，不打印日志。
+            if switch and res is not None:
+                with phase_timer.phase("log"):
+                    # 这里定义了日志信息的参数_log_args，日志内容在真正输出时才按_log_msg格式化(开启队列模式时在后台线程中格式化)。请求内容和响应内容较长时，按配置文件中的 max_body_length 截断。
+                    # 请求头是字典，直接作为参数时队列模式会在业务线程中格式化整条日志，因此与请求内容一样包装为 TruncatedText，请求头不截断。
+                    _max_length = config.log.max_body_length
+                    _log_args = (
+                        res.detail,
+                        res.url,
+                        res.method,
+                        TruncatedText(res.headers),
+                        TruncatedText(res.request_body, _max_length),
+                        TruncatedText(res.response_data, _max_length),
+                        res.res_time,
+                        res.status_code
+                    )
+                    # 这里的literal_resolve()会替换res.is_run中的$cache{}缓存数据，替换结果为字符串时，会像ast.literal_eval()一样解析成相应的数据类型。因为res.is_run可能是一个bool值或None，所以这里需要将解析后的数据赋值给变量_is_run。
+                    _is_run = literal_resolve(res.is_run)
+                    # 这里判断应该将日志信息记录在哪个日志文件中。如果用例执行成功且res.is_run为True或None，则将日志信息记录到INFO日志文件中并进行绿色输出。
+                    if _is_run in (True, None) and res.status_code == 200:
+                        INFO.logger.info(_log_msg, *_log_args)
+                    # 如果用例执行失败，则将日志信息记录到ERROR日志文件中，并进行红色输出。
+                    else:
+                        ERROR.logger.error(_log_msg, *_log_args)
+            # 结构化请求日志由配置文件单独控制，开启后每个请求以一行 json 的形式写入 jsonl 文件，不受日志开关影响。
+            if event_log.enabled and res is not None:
+                with phase_timer.phase("log"):
+                    event_log.write(res)
             # 将原函数（func）的返回值返回给外层函数使用。
             return res
 
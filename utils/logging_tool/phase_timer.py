@@ -0,0 +1,191 @@
+"""
+用例分阶段耗时统计，统计每个用例在模板渲染、依赖处理、http 请求、sql、断言、后置处理、allure 等阶段的耗时
+阶段可以嵌套，每个阶段只统计自身的耗时(不包含嵌套的子阶段)，因此所有阶段的耗时相加等于用例的总耗时
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Text, Union
+
+
+class _NullPhase:
+    """ 未开启统计时使用的空阶段，不做任何处理 """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_null_phase = _NullPhase()
+
+
+class _Phase:
+    """ 单个阶段，退出时将自身耗时记录到 PhaseTimer 中，并从父阶段的耗时中扣除 """
+
+    __slots__ = ('timer', 'name', 'start', 'child')
+
+    def __init__(self, timer: "PhaseTimer", name: Text):
+        self.timer = timer
+        self.name = name
+        self.start = 0.0
+        self.child = 0.0
+
+    def __enter__(self):
+        self.timer._stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        elapsed = time.perf_counter() - self.start
+        stack = self.timer._stack()
+        stack.pop()
+        if stack:
+            stack[-1].child += elapsed
+        self.timer._record(self.name, elapsed - self.child)
+        return False
+
+
+class PhaseTimer:
+    """ 分阶段耗时统计，按用例(pytest nodeid)和阶段汇总 """
+
+    def __init__(self):
+        self.enabled = False
+        self.path: Union[Text, None] = None
+        self.allure = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # _cases 的键为用例 nodeid，值为 {阶段: [执行次数, 耗时(秒)]}
+        self._cases: Dict[Text, Dict[Text, list]] = {}
+
+    def configure(self, switch: bool, path: Union[Text, None] = None, allure: bool = False) -> None:
+        """
+        开启或关闭统计
+        :param switch: 是否开启统计
+        :param path: 测试结束时导出统计结果的文件路径
+        :param allure: 是否在 allure 中展示每个用例的阶段耗时
+        """
+        self.enabled = switch
+        self.path = path
+        self.allure = allure
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current_nodeid(self) -> Text:
+        """
+        当前线程正在执行的 pytest 用例 nodeid，不在 pytest 中执行时返回空字符串
+        后台线程中通过 bind 指定，未指定时使用 PYTEST_CURRENT_TEST(进程级别，只对主线程准确)
+        """
+        nodeid = getattr(self._local, 'nodeid', None)
+        # 通过 bind 指定为空字符串时，表示提交任务时不在用例中执行，不再使用 PYTEST_CURRENT_TEST
+        if nodeid is not None:
+            return nodeid
+        # PYTEST_CURRENT_TEST 的格式为 "test_case/test_xxx.py::test_xxx[xxx] (call)"
+        return os.environ.get("PYTEST_CURRENT_TEST", "").rsplit(" ", 1)[0]
+
+    def current_case(self) -> Text:
+        """ 当前线程正在统计的用例，不在用例中执行时记录到 session 下 """
+        return self.current_nodeid() or "session"
+
+    def _record(self, name: Text, elapsed: float) -> None:
+        nodeid = self.current_case()
+        with self._lock:
+            _phase = self._cases.setdefault(nodeid, {}).setdefault(name, [0, 0.0])
+            _phase[0] += 1
+            _phase[1] += elapsed
+
+    def phase(self, name: Text):
+        """ 统计一个阶段的耗时，用法: with phase_timer.phase("http"): ... """
+        if not self.enabled:
+            return _null_phase
+        return _Phase(self, name)
+
+    def timed(self, name: Text):
+        """ 统计函数耗时的装饰器 """
+
+        def decorator(func):
+            @wraps(func)
+            def swapper(*args, **kwargs):
+                with self.phase(name):
+                    return func(*args, **kwargs)
+
+            return swapper
+
+        return decorator
+
+    @contextmanager
+    def bind(self, nodeid: Text):
+        """ 将当前线程中统计的耗时记录到指定的用例下，用于后台线程中执行的后置处理 """
+        _old = getattr(self._local, 'nodeid', None)
+        self._local.nodeid = nodeid
+        try:
+            yield
+        finally:
+            self._local.nodeid = _old
+
+    def bound(self, func):
+        """
+        在提交任务的线程中获取当前用例，返回的函数在后台线程中执行时，耗时记录到该用例下
+        用法: executor.submit(phase_timer.bound(func), ...)
+        """
+        nodeid = self.current_nodeid()
+
+        @wraps(func)
+        def swapper(*args, **kwargs):
+            with self.bind(nodeid):
+                return func(*args, **kwargs)
+
+        return swapper
+
+    @classmethod
+    def _summary(cls, phases: Dict[Text, list]) -> Dict:
+        _phases = {
+            name: {"count": count, "total_ms": round(elapsed * 1000, 3)}
+            for name, (count, elapsed) in sorted(phases.items(), key=lambda i: -i[1][1])
+        }
+        return {
+            "total_ms": round(sum(i[1] for i in phases.values()) * 1000, 3),
+            "phases": _phases
+        }
+
+    def case_summary(self, nodeid: Text) -> Dict:
+        """ 单个用例的阶段耗时 """
+        with self._lock:
+            _phases = {k: list(v) for k, v in self._cases.get(nodeid, {}).items()}
+        return self._summary(_phases)
+
+    def summary(self) -> Dict:
+        """ 所有用例的阶段耗时，以及按阶段汇总的耗时 """
+        with self._lock:
+            _cases = {k: {p: list(v) for p, v in phases.items()} for k, phases in self._cases.items()}
+        _total = {}
+        for phases in _cases.values():
+            for name, (count, elapsed) in phases.items():
+                _phase = _total.setdefault(name, [0, 0.0])
+                _phase[0] += count
+                _phase[1] += elapsed
+        return {
+            "total": self._summary(_total),
+            "cases": {k: self._summary(v) for k, v in _cases.items()}
+        }
+
+    def export(self, path: Union[Text, None] = None) -> Union[Text, None]:
+        """ 将统计结果导出为 json 文件，返回文件路径，未开启统计时不导出 """
+        path = path or self.path
+        if not self.enabled or not path:
+            return None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.summary(), file, ensure_ascii=False, indent=4)
+        return path
+
+
+phase_timer = PhaseTimer()
@@ -20,9 +20,10 @@ def execution_duration(number: int):
             # 这里调用了被装饰的函数func，并传入了之前定义的位置和关键字参数。函数调用的返回结果保存在一个变量res中。
             res = func(*args, **kwargs)
             # 在调用完被装饰的函数后，从返回结果res中获取该函数的时间戳属性，用于后续计算函数的运行时间。
-            run_time = res.res_time
+            # is_run 为 False 的用例不发送请求，返回值为 None，不需要统计运行时间。
+            run_time = res.res_time if res is not None else None
             # 这里用获取的运行时间和预期时间number比较，如果运行时间超时了number，就打印错误信息。具体来说，输出一条警告日志，其中包含了运行时间、测试用例数据以及一些分隔符，易于查看和定位问题。
-            if run_time > number:
+            if run_time is not None and run_time > number:
                 ERROR.logger.error(
                     "\n==============================================\n"
                     "测试用例执行时间较长，请关注.\n"
@@ -1,67 +1,67 @@
 """
 mysql 封装，支持 增、删、改、查
 """
-import ast
 import datetime
 import decimal
+import re
+import time
 from warnings import filterwarnings
 import pymysql
-from typing import List, Union, Text, Dict
+from typing import List, Union, Text, Dict, Tuple
 from utils import config
-from utils.logging_tool.log_control import ERROR
-from utils.other_tools.read_files_tools.regular_control import sql_regular
-from utils.other_tools.read_files_tools.regular_control.regular_control import cache_regular
+from utils.logging_tool.log_control import ERROR, INFO
+from utils.logging_tool.phase_timer import phase_timer
+from utils.other_tools.read_files_tools.regular_control import sql_regular, literal_resolve
 from utils.other_tools.exceptions import DataAcquisitionFailed, ValueTypeError
+from utils.mysql_tool.mysql_pool import MysqlConnectionPool
 
 # 用于设置在连接 MySQL 服务器时忽略掉一些 MySQL 数据库发出的警告信息。
 filterwarnings("ignore", category=pymysql.Warning)
 
 
+# 定义了一个名为_init_mysql_pool的函数，用于读取配置文件中的数据库配置，创建全局共用的数据库连接池。
+def _init_mysql_pool() -> Union[MysqlConnectionPool, None]:
+    # 未开启数据库开关时，不创建连接池。
+    if not config.mysql_db.switch:
+        return None
+    # 连接池中的连接在第一次执行 sql 时才会建立，这里只记录建立连接的方法。
+    return MysqlConnectionPool(
+        creator=lambda: pymysql.connect(
+            # 连接数据库的主机地址。
+            host=config.mysql_db.host,
+            # 连接数据库的用户名。
+            user=config.mysql_db.user,
+            # 连接数据库的密码。
+            password=config.mysql_db.password,
+            # 连接数据库的端口号。
+            port=config.mysql_db.port
+        ),
+        max_size=config.mysql_db.pool_size,
+        timeout=config.mysql_db.pool_timeout,
+        ping_interval=config.mysql_db.pool_ping_interval
+    )
+
+
+# 全局共用的数据库连接池，所有 MysqlDB 子类都从这里借用连接，测试结束时调用 close 方法关闭连接并记录统计数据。
+mysql_pool = _init_mysql_pool()
+
+
 # 定义一个MysqlDB类，在此类中，我们封装了一些操作MySQL数据库的方法。
 class MysqlDB:
     """ mysql 封装 """
     # 当config.mysql_db.switch为True时，才会执行类定义的代码。这里的意思是如果配置文件中开启了MySQL开关，才会继续连接MySQL。
     if config.mysql_db.switch:
 
+        # 用于匹配sql中的单引号字符串常量、数字常量以及反引号中的字段名。
+        literal_pattern = re.compile(r"'[^']*'|`[^`]*`|(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+
         # 定义类的初始化方法。
         def __init__(self):
-            # try语句块用来捕获抛出的异常。
-            try:
-                # 使用pymysql库建立数据库连接。
-                self.conn = pymysql.connect(
-                    # 连接数据库的主机地址。
-                    host=config.mysql_db.host,
-                    # 连接数据库的用户名。
-                    user=config.mysql_db.user,
-                    # 连接数据库的密码。
-                    password=config.mysql_db.password,
-                    # 连接数据库的端口号。
-                    port=config.mysql_db.port
-                )
-
-                # 通过连接对象self.conn的cursor()方法来获取游标self.cur，并指定返回结果为字典格式。
-                self.cur = self.conn.cursor(cursor=pymysql.cursors.DictCursor)
-            # 捕捉到异常时执行的语句，这里是打印连接失败的日志信息。
-            except AttributeError as error:
-                # 将错误信息输出到日志文件中，以便后续查找错误原因。
-                ERROR.logger.error("数据库连接失败，失败原因 %s", error)
+            # 数据库连接统一从全局连接池中借用，执行每条 sql 时借出，执行完成后立即归还，不再为每个实例单独建立连接。
+            self.pool = mysql_pool
 
-        # 定义了一个特殊方法__del__，在对象销毁时自动调用，用于释放该类所有的资源，如关闭数据库连接等。
-        def __del__(self):
-            # try语句用于异常处理，尝试关闭游标和连接。
-            try:
-                # 关闭游标
-                self.cur.close()
-                # 关闭连接
-                self.conn.close()
-            # 捕捉到异常时执行的语句，这里是打印连接失败的日志信息。
-            except AttributeError as error:
-                # 记录日志信息，记录连接失败的原因。
-                ERROR.logger.error("数据库连接失败，失败原因 %s", error)
-
-        # 总之，该方法是一个析构函数，用于在对象销毁时释放数据库连接和游标。为了避免未释放资源的错误，像在这里这样释放资源是一个好的编程习惯。
-
-        # 定义了一个名为query的方法，用于执行查询语句。sql表示要执行的查询语句。tate="all"表示查询的类型，默认为all，即查询所有数据。
+        # 定义了一个名为query的方法，用于执行查询语句。sql表示要执行的查询语句。tate="all"表示查询的类型，默认为all，即查询所有数据。耗时计入 sql 阶段。
+        @phase_timer.timed("sql")
         def query(self, sql, state="all"):
             """
                 查询
@@ -71,17 +71,19 @@ class MysqlDB:
                 """
             # try语句用于异常处理，尝试执行查询语句。
             try:
-                # 执行传入的SQL查询语句。
-                self.cur.execute(sql)
-
-                # 如果查询的类型是all，即查询所有数据。
-                if state == "all":
-                    # 使用fetchall方法获取全部查询结果。
-                    data = self.cur.fetchall()
-                # 否则即查询单条。
-                else:
-                    # 使用fetchone方法获取单条查询结果。
-                    data = self.cur.fetchone()
+                # 从连接池中借出连接，并获取游标，指定返回结果为字典格式，with语句结束时自动关闭游标、归还连接。
+                with self.pool.connection() as conn, conn.cursor(cursor=pymysql.cursors.DictCursor) as cur:
+                    # 执行传入的SQL查询语句。
+                    cur.execute(sql)
+
+                    # 如果查询的类型是all，即查询所有数据。
+                    if state == "all":
+                        # 使用fetchall方法获取全部查询结果。
+                        data = cur.fetchall()
+                    # 否则即查询单条。
+                    else:
+                        # 使用fetchone方法获取单条查询结果。
+                        data = cur.fetchone()
                 # 返回查询结果。
                 return data
             # 捕捉到异常时执行的语句，这里是打印连接失败的日志信息。
@@ -93,32 +95,117 @@ class MysqlDB:
 
         # 总之，这个方法是一个查询类的方法，用于执行SQL查询语句，并且返回查询结果。在查询语句中，使用了fetchall和fetchone方法获取查询结果。
 
-        # 定义了一个名为execute的方法，用于执行更新、删除和新增操作。sql表示要执行的SQL语句。
+        # 定义了一个名为execute的方法，用于执行更新、删除和新增操作。sql表示要执行的SQL语句。耗时计入 sql 阶段。
+        @phase_timer.timed("sql")
         def execute(self, sql: Text):
             """
                 更新 、 删除、 新增
                 :param sql:
                 :return:
                 """
-            try:
-                # 执行传入的SQL更新、删除和新增语句，并返回受影响行数。
-                rows = self.cur.execute(sql)
-                # 执行提交事务，将更改提交到数据库中。
-                self.conn.commit()
-                # 返回受影响的行数。
-                return rows
-            # 捕捉到异常时执行的语句，这里是打印连接失败的日志信息。
-            except AttributeError as error:
-                # 记录日志信息，记录连接失败的原因。
-                ERROR.logger.error("数据库连接失败，失败原因 %s", error)
-                # 执行回滚操作，撤销刚才执行的更改。
-                self.conn.rollback()
-                # 将异常继续向上抛出，让函数调用者来处理异常。
-                raise
+            # 从连接池中借出连接，with语句结束时自动归还连接。
+            with self.pool.connection() as conn:
+                try:
+                    # 执行传入的SQL更新、删除和新增语句，并返回受影响行数。
+                    with conn.cursor() as cur:
+                        rows = cur.execute(sql)
+                    # 执行提交事务，将更改提交到数据库中。
+                    conn.commit()
+                    # 返回受影响的行数。
+                    return rows
+                # 捕捉到异常时执行的语句，这里是打印连接失败的日志信息。
+                except AttributeError as error:
+                    # 记录日志信息，记录连接失败的原因。
+                    ERROR.logger.error("数据库连接失败，失败原因 %s", error)
+                    # 执行回滚操作，撤销刚才执行的更改。
+                    conn.rollback()
+                    # 将异常继续向上抛出，让函数调用者来处理异常。
+                    raise
 
         # 总之，这个方法是一个更新、删除和新增类的方法，用于执行SQL更新、删除和新增语句，并返回受影响的行数。在执行SQL语句后，使用commit方法提交更改，并使用rollback方法回滚事务。
 
         # 这个装饰器用于将方法声明为类方法，而不是实例方法，即使没有实例仍然可以调用
+        @classmethod
+        # 定义了一个名为sql_template的类方法，用于将sql中的字符串、数字常量提取成参数，相同结构的sql可以合并成一次executemany执行。
+        def sql_template(cls, sql: Text) -> Tuple[Text, Union[Tuple, None]]:
+            """
+            提取 sql 中的常量，如 DELETE FROM t WHERE id = 1 -> (DELETE FROM t WHERE id = %s, (1,))
+            @param sql: sql 语句
+            @return: (sql 模板, 参数)，无法安全提取参数时，参数为 None
+            """
+            # 以下情况不做参数化处理，直接执行原sql：包含转义字符的字符串，还原后的内容可能与原sql不一致；
+            # 双引号在 ANSI_QUOTES 模式下表示字段名；注释中的引号会导致常量拆分错误。
+            if any(i in sql for i in ("\\", "''", '"', "--", "#", "/*")):
+                return sql, None
+            params = []
+            parts = []
+            _position = 0
+            for match in cls.literal_pattern.finditer(sql):
+                # 常量之外的内容中原有的%需要转义成%%，否则会被当成占位符。
+                parts.append(sql[_position:match.start()].replace('%', '%%'))
+                _value = match.group(0)
+                # 反引号中的字段名保持不变。
+                if _value[0] == '`':
+                    parts.append(_value.replace('%', '%%'))
+                # 字符串常量、数字常量替换成占位符%s。
+                else:
+                    if _value[0] == "'":
+                        params.append(_value[1:-1])
+                    else:
+                        # 小数使用 Decimal，发送给数据库的内容与原sql中的常量完全一致，不会因为转换成浮点数而丢失精度。
+                        params.append(decimal.Decimal(_value) if '.' in _value else int(_value))
+                    parts.append('%s')
+                _position = match.end()
+            parts.append(sql[_position:].replace('%', '%%'))
+            template = "".join(parts)
+            if not params:
+                return sql, None
+            return template, tuple(params)
+
+        # 定义了一个名为execute_batch的方法，用于在同一个事务中批量执行更新、删除和新增操作。耗时计入 sql 阶段。
+        @phase_timer.timed("sql")
+        def execute_batch(self, sql_list: List[Text]) -> int:
+            """
+                批量执行 更新 、 删除、 新增，所有语句在同一个事务中执行，任意一条失败时整体回滚
+                相邻且结构相同的语句合并成一次 executemany 执行
+                :param sql_list: sql 语句列表
+                :return: 受影响的总行数
+                """
+            # 按相邻语句的sql模板分组，只有提取常量后完全相同的语句才合并到同一个分组中，分组中保留原sql。
+            groups = []
+            for sql in sql_list:
+                template, params = self.sql_template(sql)
+                if params is not None and groups and groups[-1][0] == template and groups[-1][1] is not None:
+                    groups[-1][1].append(params)
+                    groups[-1][2].append(sql)
+                else:
+                    groups.append((template, [params] if params is not None else None, [sql]))
+            start_time = time.time()
+            rows = 0
+            # 从连接池中借出连接，with语句结束时自动归还连接。
+            with self.pool.connection() as conn:
+                try:
+                    with conn.cursor() as cur:
+                        for template, params, sqls in groups:
+                            # 分组中只有一条语句，或者语句无法参数化时，直接执行原sql。
+                            if params is None or len(sqls) == 1:
+                                for sql in sqls:
+                                    rows += cur.execute(sql)
+                            else:
+                                rows += cur.executemany(template, params)
+                    # 所有语句执行成功后，一次性提交事务。
+                    conn.commit()
+                # 任意一条语句执行失败，回滚整个事务，并将异常继续向上抛出。
+                except Exception as error:
+                    ERROR.logger.error("批量执行sql失败，已回滚全部 %s 条语句，失败原因 %s", len(sql_list), error)
+                    conn.rollback()
+                    raise
+            INFO.logger.info(
+                "批量执行sql: %s 条语句, 合并为 %s 次执行, 影响 %s 行, 耗时 %.2f ms",
+                len(sql_list), len(groups), rows, (time.time() - start_time) * 1000
+            )
+            return rows
+
         @classmethod
         # 定义了一个名为sql_data_handler的类方法，用于处理部分类型的SQL查询返回的数据。query_data：表示查询出来的数据。data：表示要处理的数据类型。
         def sql_data_handler(cls, query_data, data):
@@ -158,28 +245,40 @@ class SetUpMySQL(MysqlDB):
             :param sql:
             :return:
             """
-        # 将sql转换成字符串类型，并移除前面所有的空白字符，并将其作为参数传递给ast.literal_eval函数，用于转换sql成Python语法的对象。
-        sql = ast.literal_eval(cache_regular(str(sql)))
+        # 按数据结构替换sql中的缓存数据，不需要先转换成字符串再通过ast.literal_eval函数转换回Python语法的对象。
+        sql = literal_resolve(sql)
         # try语句用于异常处理。
         try:
             # 声明一个空字典，用于存储SQL查询返回结果。
             data = {}
             # 当传入的SQL请求不是空值时执行。
             if sql is not None:
+                # 开启批量模式时，相邻的非select语句先暂存，遇到select语句或全部遍历完成时，在同一个事务中批量执行。
+                _batch = []
                 # 遍历sql列表，将每一组SQL请求语句执行。
                 for i in sql:
                     # 如果查询是select类型。
                     if i[0:6].upper() == 'SELECT':
+                        # select语句可能依赖前面语句写入的数据，查询前先执行暂存的语句。
+                        if _batch:
+                            self.execute_batch(_batch)
+                            _batch = []
                         # 使用query方法执行SQL查询，并将返回数据的第一项赋值给变量sql_date。
                         sql_date = self.query(sql=i)[0]
                         # 遍历sql_date的键值对。
                         for key, value in sql_date.items():
                             # 将查询到的value值赋给data的key键。
                             data[key] = value
+                    # 开启批量模式时，非select语句先暂存。
+                    elif config.mysql_db.batch:
+                        _batch.append(i)
                     # 如果查询不是select类型。
                     else:
                         # 使用execute方法直接执行SQL请求。
                         self.execute(sql=i)
+                # 执行剩余暂存的语句。
+                if _batch:
+                    self.execute_batch(_batch)
             # 返回处理好的数据结果。
             return data
         # 捕捉到异常时执行的语句，这里是抛出一个DataAcquisitionFailed异常。
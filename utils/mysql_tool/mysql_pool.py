@@ -0,0 +1,151 @@
+"""
+mysql 连接池，SetUpMySQL、AssertExecution、后置 sql 共用同一组数据库连接
+"""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+from utils.logging_tool.log_control import INFO, WARNING
+
+
+# 定义了 MysqlConnectionPool 类，用于复用数据库连接，避免每次执行 sql 都重新建立连接、认证。
+class MysqlConnectionPool:
+    """ 有界、线程安全的 mysql 连接池 """
+
+    def __init__(
+            self,
+            creator: Callable[[], Any],
+            max_size: int = 5,
+            timeout: float = 30,
+            ping_interval: float = 10) -> None:
+        """
+        :param creator: 创建数据库连接的方法
+        :param max_size: 连接池最大连接数
+        :param timeout: 连接全部被借出时，等待空闲连接的超时时间，单位为秒
+        :param ping_interval: 连接空闲超过该时长后，借出前先 ping 检查连接是否可用，单位为秒，0 表示每次都检查
+        """
+        self.creator = creator
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        # 空闲连接队列，元素为 (连接, 归还时间)，后进先出，优先复用最近使用过的连接。
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._closed = False
+        # 连接池统计数据: 借出次数、等待空闲连接次数、新建连接次数、健康检查失败后丢弃的连接数。
+        self.checkouts = 0
+        self.waits = 0
+        self.creations = 0
+        self.discards = 0
+
+    def _create(self) -> Any:
+        """ 新建连接，失败时释放占用的名额 """
+        try:
+            conn = self.creator()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+            raise
+        with self._lock:
+            self.creations += 1
+        return conn
+
+    def _discard(self, conn: Any) -> None:
+        """ 关闭并丢弃不可用的连接 """
+        with self._lock:
+            self._size -= 1
+            self.discards += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn: Any, idle_time: float) -> bool:
+        """ 空闲时间超过 ping_interval 的连接，通过 ping 检查是否可用 """
+        if idle_time < self.ping_interval:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception as error:
+            WARNING.logger.warning("数据库连接已失效，将重新建立连接: %r", error)
+            return False
+
+    def acquire(self) -> Any:
+        """ 借出一个可用的连接，没有空闲连接且已达到最大连接数时，等待其他线程归还 """
+        if self._closed:
+            raise RuntimeError("数据库连接池已关闭")
+        while True:
+            try:
+                conn, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    _can_create = self._size < self.max_size
+                    if _can_create:
+                        self._size += 1
+                if _can_create:
+                    conn = self._create()
+                    break
+                with self._lock:
+                    self.waits += 1
+                try:
+                    conn, released_at = self._idle.get(timeout=self.timeout)
+                except queue.Empty as exc:
+                    raise TimeoutError(
+                        f"等待数据库连接超时({self.timeout}s)，当前连接池最大连接数为 {self.max_size}"
+                    ) from exc
+            if self._is_healthy(conn, time.time() - released_at):
+                break
+            self._discard(conn)
+        with self._lock:
+            self.checkouts += 1
+        return conn
+
+    def release(self, conn: Any) -> None:
+        """ 归还连接，结束连接上未提交的事务，避免下一次借出时读取到旧的快照数据 """
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        if self._closed:
+            self._discard(conn)
+            return
+        self._idle.put((conn, time.time()))
+
+    @contextmanager
+    def connection(self):
+        """ 借出连接的上下文管理器，退出时自动归还 """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> Dict:
+        """ 连接池统计数据 """
+        return {
+            "size": self._size,
+            "idle": self._idle.qsize(),
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "creations": self.creations,
+            "discards": self.discards
+        }
+
+    def close(self) -> None:
+        """ 关闭所有空闲连接，并将连接池统计数据记录到日志中 """
+        _stats = self.stats()
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+        INFO.logger.info(
+            "数据库连接池统计: 借出 %s 次, 等待空闲连接 %s 次, 新建连接 %s 个, 丢弃失效连接 %s 个",
+            _stats['checkouts'], _stats['waits'], _stats['creations'], _stats['discards']
+        )
@@ -9,7 +9,7 @@ import urllib.parse
 from typing import Any, Text
 from dingtalkchatbot.chatbot import DingtalkChatbot, FeedLink
 from utils.other_tools.get_local_ip import get_host_ip
-from utils.other_tools.allure_data.allure_report_data import AllureFileClean, TestMetrics
+from utils.other_tools.allure_data.allure_report_data import TestMetrics
 from utils import config
 
 
@@ -189,7 +189,7 @@ class DingTalkSendMsg:
                f")\n" \
                f" > ###### 测试报告 [详情](http://{get_host_ip()}:8000/index.html) \n"
         # 这行代码实例化了一个DingTalkSendMsg对象，并调用该对象的send_markdown方法，将测试报告信息以 Markdown 格式发送给钉钉机器人。
-        DingTalkSendMsg(AllureFileClean().get_case_count()).send_markdown(
+        DingTalkSendMsg(self.metrics).send_markdown(
             title="【接口自动化通知】",
             msg=text,
             is_at_all=is_at_all
@@ -14,8 +14,8 @@ class SendEmail:
         self.metrics = metrics
         # 创建一个名为allure_data的类属性，并将AllureFileClean类的实例赋值给它。
         self.allure_data = AllureFileClean()
-        # 创建一个名为CaseDetail的类属性，并调用AllureFileClean类实例的get_failed_cases_detail方法，并将返回值赋值给CaseDetail属性。
-        self.CaseDetail = self.allure_data.get_failed_cases_detail()
+        # 创建一个名为CaseDetail的类属性，并调用AllureFileClean类实例的get_failed_cases_detail方法，使用metrics中的失败用例生成失败用例详情，不需要读取allure报告。
+        self.CaseDetail = self.allure_data.get_failed_cases_detail(metrics.failed_cases)
 
     # @classmethod表示是一个类方法，也就是说，该方法是直接属于类定义的，而不是属于某个类对象的。类方法第一个参数通常是cls，表示类本身，而不是实例对象。通过cls参数可以操作类的属性和方法，也可以实例化类对象。
     @classmethod
@@ -76,7 +76,7 @@ class SendEmail:
 
         # 生成邮件主题字符串，将config文件中的项目名称 config.project_name 和 "接口自动化报告" 进行连接。
         sub = config.project_name + "接口自动化报告"
-        # 生成邮件正文内容，并使用 self.metrics 变量中的数据填充邮件正文。其中，self.allure_data.get_failed_cases_detail() 可以通过获取 Allure 报告的详细信息，包括测试失败原因等更多细节信息。
+        # 生成邮件正文内容，并使用 self.metrics 变量中的数据填充邮件正文。其中，self.CaseDetail 为所有失败和中断用例的标题和代码路径。
         content = f"""
         各位同事, 大家好:
             自动化用例执行完成，执行结果如下:
@@ -86,7 +86,7 @@ class SendEmail:
             异常用例个数: {self.metrics.broken} 个
             跳过用例个数: {self.metrics.skipped} 个
             成  功   率: {self.metrics.pass_rate} %
-        {self.allure_data.get_failed_cases_detail()}
+        {self.CaseDetail}
         **********************************
         jenkins地址：https://121.xx.xx.47:8989/login
         详细情况可登录jenkins平台查看，非相关负责人员可忽略此消息。谢谢。
@@ -3,54 +3,160 @@
 """
 
 import json
-from typing import List, Text
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Text, Union
 from common.setting import ensure_path_sep
-from utils.other_tools.read_files_tools.get_all_files_path import get_all_files
+from utils.other_tools.json_tool import loads
 from utils.other_tools.models import TestMetrics
 
+# allure 报告中用例执行结果文件所在的目录
+TEST_CASES_PATH = ensure_path_sep("\\report\\html\\data\\test-cases")
+# 失败和中断的用例状态
+FAILED_STATUS = ("failed", "broken")
+
+
+# 定义了一个名为 _iter_files 的函数，逐个返回目录下的文件路径，不需要先把整个目录的文件列表读到内存中。
+def _iter_files(path: Text) -> Iterator[Text]:
+    try:
+        entries = os.scandir(path)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path)
+            elif entry.is_file():
+                yield entry.path
+
+
+# 定义了一个名为 _load_testcases 的函数，解析一批用例执行结果文件，只返回状态符合条件的用例，定义在模块顶层才能被 pickle 后传递给子进程。
+def _load_testcases(file_paths: List[Text], statuses: Union[Iterable[Text], None] = None) -> List[Dict]:
+    _cases = []
+    for i in file_paths:
+        with open(i, 'rb') as file:
+            date = loads(file.read())
+        # 在解析的进程中按状态过滤，不符合条件的用例不会传回主进程，也不会保存在内存中。
+        if statuses is None or date.get('status') in statuses:
+            _cases.append(date)
+    return _cases
+
+
+# 定义了一个名为 _chunks 的函数，将文件路径按 size 个一组分批。
+def _chunks(items: Iterable[Text], size: int) -> Iterator[List[Text]]:
+    _chunk = []
+    for i in items:
+        _chunk.append(i)
+        if len(_chunk) >= size:
+            yield _chunk
+            _chunk = []
+    if _chunk:
+        yield _chunk
+
+
+# 定义了一个名为 iter_testcases 的函数，以流的方式逐个返回 allure 报告中的用例执行结果。
+def iter_testcases(
+        path: Text = TEST_CASES_PATH,
+        statuses: Union[Iterable[Text], None] = None,
+        max_workers: int = 1,
+        chunk_size: int = 200) -> Iterator[Dict]:
+    """
+    逐个返回 allure 报告中的用例执行结果，多进程时同时处理的批次数量有上限，内存占用不随文件数量增长
+    :param path: 用例执行结果文件所在的目录
+    :param statuses: 只返回这些状态的用例，为 None 时返回全部用例
+    :param max_workers: 解析文件的进程数，小于等于 1 时在当前进程中按顺序解析
+    :param chunk_size: 每个进程一次解析的文件数量，文件数量不足一批时在当前进程中解析
+    :return: 与目录遍历顺序一致的用例执行结果
+    """
+    _statuses = tuple(statuses) if statuses is not None else None
+    _batches = _chunks(_iter_files(path), chunk_size)
+    # 只有一批文件时，创建进程的开销比解析本身更大，直接在当前进程中解析。
+    _first = next(_batches, None)
+    _second = next(_batches, None)
+    if max_workers <= 1 or _second is None:
+        for batch in (_first, _second):
+            if batch:
+                yield from _load_testcases(batch, _statuses)
+        for batch in _batches:
+            yield from _load_testcases(batch, _statuses)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        _pending = deque()
+
+        def _submit(batch):
+            _pending.append(executor.submit(_load_testcases, batch, _statuses))
+
+        _submit(_first)
+        _submit(_second)
+        for batch in _batches:
+            # 同时处理的批次达到上限时，先返回最早提交的批次的结果。
+            if len(_pending) >= max_workers * 2:
+                yield from _pending.popleft().result()
+            _submit(batch)
+        while _pending:
+            yield from _pending.popleft().result()
+
 
 # 定义了一个名为 AllureFileClean 的类
 class AllureFileClean:
     """allure 报告数据清洗，提取业务需要得数据"""
 
+    # _failed_testcases 的键为用例执行结果文件所在的目录，值为该目录下所有失败和中断的用例执行结果，同一次运行中只读取一次目录。
+    _failed_testcases: Dict[Text, List[Dict]] = {}
+    _lock = threading.Lock()
+
     # @classmethod 是 Python 中的一个装饰器，用来指示一个类方法。类方法与实例方法的不同之处在于，类方法第一个参数必须是类本身，Python 会自动传入该参数，通常命名为 cls，而不是 self，这也是 @classmethod 装饰器的作用之一。通过类名可以直接调用类方法，而不需要实例化对象。
+    @classmethod
+    # 定义了一个名为 max_workers 的方法，从配置文件中获取解析用例执行结果文件的进程数。
+    def max_workers(cls) -> int:
+        from utils import config
+        return config.allure_report.max_workers
+
     @classmethod
     # 使用了一个类装饰器 cls，其返回值是一个列表，该列表中的元素是一个测试用例数据。
     def get_testcases(cls) -> List:
         """ 获取所有 allure 报告中执行用例的情况"""
-        # 创建一个空列表 files 用于存放读取到的测试用例数据。
-        files = []
-        # 使用 get_all_files 函数来获取所有测试用例文件的路径，并通过迭代器 for 循环遍历每个路径。ensure_path_sep 函数将文件路径格式化为当前操作系统的标准格式（加上 \ 或 / 等分隔符），以确保路径可用。
-        for i in get_all_files(ensure_path_sep("\\report\\html\\data\\test-cases")):
-            # 使用 Python 的 with 语句打开测试用例文件，并赋值给变量 file，指定使用 utf-8 编码方式打开文件。
-            with open(i, 'r', encoding='utf-8') as file:
-                # 从打开的文件中读取 JSON 数据，并使用 json.load 函数将其加载到 date 变量中。
-                date = json.load(file)
-                # 将从文件中获取的数据 date 添加到 files 列表中。
-                files.append(date)
-        # 当获取所有测试用例文件的数据后，返回 files 列表作为结果，结束 get_testcases 方法的执行。
-        return files
-
-    # 总的来说，这段代码的作用是遍历指定路径下的所有测试用例文件，将其中的 JSON 数据提取出来，并将所有数据放入列表 files 中，最后返回该列表。这个过程可以以简单而灵活的方式提取并汇总数据，方便后续的数据处理和分析。
+        # 通过 iter_testcases 流式解析所有测试用例文件，文件数量较多时使用进程池并发解析，将结果放入列表中返回。只需要失败用例时，应使用 get_failed_testcases。
+        return list(iter_testcases(TEST_CASES_PATH, max_workers=cls.max_workers()))
+
+    @classmethod
+    # 定义了一个名为 get_failed_testcases 的方法，返回所有失败和中断的用例执行结果。
+    def get_failed_testcases(cls, path: Text = TEST_CASES_PATH) -> List[Dict]:
+        """ 获取所有失败和中断的用例执行结果，结果会被缓存，AllureFileClean 和 ErrorTestCase 共用同一份数据 """
+        path = os.path.normpath(path)
+        # 加锁保证多个线程同时调用时，目录也只读取一次。
+        with cls._lock:
+            if path not in cls._failed_testcases:
+                # 解析时只保留失败和中断的用例，通过的用例不会保存在内存中。
+                cls._failed_testcases[path] = list(
+                    iter_testcases(path, statuses=FAILED_STATUS, max_workers=cls.max_workers())
+                )
+            return cls._failed_testcases[path]
+
+    @classmethod
+    # 定义了一个名为 clear_cache 的方法，重新生成 allure 报告后，需要调用该方法清除缓存的失败用例。
+    def clear_cache(cls) -> None:
+        """ 清除缓存的失败用例执行结果 """
+        with cls._lock:
+            cls._failed_testcases.clear()
 
     # 定义了一个名为 get_failed_case 的方法，返回一个 List 类型对象。
     def get_failed_case(self) -> List:
         """ 获取到所有失败的用例标题和用例代码路径"""
-        # 创建一个名为 error_case 的空列表，用于存储所有失败和中断的测试用例的标题和代码路径。
-        error_case = []
-        # 使用 for 循环遍历所有测试用例数据（该方法调用了 get_testcases 函数来获取测试用例数据列表，这个函数我们前面已经讲过）。
-        for i in self.get_testcases():
-            # 对于每个测试用例数据，如果它的执行状态为 'failed' 或 'broken'，则将其标题和代码路径作为元组 (title, path) 添加到 error_case 列表中。
-            if i['status'] == 'failed' or i['status'] == 'broken':
-                error_case.append((i['name'], i['fullName']))
-        # 当循环遍历完所有测试用例数据，返回 error_case 列表作为结果。
-        return error_case
+        # 使用 get_failed_testcases 获取所有失败和中断的测试用例，将其标题和代码路径作为元组 (title, path) 返回。
+        return [(i['name'], i['fullName']) for i in self.get_failed_testcases()]
 
     # 定义了一个名为 get_failed_cases_detail 的方法，返回一个 Text 类型（即 str 类型）对象。
-    def get_failed_cases_detail(self) -> Text:
-        """ 返回所有失败的测试用例相关内容 """
-        # 调用 get_failed_case 方法获取所有失败和中断的测试用例的标题和代码路径。
-        date = self.get_failed_case()
+    def get_failed_cases_detail(self, failed_cases: Union[List, None] = None) -> Text:
+        """
+        返回所有失败的测试用例相关内容
+        :param failed_cases: 失败和中断的测试用例的标题和代码路径，即 TestMetrics.failed_cases，不传时从 allure 报告中读取
+        """
+        # 优先使用传入的失败用例，未传入时调用 get_failed_case 方法获取所有失败和中断的测试用例的标题和代码路径。
+        date = failed_cases if failed_cases is not None else self.get_failed_case()
         # 创建一个空字符串变量 values，用于拼接所有失败用例的详细信息。
         values = ""
         # 如果存在失败用例，则将 values 设置为 失败用例:\n，表示下面的字符串是所有失败用例的详细信息。
@@ -95,6 +201,8 @@ class AllureFileClean:
                 run_case_data["pass_rate"] = 0.0
             # 如果测试用例总数为0，则将时间数据存储在run_case_data['time']键中，否则将运行时间除以1000，保留两位小数，并将其存储在run_case_data['time']键中。
             run_case_data['time'] = _time if run_case_data['total'] == 0 else round(_time['duration'] / 1000, 2)
+            # 读取 allure 报告中所有失败和中断的测试用例，存储在run_case_data['failed_cases']键中。
+            run_case_data['failed_cases'] = cls().get_failed_case()
             # 使用run_case_data创建一个TestMetrics对象，并将其作为函数的返回值。
             return TestMetrics(**run_case_data)
         # 如果读取文件时出现FileNotFoundError异常，则捕获该异常并将其存储在exc中。
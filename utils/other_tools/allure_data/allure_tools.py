@@ -1,4 +1,8 @@
+import glob
 import json
+import os
+import uuid
+from typing import Dict, Text
 import allure
 from utils.other_tools.models import AllureAttachmentType
 
@@ -44,6 +48,27 @@ def allure_attach(source: str, name: str, extension: str):
     )
 
 
+# 定义了一个名为allure_attach_content的函数，它接受三个参数body、name和extension，不返回任何内容（返回值为None）。
+def allure_attach_content(body: bytes, name: str, extension: str):
+    """
+    allure报告上传附件内容，用于展示已经读取到内存中的文件内容，不再重新读取文件
+    :param body: 附件内容
+    :param name: 附件名称
+    :param extension: 附件的拓展名称
+    :return:
+    """
+    # 获取name参数的拓展名，并转换为大写字母，从AllureAttachmentType枚举中获取与拓展名匹配的枚举值。
+    _attachment_type = getattr(AllureAttachmentType, name.split('.')[-1].upper(), None)
+
+    # 附加一段内容到allure报告中，与allure_attach的区别在于使用body参数直接传入附件内容。
+    allure.attach(
+        body,
+        name=name,
+        attachment_type=_attachment_type if _attachment_type is None else _attachment_type.value,
+        extension=extension
+    )
+
+
 # 定义了一个名为allure_step_no的函数，它接受一个字符串参数step，不返回任何内容（返回值为None）。
 def allure_step_no(step: str):
     """
@@ -54,4 +79,44 @@ def allure_step_no(step: str):
     # 定义一个名为step的allure步骤，包含了需要记录的步骤信息。
     with allure.step(step):
         # 这个代码块为空，因此不执行任何操作。
-        pass
\ No newline at end of file
+        pass
+
+
+# allure 中记录用例 nodeid 的标签名称，用例执行结束后需要修改该用例的结果时(如延迟后置处理失败)，通过该标签找到对应的结果文件。
+NODEID_LABEL = "nodeid"
+
+
+# 定义了一个名为allure_result_broken的函数，用于在用例执行结束后，将指定用例的 allure 结果改为 broken 并添加失败原因附件。
+def allure_result_broken(alluredir: Text, failures: Dict[Text, Text]) -> int:
+    """
+    修改 allure 结果文件，用于用例执行结束后才执行失败的延迟后置处理
+    :param alluredir: allure 结果文件目录，即 --alluredir 参数
+    :param failures: 键为用例 nodeid，值为失败原因，用例需要通过 NODEID_LABEL 标签记录 nodeid
+    :return: 修改的结果文件数量
+    """
+    _count = 0
+    # 遍历目录中的所有用例结果文件，失败重跑时同一个用例会有多个结果文件，全部修改。
+    for path in glob.glob(os.path.join(alluredir, "*-result.json")):
+        with open(path, 'r', encoding='utf-8') as file:
+            result = json.load(file)
+        # 通过 nodeid 标签找到发起延迟后置处理的用例，没有该标签或者后置处理未失败的用例不做修改。
+        _nodeid = next((i['value'] for i in result.get('labels', []) if i.get('name') == NODEID_LABEL), None)
+        if _nodeid not in failures:
+            continue
+        # 将失败原因写入附件文件，并添加到用例结果中。
+        _source = f"{uuid.uuid4()}-attachment.txt"
+        with open(os.path.join(alluredir, _source), 'w', encoding='utf-8') as file:
+            file.write(failures[_nodeid])
+        result.setdefault('attachments', []).append(
+            {"name": "延迟后置处理失败", "source": _source, "type": "text/plain"}
+        )
+        # 已通过的用例改为 broken，已经失败的用例保留原有状态，并在失败原因中追加后置处理的失败原因。
+        if result.get('status') in (None, 'passed'):
+            result['status'] = 'broken'
+        _details = result.setdefault('statusDetails', {})
+        _message = f"延迟后置处理失败: {failures[_nodeid]}"
+        _details['message'] = f"{_details['message']}\n{_message}" if _details.get('message') else _message
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(result, file, ensure_ascii=False)
+        _count += 1
+    return _count
@@ -1,10 +1,12 @@
 import json
-import shutil
+import os
 import ast
-import xlwings
+from typing import Iterable, List, Text, Union
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Alignment, Font, PatternFill
 from common.setting import ensure_path_sep
-from utils.read_files_tools.get_all_files_path import get_all_files
-from utils.notify.wechat_send import WeChatSend
 from utils.other_tools.allure_data.allure_report_data import AllureFileClean
 
 
@@ -17,6 +19,8 @@ class ErrorTestCase:
     def __init__(self):
         # 设置test_case_path属性，将其初始化为\report\html\data\test-cases\字符串。ensure_path_sep函数可能会在字符串结尾添加路径分隔符("/")或者""，以保证路径的完整性。
         self.test_case_path = ensure_path_sep("\\report\\html\\data\\test-cases\\")
+        # 保存已经解析的请求前数据，键为用例的uid，不修改 allure 报告中读取的用例数据(与发送通知共用)。
+        self._parameters = {}
 
     # 定义一个名为get_error_case_data的方法，用于获取失败用例的数据，其中self参数是该类的实例本身。
     def get_error_case_data(self):
@@ -24,24 +28,8 @@ class ErrorTestCase:
         收集所有失败用例的数据
         @return:
         """
-        # 调用名为get_all_files的函数，传入test_case_path属性作为参数，获取该路径下的所有文件路径并返回path。
-        path = get_all_files(self.test_case_path)
-        # 创建一个空的列表files，用于存储所有执行失败的用例数据。
-        files = []
-        # 遍历path列表。
-        for i in path:
-            # 用"r"模式打开文件路径i，命名为file。encoding='utf-8'指定打开文件的字符编码，这里使用utf-8格式打开文件。
-            with open(i, 'r', encoding='utf-8') as file:
-                # 用json.load()方法从文件file中读取内容，并将读取的内容存储在date变量中。
-                date = json.load(file)
-                # 使用if语句判断读取的内容中的状态是否为failed或者broken，如果是则进入if语句块。
-                if date['status'] == 'failed' or date['status'] == 'broken':
-                    # 将符合条件的date添加到files列表中。
-                    files.append(date)
-        # 打印files列表中收集到的所有执行失败的用例数据。
-        print(files)
-        # 返回files列表。
-        return files
+        # 调用AllureFileClean的get_failed_testcases方法，获取test_case_path路径下所有执行失败(failed或者broken)的用例数据。目录只在第一次调用时读取，解析时只保留失败的用例，与发送通知时获取失败用例共用同一份数据。
+        return AllureFileClean.get_failed_testcases(self.test_case_path)
 
     @classmethod
     # 定义一个名为get_case_name的方法，并且该方法接受两个参数，一个是cls表示该方法属于该类，第二个参数是test_case，表示要处理的测试用例。
@@ -57,18 +45,21 @@ class ErrorTestCase:
         # 返回得到的测试用例名称。
         return case_name
 
-    @classmethod
     # 定义了一个名为get_parameters的方法，用于获取allure报告中parameters参数中的内容，即请求前的数据。如果测试用例未发送请求导致异常情况，则该函数用于依然能够处理该用例。
-    def get_parameters(cls, test_case):
+    def get_parameters(self, test_case):
         """
         获取allure报告中的 parameters 参数内容, 请求前的数据
         用于兼容用例执行异常，未发送请求导致的情况
         @return:
         """
-        # 获取测试用例字典中的parameters参数的第一个字典中的value属性。
-        parameters = test_case['parameters'][0]['value']
-        # 通过ast.literal_eval()方法对parameters进行字面上的评估，将字符串转换为相应的Python数据类型并进行返回。这里的parameters是一个字符串形式的dict类型，使用该方法能够将其转化为Python的dict类型，以方便处理。
-        return ast.literal_eval(parameters)
+        # 同一个用例会多次获取请求前的数据，解析结果按用例的uid保存在self._parameters中，每个用例只解析一次。
+        uid = test_case['uid']
+        if uid not in self._parameters:
+            # 获取测试用例字典中的parameters参数的第一个字典中的value属性。
+            parameters = test_case['parameters'][0]['value']
+            # 通过ast.literal_eval()方法对parameters进行字面上的评估，将字符串转换为相应的Python数据类型。这里的parameters是一个字符串形式的dict类型，使用该方法能够将其转化为Python的dict类型，以方便处理。
+            self._parameters[uid] = ast.literal_eval(parameters)
+        return self._parameters[uid]
 
     @classmethod
     # 定义了一个名为get_test_stage的方法，用于获取allure报告中请求后的数据。
@@ -271,105 +262,83 @@ class ErrorTestCase:
 
 # 定义了用于整理运行失败的测试用例成excel报告的方法
 class ErrorCaseExcel:
-    """ 收集运行失败的用例，整理成excel报告 """
+    """ 收集运行失败的用例，整理成excel报告，使用 openpyxl 的只写模式逐行写入，不依赖桌面版 Excel """
+
+    # 定义了excel报告的表头，依次对应 A~L 列。
+    HEADERS = ["用例ID", "用例名称", "请求路径", "请求方式", "请求类型", "请求头",
+               "请求内容", "依赖数据", "断言数据", "sql", "用例时长", "响应内容"]
+    # 定义了每一列的宽度，与表头一一对应。
+    COLUMN_WIDTHS = [36, 30, 50, 10, 10, 50, 50, 40, 50, 40, 12, 80]
+    # excel 单个单元格最多保存 32767 个字符，超出的内容会被截断。
+    MAX_CELL_LENGTH = 32767
+    # 定义了截断内容后追加的提示。
+    TRUNCATED_SUFFIX = "...(内容过长，已截断)"
 
     # 定义类的构造方法。
-    def __init__(self):
-        # 定义一个名为_excel_template的私有变量，表示excel模板文件的路径。
-        _excel_template = ensure_path_sep("\\utils\\other_tools\\allure_data\\自动化异常测试用例.xlsx")
+    def __init__(self, file_path: Union[Text, None] = None):
         # 定义一个名为self._file_path的变量，表示生成excel报告的文件路径。
-        self._file_path = ensure_path_sep("\\Files\\" + "自动化异常测试用例.xlsx")
-        # 将_excel_template模板文件复制到self._file_path路径下。
-        shutil.copyfile(src=_excel_template, dst=self._file_path)
-        # 创建一个Excel应用程序对象。
-        self.app = xlwings.App(visible=False, add_book=False)
-        # 打开excel报告文件，返回一个xlwings.Book对象。
-        self.w_book = self.app.books.open(self._file_path, read_only=False)
-
-        # 选取指定名称的工作表异常用例。
-        self.sheet = self.w_book.sheets['异常用例']  # 或通过索引选取
+        self._file_path = file_path or ensure_path_sep("\\Files\\" + "自动化异常测试用例.xlsx")
         # 创建一个ErrorTestCase对象，用于收集运行失败的测试用例。
         self.case_data = ErrorTestCase()
+        # 表头的样式只创建一次，所有表头单元格共用，数据行不设置样式，按行批量写入。
+        self._header_font = Font(bold=True, color="FFFFFF")
+        self._header_fill = PatternFill(fill_type="solid", start_color="4F81BD", end_color="4F81BD")
+        self._header_alignment = Alignment(horizontal="center", vertical="center")
 
-    # 定义一个名为background_color的方法，参数是self，表示类的实例本身，position表示要设置背景颜色的单元格位置，rgb表示要设置的背景色的RGB值。
-    def background_color(self, position: str, rgb: tuple):
-        """
-        excel 单元格设置背景色
-        @param rgb: rgb 颜色 rgb=(0，255，0)
-        @param position: 位置，如 A1, B1...
-        @return:
-        """
-        # 获取工作表中指定位置的单元格范围对象。
-        rng = self.sheet.range(position)
-        # 设置单元格范围对象的颜色属性为RGB值rgb，并将值赋给变量excel_rgb。
-        excel_rgb = rng.color = rgb
-        # 将设置的颜色RGB值返回。
-        return excel_rgb
-
-    # 定义一个名为column_width的方法，参数是self，表示类的实例本身，position表示要设置列宽的列的位置（如"A"，"B"等），width表示要设置的列宽度。
-    def column_width(self, position: str, width: int):
-        """
-        设置列宽
-        @return:
-        """
-        # 获取工作表中指定列的范围对象。
-        rng = self.sheet.range(position)
-        # 将指定列的列宽设置为width，并将值赋给变量excel_column_width。
-        excel_column_width = rng.column_width = width
-        # 将设置的列宽度返回。
-        return excel_column_width
-
-    # 定义一个名为row_height的方法，参数是self，表示类的实例本身，position表示要设置行高的行的位置，height表示要设置的行高度。
-    def row_height(self, position, height):
-        """
-        设置行高
-        @param position:
-        @param height:
-        @return:
-        """
-        # 获取工作表中指定行的范围对象。
-        rng = self.sheet.range(position)
-        # 将指定行的行高设置为height，并将值赋给变量excel_row_height。
-        excel_row_height = rng.row_height = height
-        # 将设置的行高度返回。
-        return excel_row_height
-
-    # 定义一个名为column_width_adaptation的方法，参数是self，表示类的实例本身，position表示要进行宽度自适应的列的范围
-    def column_width_adaptation(self, position):
-        """
-        excel 所有列宽度自适应
-        @return:
-        """
-        # 获取工作表中指定范围的对象。
-        rng = self.sheet.range(position)
-        # 将该范围内所有列的宽度自适应调整。
-        auto_fit = rng.columns.autofit()
-        #返回自适应后的结果。
-        return auto_fit
-
-    # 定义一个名为row_width_adaptation的方法，参数是self，表示类的实例本身，position表示要进行宽度自适应的行的范围。
-    def row_width_adaptation(self, position):
-        """
-        excel 设置所有行宽自适应
-        @return:
-        """
-        # 获取工作表中指定范围的对象。
-        rng = self.sheet.range(position)
-        # 将该范围内所有行的宽度自适应调整。
-        row_adaptation = rng.rows.autofit()
-        # 返回自适应后的结果。
-        return row_adaptation
-
-    # 定义一个名为write_excel_content的方法。参数是self，表示类的实例本身，position表示要写入的位置，value表示要写入的内容，均为字符串类型。
-    def write_excel_content(self, position: str, value: str):
-        """
-        excel 中写入内容
-        @param value:
-        @param position:
-        @return:
-        """
-        # 将给定位置的单元格赋值为给定的值。由于sheet是当前实例的一个属性，因此可以使用self.sheet来获取该工作表对象。range(position)表示获取给定位置的单元格对象，然后对其value属性进行赋值操作。
-        self.sheet.range(position).value = value
+    # 定义了一个名为cell_value的类方法，将单元格内容转换成字符串，去掉 excel 不支持的控制字符，超出长度限制时截断。
+    @classmethod
+    def cell_value(cls, value) -> Text:
+        _value = ILLEGAL_CHARACTERS_RE.sub("", str(value))
+        if len(_value) > cls.MAX_CELL_LENGTH:
+            _value = _value[:cls.MAX_CELL_LENGTH - len(cls.TRUNCATED_SUFFIX)] + cls.TRUNCATED_SUFFIX
+        return _value
+
+    # 定义了一个名为case_row的方法，返回一条失败用例在 A~L 列中的内容。
+    def case_row(self, data) -> List[Text]:
+        """ 一条失败用例对应的一行数据 """
+        _case = self.case_data
+        return [self.cell_value(i) for i in (
+            _case.get_uid(data),
+            _case.get_case_name(data),
+            _case.get_case_url(data),
+            _case.get_method(data),
+            _case.get_request_type(data),
+            _case.get_headers(data),
+            _case.get_case_data(data),
+            _case.get_dependence_case(data),
+            _case.get_assert(data),
+            _case.get_sql(data),
+            _case.get_case_time(data),
+            _case.get_response(data)
+        )]
+
+    # 定义了一个名为write_rows的方法，将表头和所有数据行写入excel文件，返回写入的数据行数。
+    def write_rows(self, rows: Iterable[List[Text]]) -> int:
+        """
+        以只写模式写入excel，每一行写入后不再保存在内存中
+        @param rows: 数据行，每一行为 A~L 列的内容
+        @return: 写入的数据行数
+        """
+        # 只写模式的工作簿不能修改已经写入的单元格，列宽需要在写入数据之前设置。
+        w_book = Workbook(write_only=True)
+        sheet = w_book.create_sheet('异常用例')
+        for index, width in enumerate(self.COLUMN_WIDTHS):
+            sheet.column_dimensions[chr(ord('A') + index)].width = width
+        _header = []
+        for i in self.HEADERS:
+            cell = WriteOnlyCell(sheet, value=i)
+            cell.font = self._header_font
+            cell.fill = self._header_fill
+            cell.alignment = self._header_alignment
+            _header.append(cell)
+        sheet.append(_header)
+        num = 0
+        for row in rows:
+            sheet.append(row)
+            num += 1
+        os.makedirs(os.path.dirname(os.path.abspath(self._file_path)), exist_ok=True)
+        w_book.save(self._file_path)
+        return num
 
     # 定义一个名为write_case的方法，参数是self，表示类的实例本身。
     def write_case(self):
@@ -380,47 +349,13 @@ class ErrorCaseExcel:
 
         # 从case_data对象获取失败用例数据。
         _data = self.case_data.get_error_case_data()
-        # 如果存在失败用例，则继续执行。
+        # 如果存在失败用例，则逐行写入excel报告，并通过企业微信发送报告文件。
         if len(_data) > 0:
-            # 设置行号开始的编号，默认从第二行开始。
-            num = 2
-            # 遍历失败用例数据。
-            for data in _data:
-                # 在第num行的“A”列中写入用例的唯一标识。
-                self.write_excel_content(position="A" + str(num), value=str(self.case_data.get_uid(data)))
-                # 在第num行的“B”列中写入用例的名称。
-                self.write_excel_content(position='B' + str(num), value=str(self.case_data.get_case_name(data)))
-                # 在第num行的“C”列中写入用例的 URL。
-                self.write_excel_content(position="C" + str(num), value=str(self.case_data.get_case_url(data)))
-                # 在第num行的“D”列中写入用例的请求方法名。
-                self.write_excel_content(position="D" + str(num), value=str(self.case_data.get_method(data)))
-                # 在第num行的“E”列中写入用例的请求类型。
-                self.write_excel_content(position="E" + str(num), value=str(self.case_data.get_request_type(data)))
-                # 在第num行的“F”列中写入用例的头部信息。
-                self.write_excel_content(position="F" + str(num), value=str(self.case_data.get_headers(data)))
-                # 在第num行的“G”列中写入用例的请求数据。
-                self.write_excel_content(position="G" + str(num), value=str(self.case_data.get_case_data(data)))
-                # 在第num行的“H”列中写入用例依赖的其他用例。
-                self.write_excel_content(position="H" + str(num), value=str(self.case_data.get_dependence_case(data)))
-                # 在第num行的“I”列中写入用例的断言信息。
-                self.write_excel_content(position="I" + str(num), value=str(self.case_data.get_assert(data)))
-                # 在第num行的“J”列中写入用例的 SQL 语句。
-                self.write_excel_content(position="J" + str(num), value=str(self.case_data.get_sql(data)))
-                # 在第num行的“K”列中写入用例的执行时间。
-                self.write_excel_content(position="K" + str(num), value=str(self.case_data.get_case_time(data)))
-                # 在第num行的“L”列中写入用例的响应信息。
-                self.write_excel_content(position="L" + str(num), value=str(self.case_data.get_response(data)))
-                # 将行号加一，以便写入下一个用例。
-                num += 1
-            # 保存文件修改。
-            self.w_book.save()
-            # 关闭工作簿。
-            self.w_book.close()
-            # 结束 Excel 进程。
-            self.app.quit()
-            # 通知企业微信发送文件消息，包括更新的用例数量和文件路径。
+            self.write_rows(self.case_row(data) for data in _data)
+            # 发送报告文件时才导入企业微信通知，只生成excel报告时不依赖通知模块。
+            from utils.notify.wechat_send import WeChatSend
             WeChatSend(AllureFileClean().get_case_count()).send_file_msg(self._file_path)
 
 
 if __name__ == '__main__':
-    ErrorCaseExcel().write_case()
\ No newline at end of file
+    ErrorCaseExcel().write_case()
@@ -27,4 +27,7 @@ class SendMessageError(MyBaseFailure):
     pass
 # 这个异常类是用来描述在处理请求或操作时未找到所需值的情况。
 class ValueNotFoundError(MyBaseFailure):
-    pass
\ No newline at end of file
+    pass
+# 这个异常类是用来描述用例之间的依赖关系存在循环引用的情况。
+class DependencyCycleError(MyBaseFailure):
+    pass
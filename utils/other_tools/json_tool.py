@@ -0,0 +1,25 @@
+"""
+json 解析，安装了 orjson 时优先使用 orjson 解析，未安装时使用标准库 json
+"""
+import json
+from typing import Any, Text, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Union[Text, bytes]) -> Any:
+    """
+    解析 json 字符串
+    orjson 不支持超出 64 位的整数、NaN 等内容，解析失败时交给标准库 json 处理，保证解析结果和报错信息与 json.loads 一致
+    :param data: json 字符串
+    :return:
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
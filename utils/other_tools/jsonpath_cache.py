@@ -0,0 +1,61 @@
+"""
+jsonpath 表达式编译缓存，同一个表达式只解析一次
+简单的点号、下标路径(如 $.data.list[0].id)直接按路径取值，其他表达式交给 jsonpath 库处理
+"""
+import re
+from functools import lru_cache
+from typing import Any, List, Text, Tuple, Union
+from jsonpath import jsonpath as _jsonpath
+
+
+# 简单路径只包含 .key、.[0]、[0] 三种写法，key 中不能包含通配符、过滤器、切片等 jsonpath 语法。
+# 至少包含一级路径，单独的 $ 在 jsonpath 库中提取失败，交给 jsonpath 库处理以保持一致。
+_simple_pattern = re.compile(r"^\$(?:\.[\w-]+|\.?\[\d+\])+$")
+_token_pattern = re.compile(r"[\w-]+")
+
+
+class JsonPathExpr:
+    """ 编译后的 jsonpath 表达式 """
+
+    __slots__ = ('expr', 'tokens')
+
+    def __init__(self, expr: Text):
+        self.expr = expr
+        # 简单路径预先拆分为 key 列表，其他表达式为 None。
+        self.tokens: Union[Tuple[Text, ...], None] = None
+        if _simple_pattern.match(expr):
+            self.tokens = tuple(_token_pattern.findall(expr))
+
+    def find(self, obj: Any) -> Union[List, bool]:
+        """
+        提取数据，返回值与 jsonpath 库一致，提取成功时返回列表，提取失败时返回 False
+        :param obj: 提取的对象
+        :return:
+        """
+        if self.tokens is None:
+            return _jsonpath(obj, self.expr)
+        for key in self.tokens:
+            # 与 jsonpath 库的处理方式一致，字典按 key 取值，列表只接受非负整数下标。
+            if isinstance(obj, dict) and key in obj:
+                obj = obj[key]
+            elif isinstance(obj, (list, tuple)) and key.isdigit() and int(key) < len(obj):
+                obj = obj[int(key)]
+            else:
+                return False
+        return [obj]
+
+
+@lru_cache(maxsize=2048)
+def compile_jsonpath(expr: Text) -> JsonPathExpr:
+    """ 编译 jsonpath 表达式，编译结果按表达式缓存 """
+    return JsonPathExpr(expr)
+
+
+def jsonpath(obj: Any, expr: Text) -> Union[List, bool]:
+    """
+    使用编译缓存提取数据，用法与 jsonpath 库的 jsonpath(obj, expr) 一致
+    :param obj: 提取的对象
+    :param expr: jsonpath 表达式
+    :return: 提取成功时返回列表，提取失败时返回 False
+    """
+    return compile_jsonpath(expr).find(obj)
@@ -0,0 +1,90 @@
+"""
+# @describe: 用例执行数据收集插件，在 pytest 执行过程中直接统计用例结果，不依赖 allure 生成的 html 报告
+# 用例状态与 allure 保持一致: 断言失败为 failed，其他异常以及前置、后置处理失败为 broken
+"""
+import time
+from typing import Dict, List, Text, Tuple, Union
+import pytest
+from utils.other_tools.models import TestMetrics
+
+
+class MetricsPlugin:
+    """ 用例执行数据收集插件，通过 pytest.main(plugins=[...]) 注册 """
+
+    def __init__(self):
+        # _results 的键为用例 nodeid，值为 [状态, 用例标题]，失败重跑时以最后一次执行结果为准
+        self._results: Dict[Text, List] = {}
+        self._start: Union[float, None] = None
+        self._duration = 0.0
+
+    def pytest_sessionstart(self, session):
+        self._start = time.time()
+        self._results.clear()
+
+    @classmethod
+    def case_title(cls, item) -> Text:
+        """ 用例标题，与 allure 中展示的标题一致，使用用例的 detail """
+        _in_data = getattr(item, 'funcargs', {}).get('in_data')
+        if isinstance(_in_data, dict) and _in_data.get('detail'):
+            return _in_data['detail']
+        return item.name
+
+    @classmethod
+    def _status(cls, report, call) -> Text:
+        if report.passed:
+            return "passed"
+        if report.skipped:
+            return "skipped"
+        # 用例执行阶段抛出的断言异常为 failed，前置、后置处理失败和其他异常为 broken
+        if report.when == "call" and call.excinfo is not None and call.excinfo.errisinstance(AssertionError):
+            return "failed"
+        return "broken"
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        _status = self._status(report, call)
+        if report.when == "setup":
+            self._results[item.nodeid] = [_status, self.case_title(item)]
+            return
+        _result = self._results.setdefault(item.nodeid, ["passed", self.case_title(item)])
+        # 用例执行阶段的结果覆盖前置阶段，后置处理失败时，已通过的用例记为 broken
+        if report.when == "call" or (_status == "broken" and _result[0] == "passed"):
+            _result[0] = _status
+            _result[1] = self.case_title(item)
+
+    def mark_broken(self, nodeid: Text) -> None:
+        """ 将用例记为 broken，用于用例结束后才执行失败的延迟后置处理 """
+        _result = self._results.get(nodeid)
+        if _result is not None and _result[0] in ("passed", "skipped"):
+            _result[0] = "broken"
+
+    def pytest_sessionfinish(self, session):
+        if self._start is not None:
+            self._duration = time.time() - self._start
+
+    def failed_cases(self) -> List[Tuple[Text, Text]]:
+        """ 所有失败和异常用例的标题和用例路径 """
+        return [(title, nodeid) for nodeid, (status, title) in self._results.items()
+                if status in ("failed", "broken")]
+
+    def metrics(self) -> "TestMetrics":
+        """ 统计用例数量、通过率和执行时长 """
+        _count = {"passed": 0, "failed": 0, "broken": 0, "skipped": 0}
+        for status, _ in self._results.values():
+            _count[status] += 1
+        _total = sum(_count.values())
+        _pass_rate = round((_count["passed"] + _count["skipped"]) / _total * 100, 2) if _total > 0 else 0.0
+        # 用例还在执行中时(如执行异常)，使用已经执行的时长
+        _duration = self._duration or (time.time() - self._start if self._start is not None else 0.0)
+        return TestMetrics(
+            total=_total,
+            pass_rate=_pass_rate,
+            time=round(_duration, 2),
+            failed_cases=self.failed_cases(),
+            **_count
+        )
+
+
+metrics_plugin = MetricsPlugin()
@@ -1,8 +1,8 @@
 import types
 from enum import Enum, unique
 from typing import Text, Dict, Callable, Union, Optional, List, Any
-from dataclasses import dataclass
-from pydantic import BaseModel
+from dataclasses import dataclass, field
+from pydantic import BaseModel, PrivateAttr
 
 
 # 定义一个 NotificationType 枚举类。
@@ -28,6 +28,7 @@ class TestMetrics:
     total: int  # 表示总共的测试用例数
     pass_rate: float  # 表示测试通过率
     time: Text  # 表示测试执行的时间
+    failed_cases: List = field(default_factory=list)  # 表示失败和异常用例的标题和用例路径，每个元素为 (标题, 用例路径)
 
 
 # 定义一个 RequestType 枚举类。
@@ -203,6 +204,7 @@ class TestCase(BaseModel):
     teardown: Union[List["TearDown"], None] = None  # 表示模拟测试数据的后置条件
     current_request_set_cache: Optional[List["CurrentRequestSetCache"]]  # 表示缓存当前请求需要的数据
     sleep: Optional[Union[int, float]]  # 表示请求完后需要等待的时间，它是可选参数
+    case_id: Optional[Text] = None  # 表示用例ID，即 yaml 文件中用例的键名，它是可选参数
 
 
 # 定义了一个名为 ResponseData 的数据类，它同样是继承自 BaseModel 类，即 ResponseData 类也具有了 BaseModel 类的所有属性和方法。
@@ -223,6 +225,20 @@ class ResponseData(BaseModel):
     teardown: List["TearDown"] = None  # 表示模拟测试数据的后置条件
     teardown_sql: Union[None, List]  # 表示该测试用例执行完后需要执行的 SQL 语句列表，它是可选参数
     body: Any  # 表示响应结果的请求体数据
+    _response_json: Any = PrivateAttr(default=None)  # 表示解析后的响应结果，第一次使用 response_json 时才解析
+    _response_parsed: bool = PrivateAttr(default=False)  # 表示响应结果是否已经解析过
+
+    # 定义了一个名为 response_json 的属性方法，返回解析后的响应结果，同一个响应只解析一次，后置处理、依赖、缓存、断言等共用同一个解析结果。
+    @property
+    def response_json(self) -> Any:
+        # 在方法内部导入 json_tool，安装了 orjson 时使用 orjson 解析。
+        from utils.other_tools.json_tool import loads
+        # 第一次使用时解析响应内容并保存，解析失败时直接抛出异常，不保存解析结果。
+        if not self._response_parsed:
+            self._response_json = loads(self.response_data)
+            self._response_parsed = True
+        # 返回解析后的响应结果。
+        return self._response_json
 
 
 # 定义了一个名为 DingTalk 的数据类，它同样是继承自 BaseModel 类，即 DingTalk 类也具有了 BaseModel 类的所有属性和方法。
@@ -242,6 +258,10 @@ class MySqlDB(BaseModel):
     user: Union[Text, None] = None  # 表示连接数据库的用户名，是一个文本类型的可选参数，默认值为 None
     password: Union[Text, None] = None  # 表示连接数据库的密码，是一个文本类型的可选参数，默认值为 None
     port: Union[int, None] = 3306  # 表示连接数据库的端口，是一个整型的可选参数，默认值为 3306
+    pool_size: int = 5  # 表示数据库连接池的最大连接数，默认值为 5
+    pool_timeout: Union[int, float] = 30  # 表示连接全部被借出时，等待空闲连接的超时时间，单位为秒，默认值为 30
+    pool_ping_interval: Union[int, float] = 10  # 表示连接空闲超过该时长后，借出前先检查连接是否可用，单位为秒，默认值为 10
+    batch: bool = False  # 表示是否批量执行 setup_sql、teardown_sql 中的非查询语句，开启后同一个用例的语句在一个事务中执行，失败时整体回滚
 
 
 # 这个数据类可以用来存储 MySQL 数据库的相关信息，方便程序中的调用和使用。由于所有属性都是可选参数，所以在使用时需要注意判断是否为空。此外，通过在属性定义中设置默认值，可以方便地进行参数配置。
@@ -266,6 +286,95 @@ class Email(BaseModel):
 # 这个数据类可以用来存储发送邮件的相关信息，方便程序中的调用和使用。由于所有属性都是可选参数，所以在使用时需要注意判断是否为空。此外，通过在属性定义中设置默认值，可以方便地进行参数配置。
 
 
+# 定义了一个名为 HttpPool 的数据类，用于配置 http 连接池。
+class HttpPool(BaseModel):
+    switch: bool = True  # 表示是否开启连接池，关闭后每个请求都会新建连接
+    pool_connections: int = 10  # 表示每个 session 缓存的 host 连接池个数
+    pool_maxsize: int = 10  # 表示每个 host 连接池中保存的最大连接数
+    max_retries: int = 0  # 表示连接失败时的重试次数
+    pool_block: bool = False  # 表示连接池满时是否阻塞等待空闲连接
+    keep_alive: bool = True  # 表示是否保持长连接
+
+
+# 定义了一个名为 DependentCache 的数据类，用于配置依赖用例执行结果的缓存。
+class DependentCache(BaseModel):
+    scope: Text = 'none'  # 表示缓存作用域，可选 session、module、none，none 表示不缓存
+    ttl: Union[int, float] = 0  # 表示缓存有效时长，单位为秒，0 表示在作用域内一直有效
+
+
+# 定义了一个名为 DependencyScheduler 的数据类，用于配置依赖用例的并发调度。
+class DependencyScheduler(BaseModel):
+    switch: bool = False  # 表示是否在用例执行前，按依赖关系并发预执行所有被依赖的用例
+    max_workers: int = 4  # 表示并发执行的线程数
+
+
+# 定义了一个名为 CaseCache 的数据类，用于配置用例编译缓存。
+class CaseCache(BaseModel):
+    switch: bool = False  # 表示是否开启用例编译缓存，开启后未修改的 yaml 文件不会重新解析、校验
+    path: Text = "\\cache\\case_cache.pickle"  # 表示缓存文件的路径，相对于项目根目录
+
+
+# 定义了一个名为 CaseLoader 的数据类，用于配置 yaml 用例文件的解析方式。
+class CaseLoader(BaseModel):
+    max_workers: int = 1  # 表示解析 yaml 用例文件的进程数，小于等于 1 时在当前进程中按顺序解析
+    min_files: int = 50  # 表示需要解析的文件数量达到该值时才使用进程池
+
+
+# 定义了一个名为 CasePool 的数据类，用于配置用例池的加载方式。
+class CasePool(BaseModel):
+    lazy: bool = False  # 表示是否懒加载用例池，开启后只解析被执行的用例及其依赖的用例所在的文件
+
+
+# 定义了一个名为 TeardownQueue 的数据类，用于配置延迟后置处理。
+class TeardownQueue(BaseModel):
+    switch: bool = False  # 表示是否开启延迟后置处理，开启后后置请求、后置 sql 放到后台线程池中执行，测试结束前统一等待完成
+    max_workers: int = 4  # 表示执行后置处理的线程数
+
+
+# 定义了一个名为 Export 的数据类，用于配置导出文件的流式下载。
+class Export(BaseModel):
+    chunk_size: int = 1024 * 1024  # 表示流式下载时每次读取、写入的字节数，默认值为 1MB
+    hash_algorithm: Union[Text, None] = None  # 表示下载过程中计算文件哈希使用的算法，如 md5、sha256，为 None 时不计算
+
+
+# 定义了一个名为 Upload 的数据类，用于配置上传文件的读取方式和 allure 附件的展示方式。
+class Upload(BaseModel):
+    mmap_threshold: int = 0  # 表示文件大小达到该值(字节)时使用 mmap 读取文件，默认值为 0，表示不使用 mmap
+    attachment: Text = "file"  # 表示 allure 中上传文件的展示方式，file 展示完整文件、hash 只展示文件大小和哈希、preview 展示文件开头的内容、skip 不展示
+    preview_size: int = 1024  # 表示 preview 展示方式下展示的字节数，默认值为 1024
+
+
+# 定义了一个名为 PhaseTiming 的数据类，用于配置用例分阶段耗时统计。
+class PhaseTiming(BaseModel):
+    switch: bool = False  # 表示是否统计每个用例在模板渲染、依赖处理、http 请求、sql、断言、后置处理等阶段的耗时
+    path: Text = "\\report\\phase_timing.json"  # 表示测试结束时导出统计结果的文件路径
+    allure: bool = True  # 表示是否在 allure 中展示每个用例的阶段耗时
+
+
+# 定义了一个名为 Log 的数据类，用于配置日志的输出方式。
+class Log(BaseModel):
+    queue: bool = False  # 表示是否开启队列模式，开启后日志由后台线程格式化并写入屏幕和文件，不占用用例执行的时间
+    queue_size: int = 10000  # 表示队列最大长度，队列已满时等待后台线程写入，0 表示不限制
+    max_body_length: int = 0  # 表示请求日志中请求内容、响应内容的最大长度，超出部分截断，0 表示不截断
+
+
+# 定义了一个名为 EventLog 的数据类，用于配置结构化请求日志。
+class EventLog(BaseModel):
+    switch: bool = False  # 表示是否开启结构化请求日志，开启后每个请求以一行 json 的形式写入 jsonl 文件
+    path: Text = "\\logs\\events.jsonl"  # 表示 jsonl 文件路径
+    max_bytes: int = 50 * 1024 * 1024  # 表示单个文件的最大字节数，达到后轮转，0 表示不轮转
+    backup_count: int = 5  # 表示轮转后保留的历史文件数量
+    buffer_size: int = 64 * 1024  # 表示写入缓冲区大小，单位为字节
+
+
+# 定义了一个名为 AllureReport 的数据类，用于配置 allure html 报告的生成方式。
+class AllureReport(BaseModel):
+    generate: bool = True  # 表示是否生成 allure html 报告，开启 excel_report 时始终生成
+    background: bool = False  # 表示是否在发送通知后，在后台生成 allure html 报告
+    serve: bool = True  # 表示执行完成后是否启动 allure 报告服务
+    max_workers: int = 4  # 表示解析 allure 报告中用例执行结果文件的进程数，小于等于 1 时在当前进程中按顺序解析
+
+
 # 定义了一个名为 Config 的数据类，它同样是继承自 BaseModel 类，即 Config 类也具有了 BaseModel 类的所有属性和方法。
 class Config(BaseModel):
     project_name: Text  # 表示项目的名称，是一个文本类型的必选参数
@@ -282,6 +391,20 @@ class Config(BaseModel):
     real_time_update_test_cases: bool = False  # 表示是否实时更新测试用例，是一个布尔类型的可选参数，它的默认值为 False
     host: Text  # 表示测试服务器的地址，是一个文本类型的必选参数
     app_host: Union[Text, None]  # 表示被测应用程序的地址，是一个文本类型的可选参数，默认值为 None
+    http_pool: "HttpPool" = HttpPool()  # 表示 http 连接池的相关配置，是一个 HttpPool 类的实例，是一个可选参数
+    dependent_cache: "DependentCache" = DependentCache()  # 表示依赖用例结果缓存的相关配置，是一个可选参数
+    dependency_scheduler: "DependencyScheduler" = DependencyScheduler()  # 表示依赖用例并发调度的相关配置，是一个可选参数
+    case_cache: "CaseCache" = CaseCache()  # 表示用例编译缓存的相关配置，是一个可选参数
+    case_loader: "CaseLoader" = CaseLoader()  # 表示 yaml 用例文件解析方式的相关配置，是一个可选参数
+    case_pool: "CasePool" = CasePool()  # 表示用例池加载方式的相关配置，是一个可选参数
+    teardown_queue: "TeardownQueue" = TeardownQueue()  # 表示延迟后置处理的相关配置，是一个可选参数
+    export: "Export" = Export()  # 表示导出文件流式下载的相关配置，是一个可选参数
+    upload: "Upload" = Upload()  # 表示上传文件的相关配置，是一个可选参数
+    phase_timing: "PhaseTiming" = PhaseTiming()  # 表示用例分阶段耗时统计的相关配置，是一个可选参数
+    log: "Log" = Log()  # 表示日志输出方式的相关配置，是一个可选参数
+    event_log: "EventLog" = EventLog()  # 表示结构化请求日志的相关配置，是一个可选参数
+    allure_report: "AllureReport" = AllureReport()  # 表示 allure html 报告生成方式的相关配置，是一个可选参数
+    random_seed: Union[int, None] = None  # 表示 ${{}} 函数生成随机数据时使用的随机种子，设置后每次运行生成的数据一致，默认值为 None
 
 
 # 这个数据类封装了一个测试框架的配置信息，包括项目名称、测试环境、测试人员信息、通知方式、测试用例相关信息、被测应用程序相关信息等。可以通过实例化 Config 类来快速配置测试框架的相关信息。由于部分属性有默认值，因此在实例化时可以只传递必选参数。
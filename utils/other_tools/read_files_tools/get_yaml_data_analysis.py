@@ -1,5 +1,6 @@
+from concurrent.futures import ProcessPoolExecutor
 from typing import Union, Text, List
-from utils.read_files_tools.yaml_control import GetYamlData
+from utils.other_tools.read_files_tools.yaml_control import GetYamlData
 from utils.other_tools.models import TestCase
 from utils.cache_process.cache_control import CacheHandler
 from utils import config
@@ -134,50 +135,54 @@ class CaseDataCheck:
         return _sql
 
 
-# 定义了一个名为case_process的方法，需要传入一个case_id_switch参数，属于类方法。
-def case_process(self, case_id_switch: Union[None, bool] = None):
-    # 从self.file_path中获取yaml文件中的数据，赋值给变量data。
-    data = GetYamlData(self.file_path).get_yaml_data()
-    case_list = []
-    # 循环遍历data中的每一个元素，赋值给变量key和values。
-    for key, values in data.items():
-        # 如果key不等于case_common。
-        if key != 'case_common':
-            # 将values赋值给self.case_data。
-            self.case_data = values
-            # 将key赋值给self.case_id。
-            self.case_id = key
-            # 调用CaseDataCheck类中的check_params_exit方法，检查yaml文件中的参数是否正确。
-            super().check_params_exit()
-            # 定义一个字典case_date，用于存储每一个测试用例的数据。
-            case_date = {
-                'method': self.get_method,  # 获取请求方法。
-                'is_run': self.case_data.get(TestCaseEnum.IS_RUN.value[0]),  # 获取是否执行该测试用例。
-                'url': self.get_host,  # 获取请求url。
-                'detail': self.case_data.get(TestCaseEnum.DETAIL.value[0]),  # 获取测试用例的描述信息。
-                'headers': self.case_data.get(TestCaseEnum.HEADERS.value[0]),  # 获取请求头信息。
-                'requestType': super().get_request_type,  # 获取请求类型。
-                'data': self.case_data.get(TestCaseEnum.DATA.value[0]),  # 获取请求数据。
-                'dependence_case': self.case_data.get(TestCaseEnum.DE_CASE.value[0]),  # 获取依赖的测试用例。
-                'dependence_case_data': self.get_dependence_case_data,  # 获取依赖测试用例的返回数据。
-                "current_request_set_cache": self.case_data.get(TestCaseEnum.CURRENT_RE_SET_CACHE.value[0]),
-                # 获取当前请求的缓存设置。
-                "sql": self.get_sql,  # 获取执行的sql语句。
-                "assert_data": self.get_assert,  # 获取断言数据。
-                "setup_sql": self.case_data.get(TestCaseEnum.SETUP_SQL.value[0]),  # 获取测试用例执行前需要执行的sql语句。
-                "teardown": self.case_data.get(TestCaseEnum.TEARDOWN.value[0]),  # 获取测试用例执行后需要执行的方法。
-                "teardown_sql": self.case_data.get(TestCaseEnum.TEARDOWN_SQL.value[0]),  # 获取测试用例执行后需要执行的sql语句。
-                "sleep": self.case_data.get(TestCaseEnum.SLEEP.value[0]),  # 获取测试用例执行前需要等待的时间。
-            }
-            # 如果case_id_switch为True，则将测试用例的id和数据存储为字典的形式
-            if case_id_switch is True:
-                case_list.append({key: TestCase(**case_date).dict()})
-            # 否则直接存储测试用例的数据。
-            else:
-                case_list.append(TestCase(**case_date).dict())
-
-    # 返回case_list
-    return case_list
+class CaseData(CaseDataCheck):
+    """ 读取 yaml 用例文件，校验后转换成 TestCase 格式的用例数据 """
+
+    # 定义了一个名为case_process的方法，需要传入一个case_id_switch参数，属于类方法。
+    def case_process(self, case_id_switch: Union[None, bool] = None):
+        # 从self.file_path中获取yaml文件中的数据，赋值给变量data。
+        data = GetYamlData(self.file_path).get_yaml_data()
+        case_list = []
+        # 循环遍历data中的每一个元素，赋值给变量key和values。
+        for key, values in data.items():
+            # 如果key不等于case_common。
+            if key != 'case_common':
+                # 将values赋值给self.case_data。
+                self.case_data = values
+                # 将key赋值给self.case_id。
+                self.case_id = key
+                # 调用CaseDataCheck类中的check_params_exit方法，检查yaml文件中的参数是否正确。
+                super().check_params_exit()
+                # 定义一个字典case_date，用于存储每一个测试用例的数据。
+                case_date = {
+                    'case_id': key,  # 用例ID，用于在日志、耗时统计等场景中定位用例。
+                    'method': self.get_method,  # 获取请求方法。
+                    'is_run': self.case_data.get(TestCaseEnum.IS_RUN.value[0]),  # 获取是否执行该测试用例。
+                    'url': self.get_host,  # 获取请求url。
+                    'detail': self.case_data.get(TestCaseEnum.DETAIL.value[0]),  # 获取测试用例的描述信息。
+                    'headers': self.case_data.get(TestCaseEnum.HEADERS.value[0]),  # 获取请求头信息。
+                    'requestType': super().get_request_type,  # 获取请求类型。
+                    'data': self.case_data.get(TestCaseEnum.DATA.value[0]),  # 获取请求数据。
+                    'dependence_case': self.case_data.get(TestCaseEnum.DE_CASE.value[0]),  # 获取依赖的测试用例。
+                    'dependence_case_data': self.get_dependence_case_data,  # 获取依赖测试用例的返回数据。
+                    "current_request_set_cache": self.case_data.get(TestCaseEnum.CURRENT_RE_SET_CACHE.value[0]),
+                    # 获取当前请求的缓存设置。
+                    "sql": self.get_sql,  # 获取执行的sql语句。
+                    "assert_data": self.get_assert,  # 获取断言数据。
+                    "setup_sql": self.case_data.get(TestCaseEnum.SETUP_SQL.value[0]),  # 获取测试用例执行前需要执行的sql语句。
+                    "teardown": self.case_data.get(TestCaseEnum.TEARDOWN.value[0]),  # 获取测试用例执行后需要执行的方法。
+                    "teardown_sql": self.case_data.get(TestCaseEnum.TEARDOWN_SQL.value[0]),  # 获取测试用例执行后需要执行的sql语句。
+                    "sleep": self.case_data.get(TestCaseEnum.SLEEP.value[0]),  # 获取测试用例执行前需要等待的时间。
+                }
+                # 如果case_id_switch为True，则将测试用例的id和数据存储为字典的形式
+                if case_id_switch is True:
+                    case_list.append({key: TestCase(**case_date).dict()})
+                # 否则直接存储测试用例的数据。
+                else:
+                    case_list.append(TestCase(**case_date).dict())
+
+        # 返回case_list
+        return case_list
 
 
 class GetTestCase:
@@ -197,3 +202,28 @@ class GetTestCase:
 
         # 返回存储测试用例数据的列表case_lists。
         return case_lists
+
+
+# 定义了一个名为 _load_case_file 的函数，用于解析单个 yaml 用例文件，定义在模块顶层才能被 pickle 后传递给子进程。
+def _load_case_file(file_path: Text) -> List:
+    return CaseData(file_path).case_process(case_id_switch=True)
+
+
+# 定义了一个名为 load_case_files 的函数，用于批量解析 yaml 用例文件。
+def load_case_files(file_paths: List[Text], max_workers: int = 1, min_files: int = 0) -> List[List]:
+    """
+    批量解析 yaml 用例文件，文件数量较多时使用进程池并发解析
+    :param file_paths: yaml 文件路径
+    :param max_workers: 进程数，小于等于 1 时按顺序解析
+    :param min_files: 文件数量达到该值时才使用进程池，文件较少时创建进程的开销比解析本身更大
+    :return: 与 file_paths 顺序一致的用例数据
+    """
+    # 进程数小于等于 1，或者文件数量较少时，直接在当前进程中按顺序解析。
+    if max_workers <= 1 or len(file_paths) < max(min_files, 2):
+        return [_load_case_file(i) for i in file_paths]
+    _max_workers = min(max_workers, len(file_paths))
+    # 每个子进程一次处理多个文件，减少进程间通信的次数。
+    _chunksize = max(len(file_paths) // (_max_workers * 4), 1)
+    with ProcessPoolExecutor(max_workers=_max_workers) as executor:
+        # executor.map 返回结果的顺序与入参顺序一致，合并用例池时，重复 case_id 的检测结果与顺序解析保持一致。
+        return list(executor.map(_load_case_file, file_paths, chunksize=_chunksize))
@@ -1,40 +1,128 @@
-import re
+import ast
+import copy
 import datetime
 import random
+import threading
 from datetime import date, timedelta, datetime
-from jsonpath import jsonpath
+from typing import Callable, Dict, Text, Union
+from utils.other_tools.jsonpath_cache import jsonpath
 from faker import Faker
 from utils.logging_tool.log_control import ERROR
+from utils.logging_tool.phase_timer import phase_timer
+from utils.other_tools.read_files_tools.template_control import compile_template, Placeholder
 
 
 class Context:
     """ 正则替换 """
 
-    # 用于初始化对象的属性。
-    def __init__(self):
-        # self.faker 是对象的一个属性，用于存储一个Faker对象，Faker 是一个Python库，用于生成随机数据，如姓名、地址、电话号码等。使用了 locale='zh_CN' 参数来指定生成的数据的语言环境为中文。
-        self.faker = Faker(locale='zh_CN')
+    # 自定义函数注册表，键为函数名称，值为对应的函数，替换 ${{}} 时优先从注册表中查找。
+    _functions: Dict[Text, Callable] = {}
+    # 所有实例共用一个随机数生成器，设置了随机种子后，每次运行生成的随机数据保持一致。
+    _random = random.Random()
+    _seed = None
+    # Faker 对象在第一次使用时才创建，并且所有实例共用，避免每次替换都重新加载 Faker 的数据。
+    _faker = None
+    # 全局唯一的 Context 实例，通过 instance() 方法获取。
+    _instance = None
+    _lock = threading.RLock()
+
+    # 定义了一个名为 faker 的属性方法，用于获取共用的 Faker 对象。
+    @property
+    def faker(self) -> Faker:
+        """ 懒加载的 Faker 对象 """
+        if Context._faker is None:
+            with Context._lock:
+                if Context._faker is None:
+                    # Faker 是一个Python库，用于生成随机数据，如姓名、地址、电话号码等。使用了 locale='zh_CN' 参数来指定生成的数据的语言环境为中文。
+                    _faker = Faker(locale='zh_CN')
+                    if Context._seed is not None:
+                        _faker.seed_instance(Context._seed)
+                    Context._faker = _faker
+        return Context._faker
+
+    # 装饰器，用于定义类方法，获取全局唯一的 Context 实例。
+    @classmethod
+    def instance(cls) -> "Context":
+        """ 获取全局唯一的 Context 实例，第一次获取时读取配置文件中的随机种子 """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    from utils import config
+                    if config.random_seed is not None:
+                        cls.seed(config.random_seed)
+                    cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def seed(cls, seed: Union[int, None]) -> None:
+        """
+        设置随机种子，random 和 Faker 生成的数据都可以复现
+        :param seed: 随机种子，为 None 时使用随机的种子
+        :return:
+        """
+        with cls._lock:
+            cls._seed = seed
+            cls._random.seed(seed)
+            if cls._faker is not None:
+                cls._faker.seed_instance(seed)
+
+    @classmethod
+    def register(cls, name: Text, func: Callable = None):
+        """
+        注册自定义函数，注册后可以在用例中通过 ${{name()}} 调用，同名时会覆盖 Context 自带的方法
+        可以直接调用 Context.register('get_id', get_id)，也可以作为装饰器 @Context.register('get_id') 使用
+        :param name: 函数名称
+        :param func: 函数对象
+        :return:
+        """
+        if func is None:
+            def _decorator(_func: Callable) -> Callable:
+                cls.register(name, _func)
+                return _func
+            return _decorator
+        with cls._lock:
+            cls._functions[name] = func
+        return func
+
+    @classmethod
+    def unregister(cls, name: Text) -> None:
+        """ 删除注册的自定义函数 """
+        with cls._lock:
+            cls._functions.pop(name, None)
+
+    # 定义了一个名为 get_function 的方法，用于根据函数名称获取需要执行的函数。
+    def get_function(self, name: Text) -> Callable:
+        """
+        优先从注册表中查找函数，找不到时再查找 Context 自带的方法
+        :param name: 函数名称
+        :return:
+        """
+        _func = self._functions.get(name)
+        if _func is not None:
+            return _func
+        # 找不到对应的方法时，getattr 会抛出 AttributeError，由调用方记录错误日志。
+        return getattr(self, name)
 
     @classmethod
     def generate_email(cls) -> str:
         """
         :return: 随机生成邮箱
         """
-        Mailbox_number = 'register' + str(random.randint(0, 9999999)) + '@123.com'
+        Mailbox_number = 'register' + str(cls._random.randint(0, 9999999)) + '@123.com'
         return Mailbox_number
 
     def generate_google_email(self) -> str:
         """
         :return: 随机生成Google邮箱
         """
-        Google_email = 'google' + str(random.randint(0, 9999999)) + '@test.com'
+        Google_email = 'google' + str(self._random.randint(0, 9999999)) + '@test.com'
         return Google_email
 
     def random_int(self) -> int:
         """
         :return: 随机数
         """
-        _data = random.randint(0, 5000)
+        _data = self._random.randint(0, 5000)
         return _data
 
     def get_phone(self) -> int:
@@ -75,17 +163,18 @@ class Context:
 # 这是一个函数，用于提取sql中的json数据。
 def sql_json(js_path, res):
     """ 提取 sql中的 json 数据 """
-    # 这是一个jsonpath语法，用于从res变量中提取js_path指定的json数据。[0]表示取第一个元素。
-    _json_data = jsonpath(res, js_path)[0]
+    # 这是一个jsonpath语法，用于从res变量中提取js_path指定的json数据，表达式只解析一次，提取结果直接复用。
+    _json_data = jsonpath(res, js_path)
     # 如果_json_data为False，即提取失败，则抛出ValueError异常。
     if _json_data is False:
         # 抛出ValueError异常，提示sql中的jsonpath获取失败。f""表示格式化字符串。
         raise ValueError(f"sql中的jsonpath获取失败 {res}, {js_path}")
-    # 返回提取的json数据。
-    return jsonpath(res, js_path)[0]
+    # 返回提取的json数据，[0]表示取第一个元素。
+    return _json_data[0]
 
 
-# 这是一个函数，用于处理sql中的依赖数据。
+# 这是一个函数，用于处理sql中的依赖数据，耗时计入 render 阶段。
+@phase_timer.timed("render")
 def sql_regular(value, res=None):
     """
     这里处理sql中的依赖数据，通过获取接口响应的jsonpath的值进行替换
@@ -93,61 +182,56 @@ def sql_regular(value, res=None):
     :param value:
     :return:
     """
-    # 使用正则表达式查找value中以$json()格式包含的内容，并将其存储在sql_json_list列表中。
-    sql_json_list = re.findall(r"\$json\((.*?)\)\$", value)
 
-    # 循环遍历sql_json_list中的元素。
-    for i in sql_json_list:
-        # 使用正则表达式构造一个模式，用于匹配以$json()格式包含的内容。
-        pattern = re.compile(r'\$json\(' + i.replace('$', "\$").replace('[', '\[') + r'\)\$')
-        # 调用sql_json()函数获取json数据，并将其转换为字符串类型。
-        key = str(sql_json(i, res))
-        # 使用re.sub()函数将匹配到的内容替换成json数据中对应的值，替换次数为1。
-        value = re.sub(pattern, key, value, count=1)
+    # 定义 $json()$ 占位符的处理方法，通过 sql_json() 函数获取json数据，并将其转换为字符串类型。
+    def _json_replace(token):
+        return token.prefix + str(sql_json(token.body, res)) + token.suffix
 
-    # 返回替换后的value值。
-    return value
+    # 较短的 value 编译后的模板会被缓存，只在第一次使用时扫描字符串，之后直接按 token 列表一次性拼接。
+    return compile_template(value).render(json_handler=_json_replace)
 
 
-# 定义了一个名为 cache_regular 的函数，用于通过正则表达式的方式读取缓存中的内容，参数为 value。
-def cache_regular(value):
+# 定义了一个名为 _cache_replace 的函数，用于处理模板中的 $cache{} 占位符，返回替换后的内容。
+def _cache_replace(token):
     from utils.cache_process.cache_control import CacheHandler
 
+    # 读取缓存数据或替换字符串过程中出现异常，则跳过并不处理，原样输出。
+    try:
+        cache_data = CacheHandler.get_cache(token.name)
+    except Exception:
+        return token.original()
+    # 如果缓存数据指定了数据类型，如 '$cache{int:user_id}'，则连同两侧的引号一起替换，替换后为对应的数据类型。
+    if token.value_type is not None:
+        if token.quoted:
+            return str(cache_data)
+        return token.original()
+    # 如果缓存数据没有指定数据类型，则直接替换为字符串。
+    return token.prefix + str(cache_data) + token.suffix
+
+
+# 定义了一个名为 cache_regular 的函数，用于通过正则表达式的方式读取缓存中的内容，参数为 value，耗时计入 render 阶段。
+@phase_timer.timed("render")
+def cache_regular(value):
     """
     通过正则的方式，读取缓存中的内容
     例：$cache{login_init}
     :param value:
     :return:
     """
-    # 正则表达式\$cache\{(.*?)\}用来匹配字符串中以$cache{}包含的内容，.*?表示匹配任意字符，()表示括号内的内容为需要匹配的内容。re.findall()方法返回一个列表，包含所有匹配的结果。
-    # 正则获取 $cache{login_init}中的值 --> login_init
-    regular_dates = re.findall(r"\$cache\{(.*?)\}", value)
-
-    # for循环遍历regular_dates列表中的所有元素，即匹配到的所有缓存数据。
-    for regular_data in regular_dates:
-        # 定义了一个缓存数据类型的列表
-        value_types = ['int:', 'bool:', 'list:', 'dict:', 'tuple:', 'float:']
-        # 如果缓存数据的类型在value_types列表中，则将缓存数据类型和缓存数据名称分别提取出来
-        if any(i in regular_data for i in value_types) is True:
-            value_types = regular_data.split(":")[0]
-            regular_data = regular_data.split(":")[1]
-            # 使用re.compile()方法创建一个正则表达式对象pattern，用来匹配需要替换的字符串。
-            pattern = re.compile(r'\'\$cache\{' + value_types.split(":")[0] + ":" + regular_data + r'\}\'')
-        # 如果缓存数据的类型不在value_types列表中，则直接使用re.compile()方法创建一个正则表达式对象pattern，用来匹配需要替换的字符串。
-        else:
-            pattern = re.compile(
-                r'\$cache\{' + regular_data.replace('$', "\$").replace('[', '\[') + r'\}'
-            )
-        try:
-            # 使用CacheHandler.get_cache()方法读取缓存数据
-            cache_data = CacheHandler.get_cache(regular_data)
-            # 使用re.sub()方法将匹配到的字符串替换为缓存数据
-            value = re.sub(pattern, str(cache_data), value)
-        # 如果读取缓存数据或替换字符串过程中出现异常，则跳过并不处理。
-        except Exception:
-            pass
-    # 将处理好的字符串作为函数的返回值。
-    return value
+    # 较短的 value 编译后的模板会被缓存，所有 $cache{} 占位符在一次遍历中完成替换，不需要每个占位符重新扫描整个字符串。
+    return compile_template(value).render(cache_handler=_cache_replace)
+
+
+# 定义了一个名为 _function_replace 的函数，用于处理模板中的 ${{}} 占位符，返回替换后的内容。
+def _function_replace(token):
+    # 从占位符中获取函数名和参数列表，语法不正确时会抛出 IndexError。
+    func_name, args = token.function
+    # 从全局唯一的 Context 实例中获取函数名为 func_name 的函数（优先查找注册的自定义函数），并执行该函数，获取返回值。
+    value_data = Context.instance().get_function(func_name)(*args)
+    # 如果占位符指定了数据类型，如 '${{int:random_int()}}'，则连同两侧的引号一起替换，替换后为对应的数据类型。
+    if token.value_type is not None and token.quoted:
+        return str(value_data)
+    return token.prefix + str(value_data) + token.suffix
 
 
 # 定义了一个名为 regular 的函数，该函数接受一个参数 target。
@@ -158,51 +242,8 @@ def regular(target):
     :return:
     """
     try:
-        # 定义了一个正则表达式，用于匹配字符串中的 "${{}}" 格式的内容。
-        regular_pattern = r'\${{(.*?)}}'
-        # 使用 while 循环，当字符串中还存在 "${{}}" 格式的内容时，继续循环。
-        while re.findall(regular_pattern, target):
-            # 使用 re.search() 函数在字符串中找到第一个匹配的 "${{}}" 格式的内容，并获取其中的关键字。
-            key = re.search(regular_pattern, target).group(1)
-            # 定义了一个列表，包含了可能出现的数据类型。
-            value_types = ['int:', 'bool:', 'list:', 'dict:', 'tuple:', 'float:']
-            # 如果关键字中包含了可能出现的数据类型，则执行下面的代码。
-            if any(i in key for i in value_types) is True:
-                # 从关键字中获取函数名。
-                func_name = key.split(":")[1].split("(")[0]
-                # 从关键字中获取参数列表字符串，并去除字符串末尾的 ")"。
-                value_name = key.split(":")[1].split("(")[1][:-1]
-                # 如果参数列表字符串为空，则执行下面的代码。
-                if value_name == "":
-                    # 从 Context 类中获取函数名为 func_name 的函数，并执行该函数，获取返回值。
-                    value_data = getattr(Context(), func_name)()
-                # 如果参数列表字符串不为空，则执行下面的代码。
-                else:
-                    # 从 Context 类中获取函数名为 func_name 的函数，并将参数列表字符串转换为参数列表，执行该函数，获取返回值。
-                    value_data = getattr(Context(), func_name)(*value_name.split(","))
-                # 定义正则表达式模式，用于匹配字符串中的 "'${{}}'" 格式的内容。
-                regular_int_pattern = r'\'\${{(.*?)}}\''
-                # 将字符串中第一个匹配的 "'${{}}'" 格式的内容替换为 value_data。
-                target = re.sub(regular_int_pattern, str(value_data), target, 1)
-            # 如果关键字中不包含可能出现的数据类型，则执行下面的代码。
-            else:
-                # 从关键字中获取函数名。
-                func_name = key.split("(")[0]
-                # 从关键字中获取参数列表字符串，并去除字符串末尾的 ")"。
-                value_name = key.split("(")[1][:-1]
-                # 如果参数列表字符串为空，则执行下面的代码。
-                if value_name == "":
-                    # 从 Context 类中获取函数名为 func_name 的函数，并执行该函数，获取返回值。
-                    value_data = getattr(Context(), func_name)()
-
-                # 如果参数列表字符串不为空，则执行下面的代码。
-                else:
-                    # 从 Context 类中获取函数名为 func_name 的函数，并将参数列表字符串转换为参数列表，执行该函数，获取返回值。
-                    value_data = getattr(Context(), func_name)(*value_name.split(","))
-                # 将字符串中第一个匹配的 "${{}}" 格式的内容替换为 value_data。
-                target = re.sub(regular_pattern, str(value_data), target, 1)
-        # 返回处理后的字符串。
-        return target
+        # 较短的 target 编译后的模板会被缓存，所有 ${{}} 占位符在一次遍历中完成替换。
+        return compile_template(target).render(func_handler=_function_replace)
 
     # 捕获 AttributeError 异常。
     except AttributeError:
@@ -216,3 +257,92 @@ def regular(target):
         ERROR.logger.error("yaml中的 ${{}} 函数方法不正确，正确语法实例：${{get_time()}}")
         # 抛出异常。
         raise
+
+
+# 定义了一个名为 _typed_value 的函数，用于将指定了数据类型的占位符的值，转换成对应的数据类型。
+def _typed_value(value):
+    # 字符串类型的值，兼容原 ast.literal_eval 的处理方式，如 "123" 转换为 123，无法转换时保留字符串。
+    if isinstance(value, str):
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+    # 其他类型的值直接深拷贝一份，避免后续修改请求数据时，修改到缓存中的原始数据。
+    return copy.deepcopy(value)
+
+
+# 定义了一个名为 _resolve_str 的函数，用于处理单个字符串中的占位符。
+def _resolve_str(value, func_switch, cache_switch):
+    template = compile_template(value)
+    # 字符串中没有需要处理的占位符，直接返回，不需要额外的拼接操作。
+    if not (func_switch and 'func' in template.kinds) and not (cache_switch and 'cache' in template.kinds):
+        return value
+    tokens = template.tokens
+    # 整个字符串只有一个指定了数据类型的占位符时，如 "$cache{int:user_id}"，直接替换为对应数据类型的值。
+    if len(tokens) == 1 and isinstance(tokens[0], Placeholder) and tokens[0].value_type is not None:
+        token = tokens[0]
+        if token.kind == 'func' and func_switch:
+            func_name, args = token.function
+            return _typed_value(Context.instance().get_function(func_name)(*args))
+        if token.kind == 'cache' and cache_switch:
+            from utils.cache_process.cache_control import CacheHandler
+            try:
+                return _typed_value(CacheHandler.get_cache(token.name))
+            except Exception:
+                return value
+    # 其余情况和字符串替换的处理方式保持一致。
+    return template.render(
+        func_handler=_function_replace if func_switch else None,
+        cache_handler=_cache_replace if cache_switch else None
+    )
+
+
+# 定义了一个名为 resolve_data 的函数，用于按数据结构替换占位符。
+def resolve_data(data, func_switch=False, cache_switch=True):
+    """
+    遍历 dict、list，只替换叶子节点字符串中的占位符，保留其他数据的原有类型
+    不需要先 str() 再 ast.literal_eval()，请求体较大时可以节省大量的序列化、反序列化时间
+    :param data: 需要替换的数据
+    :param func_switch: 是否替换 ${{}} 函数占位符
+    :param cache_switch: 是否替换 $cache{} 缓存占位符
+    :return:
+    """
+    try:
+        if isinstance(data, str):
+            return _resolve_str(data, func_switch, cache_switch)
+        if isinstance(data, dict):
+            return {
+                resolve_data(key, func_switch, cache_switch): resolve_data(value, func_switch, cache_switch)
+                for key, value in data.items()
+            }
+        if isinstance(data, list):
+            return [resolve_data(i, func_switch, cache_switch) for i in data]
+        if isinstance(data, tuple):
+            return tuple(resolve_data(i, func_switch, cache_switch) for i in data)
+        return data
+    # 与 regular 函数保持一致，记录错误日志后抛出异常。
+    except AttributeError:
+        ERROR.logger.error("未找到对应的替换的数据, 请检查数据是否正确 %s", data)
+        raise
+    except IndexError:
+        ERROR.logger.error("yaml中的 ${{}} 函数方法不正确，正确语法实例：${{get_time()}}")
+        raise
+
+
+# 定义了一个名为 literal_resolve 的函数，用于替换原有的 ast.literal_eval(cache_regular(str(data))) 写法，耗时计入 render 阶段。
+@phase_timer.timed("render")
+def literal_resolve(data, func_switch=False, cache_switch=True):
+    """
+    按数据结构替换占位符，替换后的结果为字符串时，兼容原 ast.literal_eval 的处理方式，如 "True" 转换为 True
+    :param data: 需要替换的数据
+    :param func_switch: 是否替换 ${{}} 函数占位符
+    :param cache_switch: 是否替换 $cache{} 缓存占位符
+    :return:
+    """
+    _data = resolve_data(data, func_switch, cache_switch)
+    if isinstance(_data, str):
+        try:
+            return ast.literal_eval(_data)
+        except (ValueError, SyntaxError):
+            return _data
+    return _data
@@ -0,0 +1,132 @@
+"""
+# @describe: 用例模板编译，将 ${{}}、$cache{}、$json()$ 占位符一次性解析成 token 列表，较短的源字符串按 LRU 缓存
+"""
+import re
+from functools import lru_cache
+from typing import Callable, List, Text, Tuple, Union
+
+# 支持指定数据类型的占位符前缀，如 ${{int:random_int()}}、$cache{int:user_id}
+VALUE_TYPES = ('int:', 'bool:', 'list:', 'dict:', 'tuple:', 'float:')
+
+_TOKEN_PATTERN = re.compile(
+    r"(?P<prefix>')?"
+    r"(?:\$\{\{(?P<func>.*?)\}\}|\$cache\{(?P<cache>.*?)\}|\$json\((?P<json>.*?)\)\$)"
+    r"(?P<suffix>')?"
+)
+
+
+class Placeholder:
+    """ 占位符 token """
+
+    __slots__ = ('kind', 'raw', 'body', 'value_type', 'prefix', 'suffix')
+
+    def __init__(self, kind: Text, raw: Text, body: Text, prefix: Text, suffix: Text):
+        """
+        :param kind: 占位符类型 func / cache / json
+        :param raw: 占位符原始内容，不包含两侧引号
+        :param body: 占位符括号中的内容
+        :param prefix: 占位符前面紧挨着的引号
+        :param suffix: 占位符后面紧挨着的引号
+        """
+        self.kind = kind
+        self.raw = raw
+        self.body = body
+        self.prefix = prefix
+        self.suffix = suffix
+        self.value_type = body.split(":")[0] if any(i in body for i in VALUE_TYPES) else None
+
+    @property
+    def quoted(self) -> bool:
+        """ 占位符两侧是否有引号，即在 str(dict) 中是一个独立的字符串 """
+        return bool(self.prefix and self.suffix)
+
+    @property
+    def name(self) -> Text:
+        """ 去掉数据类型后的内容，如 int:user_id -> user_id """
+        if self.value_type is None:
+            return self.body
+        return self.body.split(":", 1)[1]
+
+    @property
+    def function(self) -> Tuple[Text, List[Text]]:
+        """
+        解析函数名称和参数，如 get_time(1,2) -> ('get_time', ['1', '2'])
+        语法不正确时抛出 IndexError
+        """
+        _name = self.name
+        func_name = _name.split("(")[0]
+        value_name = _name.split("(")[1][:-1]
+        if value_name == "":
+            return func_name, []
+        return func_name, value_name.split(",")
+
+    def original(self) -> Text:
+        """ 不做替换时，原样输出 """
+        return self.prefix + self.raw + self.suffix
+
+
+class Template:
+    """ 编译后的模板，只在编译时扫描一次源字符串，渲染时线性拼接 """
+
+    def __init__(self, source: Text):
+        self.source = source
+        self.tokens: List[Union[Text, Placeholder]] = []
+        self.kinds = set()
+        _position = 0
+        for match in _TOKEN_PATTERN.finditer(source):
+            if match.start() > _position:
+                self.tokens.append(source[_position:match.start()])
+            kind = 'func' if match.group('func') is not None else \
+                'cache' if match.group('cache') is not None else 'json'
+            prefix, suffix = match.group('prefix') or "", match.group('suffix') or ""
+            raw = source[match.start() + len(prefix):match.end() - len(suffix)]
+            self.tokens.append(Placeholder(kind, raw, match.group(kind), prefix, suffix))
+            self.kinds.add(kind)
+            _position = match.end()
+        if _position < len(source):
+            self.tokens.append(source[_position:])
+
+    @property
+    def placeholders(self) -> List[Placeholder]:
+        """ 模板中的所有占位符 """
+        return [i for i in self.tokens if isinstance(i, Placeholder)]
+
+    def render(
+            self,
+            func_handler: Callable[[Placeholder], Text] = None,
+            cache_handler: Callable[[Placeholder], Text] = None,
+            json_handler: Callable[[Placeholder], Text] = None) -> Text:
+        """
+        渲染模板，未传入处理方法的占位符类型原样输出
+        :param func_handler: ${{}} 处理方法，返回替换后的内容
+        :param cache_handler: $cache{} 处理方法，返回替换后的内容
+        :param json_handler: $json()$ 处理方法，返回替换后的内容
+        :return:
+        """
+        handlers = {'func': func_handler, 'cache': cache_handler, 'json': json_handler}
+        if not any(handlers[i] is not None for i in self.kinds):
+            return self.source
+        parts = []
+        for token in self.tokens:
+            if isinstance(token, str):
+                parts.append(token)
+                continue
+            handler = handlers[token.kind]
+            parts.append(token.original() if handler is None else handler(token))
+        return "".join(parts)
+
+
+# 只缓存长度不超过该值的源字符串，完整的请求内容、响应内容等较长的字符串每次重新解析，不在进程中长期占用内存
+MAX_CACHED_LENGTH = 4096
+
+
+@lru_cache(maxsize=256)
+def _compile_cached(source: Text) -> Template:
+    return Template(source)
+
+
+def compile_template(source: Text) -> Template:
+    """ 编译模板，较短的源字符串(如单个占位符、sql、url)按 LRU 缓存，相同的字符串只解析一次 """
+    if len(source) > MAX_CACHED_LENGTH:
+        return Template(source)
+    return _compile_cached(source)
@@ -65,4 +65,5 @@ class Test{class_title}:
                sql_data=res.sql_data,
                request_data=res.body,
                response_data=res.response_data,
-               status_code=res.status_code).assert_type_handle()
\ No newline at end of file
+               status_code=res.status_code,
+               response=res).assert_type_handle()
\ No newline at end of file
@@ -1,7 +1,9 @@
 import os
-import ast
 import yaml.scanner
-from utils.other_tools.read_files_tools.regular_control import regular
+from utils.other_tools.read_files_tools.regular_control import resolve_data
+
+# 安装了 libyaml 时使用 C 实现的加载器，解析速度比纯 Python 实现快很多，未安装时使用 FullLoader
+YamlLoader = getattr(yaml, 'CFullLoader', yaml.FullLoader)
 
 
 class GetYamlData:
@@ -18,8 +20,8 @@ class GetYamlData:
         """
         # 判断文件是否存在
         if os.path.exists(self.file_dir):
-            data = open(self.file_dir, 'r', encoding='utf-8')
-            res = yaml.load(data, Loader=yaml.FullLoader)
+            with open(self.file_dir, 'r', encoding='utf-8') as data:
+                res = yaml.load(data, Loader=YamlLoader)
         else:
             raise FileNotFoundError("文件路径不存在")
         return res
@@ -75,5 +77,4 @@ class GetCaseData(GetYamlData):
 
         _yaml_data = self.get_yaml_data()
         # 正则处理yaml文件中的数据
-        re_data = regular(str(_yaml_data))
-        return ast.literal_eval(re_data)
\ No newline at end of file
+        return resolve_data(_yaml_data, func_switch=True, cache_switch=False)
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+# @describe: 基于 asyncio 的用例并发执行引擎
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Union
+from utils.other_tools.requests_tool.request_control import RequestControl
+from utils.other_tools.requests_tool.teardown_control import TearDownHandler
+from utils.assertion.assert_control import Assert
+from utils.logging_tool.log_control import ERROR
+from utils.logging_tool.phase_timer import phase_timer
+from utils.other_tools.allure_data.allure_tools import allure_step_no
+from utils.other_tools.models import ResponseData
+
+
+class AsyncRequestControl:
+    """
+    使用事件循环并发执行多条用例，最大并发数即线程池的线程数
+    每条用例仍然走 RequestControl 的完整流程，因此 ResponseData、断言与同步执行保持一致
+    请求统一通过连接池发送，并发数建议不要超过 http_pool.pool_maxsize
+
+    注意: allure 只会把当前测试线程中产生的步骤、附件记录到正在执行的用例下，线程池中产生的步骤、附件不保证出现在报告中，
+    因此所有用例执行完成后，会在调用 run 的线程中为每条用例补充一个结果步骤(请求地址、状态码、响应耗时或失败原因)
+    """
+
+    def __init__(
+            self,
+            yaml_cases: List[Dict],
+            concurrency: int = 10,
+            assert_switch: bool = True,
+            teardown_switch: bool = True):
+        """
+        :param yaml_cases: 用例数据，与 RequestControl 入参一致
+        :param concurrency: 最大并发数
+        :param assert_switch: 是否执行断言
+        :param teardown_switch: 是否执行后置处理
+        """
+        self.yaml_cases = yaml_cases
+        self.concurrency = max(concurrency, 1)
+        self.assert_switch = assert_switch
+        self.teardown_switch = teardown_switch
+
+    def http_request(self, yaml_case: Dict) -> Union[ResponseData, None]:
+        """ 同步执行单条用例: 请求 -> 后置处理 -> 断言 """
+        res = RequestControl(yaml_case).http_request()
+        # is_run 为 False 的用例不会发送请求
+        if res is None:
+            return None
+        if self.teardown_switch:
+            TearDownHandler(res).teardown_handle()
+        if self.assert_switch:
+            Assert(assert_data=yaml_case['assert_data'],
+                   sql_data=res.sql_data,
+                   request_data=res.body,
+                   response_data=res.response_data,
+                   status_code=res.status_code,
+                   response=res).assert_type_handle()
+        return res
+
+    async def run_cases(self) -> List:
+        """
+        并发执行所有用例，返回结果顺序与 yaml_cases 一致
+        执行失败的用例，返回对应的异常对象
+        """
+        loop = asyncio.get_running_loop()
+        # 线程池中的耗时记录到调用 run 的用例下
+        _http_request = phase_timer.bound(self.http_request)
+        # 线程池的线程数就是最大并发数，超出的用例在线程池队列中等待
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="async-case") as executor:
+            tasks = [
+                loop.run_in_executor(executor, _http_request, yaml_case)
+                for yaml_case in self.yaml_cases
+            ]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        for yaml_case, result in zip(self.yaml_cases, results):
+            if isinstance(result, BaseException):
+                ERROR.logger.error(
+                    "用例执行失败: %s, 失败原因: %r", yaml_case.get('detail'), result
+                )
+        self.allure_results(results)
+        return results
+
+    def allure_results(self, results: List) -> None:
+        """ 在当前测试线程中记录每条用例的执行结果，弥补线程池中丢失的 allure 步骤 """
+        for yaml_case, result in zip(self.yaml_cases, results):
+            if isinstance(result, BaseException):
+                allure_step_no(f"{yaml_case.get('detail')}: 执行失败, 失败原因: {result!r}")
+            elif result is None:
+                allure_step_no(f"{yaml_case.get('detail')}: 未执行")
+            else:
+                allure_step_no(
+                    f"{yaml_case.get('detail')}: {result.method} {result.url}, "
+                    f"状态码: {result.status_code}, 响应耗时(ms): {result.res_time}"
+                )
+
+    def run(self) -> List:
+        """ 同步入口，启动事件循环执行所有用例 """
+        return asyncio.run(self.run_cases())
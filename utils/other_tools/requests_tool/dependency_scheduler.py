@@ -0,0 +1,231 @@
+"""
+# @describe: 用例依赖关系 DAG，负责循环依赖检测、拓扑排序以及依赖分支并发执行
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, List, Set, Text
+from utils.cache_process.cache_control import CacheHandler, _cache_config
+from utils.other_tools.exceptions import DependencyCycleError, ValueNotFoundError
+from utils.logging_tool.log_control import ERROR
+from utils.logging_tool.phase_timer import phase_timer
+
+
+class CaseDependencyGraph:
+    """
+    用例依赖关系图，边的方向为: 用例 -> 它需要先执行的用例
+    hard 依赖: dependence_case_data、teardown 中引用的用例，存在循环时直接报错
+    soft 依赖: $cache{} 引用了其他用例通过 current_request_set_cache / set_cache 写入的缓存，只用于排序
+    """
+
+    cache_pattern = re.compile(r"\$cache\{(.*?)\}")
+
+    def __init__(self, cases: Dict[Text, Dict]):
+        self.cases = cases
+        self.hard: Dict[Text, List[Text]] = {}
+        self.soft: Dict[Text, List[Text]] = {}
+        self._build()
+
+    @classmethod
+    def is_case(cls, value: Any) -> bool:
+        """ 用例池和缓存共用 _cache_config，通过必填字段区分用例数据 """
+        return isinstance(value, dict) and {'url', 'method', 'requestType'} <= value.keys()
+
+    @classmethod
+    def from_cache_pool(cls, case_ids: Iterable[Text] = None) -> "CaseDependencyGraph":
+        """
+        读取用例池中的所有用例，生成依赖关系图
+        :param case_ids: 懒加载用例池时，先加载这些用例以及它们直接或间接引用的用例
+        """
+        if case_ids is not None:
+            cls.load_references(case_ids)
+        cases = {k: v for k, v in list(_cache_config.items()) if cls.is_case(v)}
+        return cls(cases)
+
+    @classmethod
+    def load_references(cls, case_ids: Iterable[Text]) -> None:
+        """ 加载 case_ids 以及它们通过 dependence_case_data、teardown 直接或间接引用的用例 """
+        stack = [i for i in case_ids if i is not None]
+        loaded = set()
+        while stack:
+            case_id = stack.pop()
+            if case_id in loaded:
+                continue
+            loaded.add(case_id)
+            try:
+                case = CacheHandler.get_cache(case_id)
+            except ValueNotFoundError:
+                continue
+            if cls.is_case(case):
+                stack.extend(cls.hard_dependencies(case))
+
+    @classmethod
+    def dependence_case_ids(cls, case: Dict) -> List[Text]:
+        """ 获取用例中 dependence_case_data 引用的用例 ID """
+        _case_ids = []
+        _dependence_case_data = case.get('dependence_case_data')
+        if case.get('dependence_case') is True and isinstance(_dependence_case_data, list):
+            for i in _dependence_case_data:
+                # case_id 为 self 时，依赖的是当前用例的 setup_sql
+                if i.get('case_id') not in (None, 'self'):
+                    _case_ids.append(i['case_id'])
+        return _case_ids
+
+    @classmethod
+    def hard_dependencies(cls, case: Dict) -> List[Text]:
+        """ 获取用例中 dependence_case_data、teardown 引用的用例 ID """
+        _case_ids = cls.dependence_case_ids(case)
+        for i in case.get('teardown') or []:
+            if i.get('case_id') is not None:
+                _case_ids.append(i['case_id'])
+        return _case_ids
+
+    @classmethod
+    def cache_names(cls, case: Dict) -> Set[Text]:
+        """ 获取用例执行后会写入缓存的名称 """
+        _names = set()
+        for i in case.get('current_request_set_cache') or []:
+            _names.add(i['name'])
+        _dependence_case_data = case.get('dependence_case_data')
+        if isinstance(_dependence_case_data, list):
+            for i in _dependence_case_data:
+                for j in i.get('dependent_data') or []:
+                    if j.get('set_cache'):
+                        _names.add(j['set_cache'])
+        return _names
+
+    def _build(self) -> None:
+        """ 生成 hard、soft 两类依赖 """
+        producers = {}
+        for case_id, case in self.cases.items():
+            for name in self.cache_names(case):
+                producers.setdefault(name, case_id)
+
+        for case_id, case in self.cases.items():
+            self.hard[case_id] = [i for i in self.hard_dependencies(case) if i != case_id]
+            _soft = []
+            for name in self.cache_pattern.findall(str(case)):
+                # 兼容 $cache{int:name} 这种带数据类型的写法
+                _producer = producers.get(name.split(":")[-1])
+                if _producer is not None and _producer != case_id and _producer not in _soft:
+                    _soft.append(_producer)
+            self.soft[case_id] = _soft
+
+    def dependencies(self, case_id: Text) -> List[Text]:
+        """ 获取用例的所有直接依赖 """
+        return self.hard.get(case_id, []) + [
+            i for i in self.soft.get(case_id, []) if i not in self.hard.get(case_id, [])
+        ]
+
+    def check_cycle(self) -> None:
+        """ 检测 hard 依赖中是否存在循环引用，存在则抛出异常，并展示循环路径 """
+        visiting, visited = set(), set()
+
+        def _visit(case_id: Text, path: List[Text]) -> None:
+            if case_id in visited:
+                return
+            if case_id in visiting:
+                cycle = path[path.index(case_id):]
+                raise DependencyCycleError(f"用例依赖存在循环引用: {' -> '.join(cycle)}")
+            visiting.add(case_id)
+            for i in self.hard.get(case_id, []):
+                _visit(i, path + [i])
+            visiting.discard(case_id)
+            visited.add(case_id)
+
+        for _case_id in self.cases:
+            _visit(_case_id, [_case_id])
+
+    def dependence_closure(self, case_ids: Iterable[Text]) -> Set[Text]:
+        """ 获取 case_ids 通过 dependence_case_data 直接或间接依赖的所有用例，不包含 case_ids 本身 """
+        result = set()
+        stack = [j for i in case_ids if i in self.cases for j in self.dependence_case_ids(self.cases[i])]
+        while stack:
+            case_id = stack.pop()
+            if case_id in result or case_id not in self.cases:
+                continue
+            result.add(case_id)
+            stack.extend(self.dependence_case_ids(self.cases[case_id]))
+        return result
+
+    def topological_order(self, case_ids: Iterable[Text] = None) -> List[Text]:
+        """
+        拓扑排序，按原有顺序依次处理用例，每个用例尚未排入的依赖插入到该用例之前
+        原有顺序已经满足依赖关系时顺序不变，只有被依赖的用例会被提前
+        soft 依赖形成循环时，按原有顺序解除，不会报错
+        """
+        _nodes = list(self.cases) if case_ids is None else list(case_ids)
+        _node_set = set(_nodes)
+        order = []
+        visiting, done = set(), set()
+
+        def _visit(case_id: Text) -> None:
+            if case_id in done or case_id in visiting:
+                return
+            visiting.add(case_id)
+            for i in self.dependencies(case_id):
+                if i in _node_set:
+                    _visit(i)
+            visiting.discard(case_id)
+            done.add(case_id)
+            order.append(case_id)
+
+        for _case_id in _nodes:
+            _visit(_case_id)
+        return order
+
+
+class DependencyScheduler:
+    """ 按依赖关系调度执行用例，依赖已完成的分支并发执行 """
+
+    def __init__(self, graph: CaseDependencyGraph, max_workers: int = 4):
+        self.graph = graph
+        self.max_workers = max(max_workers, 1)
+
+    def run(self, func: Callable[[Text], Any], case_ids: Iterable[Text]) -> Dict[Text, Any]:
+        """
+        执行 case_ids 中的所有用例，用例之间存在依赖时，被依赖的用例先执行，其余用例并发执行
+        :param func: 执行单条用例的方法，入参为 case_id
+        :param case_ids: 需要执行的用例 ID
+        :return: {case_id: 执行结果或异常}
+        """
+        _case_ids = set(case_ids)
+        _nodes = self.graph.topological_order(i for i in self.graph.cases if i in _case_ids)
+        _node_set = set(_nodes)
+        pending = {i: {j for j in self.graph.dependencies(i) if j in _node_set} for i in _nodes}
+        results: Dict[Text, Any] = {}
+        running = {}
+        # 线程池中的耗时记录到调用 run 的用例下
+        _func = phase_timer.bound(func)
+
+        def _submit_ready(executor: ThreadPoolExecutor) -> None:
+            progress = True
+            while progress:
+                progress = False
+                for case_id in [i for i in _nodes if i in pending and not pending[i] - results.keys()]:
+                    _failed = [i for i in pending.pop(case_id) if isinstance(results[i], BaseException)]
+                    if _failed:
+                        # 依赖的用例执行失败，当前用例直接跳过，继续检查后续用例
+                        results[case_id] = RuntimeError(f"依赖用例执行失败，已跳过: {_failed}")
+                        progress = True
+                        continue
+                    running[executor.submit(_func, case_id)] = case_id
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            _submit_ready(executor)
+            while running or pending:
+                if not running:
+                    # 剩余的用例之间只存在 soft 依赖循环，按顺序解除一个
+                    _case_id = next(i for i in _nodes if i in pending)
+                    pending[_case_id] = set()
+                    _submit_ready(executor)
+                    continue
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    case_id = running.pop(future)
+                    try:
+                        results[case_id] = future.result()
+                    except Exception as exc:
+                        ERROR.logger.error("用例 %s 执行失败，失败原因: %r", case_id, exc)
+                        results[case_id] = exc
+                _submit_ready(executor)
+        return results
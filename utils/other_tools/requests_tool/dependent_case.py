@@ -1,16 +1,16 @@
-import ast
-import json
 from typing import Text, Dict, Union, List
-from jsonpath import jsonpath
-from utils.requests_tool.request_control import RequestControl
+from utils.other_tools.jsonpath_cache import jsonpath
+from utils.other_tools.requests_tool.request_control import RequestControl
 from utils.mysql_tool.mysql_control import SetUpMySQL
-from utils.other_tools.read_files_tools.regular_control import regular, cache_regular
+from utils.other_tools.read_files_tools.regular_control import cache_regular, literal_resolve
 from utils.other_tools.jsonpath_date_replace import jsonpath_replace
 from utils.logging_tool.log_control import WARNING
+from utils.logging_tool.phase_timer import phase_timer
 from utils.other_tools.models import DependentType
-from utils.other_tools.models import TestCase, DependentCaseData, DependentData
+from utils.other_tools.models import TestCase, DependentCaseData, DependentData, ResponseData
 from utils.other_tools.exceptions import ValueNotFoundError
 from utils.cache_process.cache_control import CacheHandler
+from utils.cache_process.dependent_cache import dependent_cache
 from utils import config
 
 
@@ -51,6 +51,25 @@ class DependentCase:
             )
         return _jsonpath_data
 
+    @classmethod
+    def dependent_request(cls, case_id: Text) -> "ResponseData":
+        """
+        执行依赖用例，相同 case_id 且请求内容未变化时，直接复用缓存中的执行结果
+        :param case_id: 依赖用例 ID
+        :return:
+        """
+        _case_data = cls.get_cache(case_id)
+
+        def _request():
+            re_data = literal_resolve(_case_data, func_switch=True)
+            return RequestControl(re_data).http_request()
+
+        return dependent_cache.get_or_execute(
+            case_id=case_id,
+            case_data=cache_regular(str(_case_data)),
+            func=_request
+        )
+
     @classmethod
     def set_cache_value(cls, dependent_data: "DependentData") -> Union[Text, None]:
         """
@@ -107,7 +126,7 @@ class DependentCase:
         # 判断依赖数据类型，依赖 sql中的数据
         if setup_sql is not None:
             if config.mysql_db.switch:
-                setup_sql = ast.literal_eval(cache_regular(str(setup_sql)))
+                setup_sql = literal_resolve(setup_sql)
                 sql_data = SetUpMySQL().setup_sql_data(sql=setup_sql)
                 dependent_data = dependence_case_data.dependent_data
                 for i in dependent_data:
@@ -179,9 +198,7 @@ class DependentCase:
                             dependence_case_data=dependence_case_data,
                             jsonpath_dates=jsonpath_dates)
                     else:
-                        re_data = regular(str(self.get_cache(_case_id)))
-                        re_data = ast.literal_eval(cache_regular(str(re_data)))
-                        res = RequestControl(re_data).http_request()
+                        res = self.dependent_request(_case_id)
                         if dependence_case_data.dependent_data is not None:
                             dependent_data = dependence_case_data.dependent_data
                             for i in dependent_data:
@@ -194,7 +211,7 @@ class DependentCase:
                                 # 判断依赖数据类型, 依赖 response 中的数据
                                 if i.dependent_type == DependentType.RESPONSE.value:
                                     self.dependent_handler(
-                                        data=json.loads(res.response_data),
+                                        data=res.response_json,
                                         _jsonpath=_jsonpath,
                                         set_value=_set_value,
                                         replace_key=_replace_key,
@@ -233,6 +250,7 @@ class DependentCase:
         else:
             return False
 
+    @phase_timer.timed("dependency")
     def get_dependent_data(self) -> None:
         """
         jsonpath 和 依赖的数据,进行替换
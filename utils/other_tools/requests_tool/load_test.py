@@ -0,0 +1,232 @@
+"""
+# @describe: 压测模式，复用 yaml 中的用例，按虚拟用户数、加压时间并发执行，统计吞吐量、错误率和响应耗时分位数
+# 运行方式: python -m utils.other_tools.requests_tool.load_test --case-ids login_01 get_user_info_01 --users 20 --ramp-up 10 --duration 60
+"""
+import argparse
+import copy
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Text, Union
+from utils.other_tools.requests_tool.request_control import RequestControl
+from utils.other_tools.requests_tool.teardown_control import TearDownHandler
+from utils.other_tools.requests_tool.teardown_queue import teardown_queue
+from utils.other_tools.read_files_tools.regular_control import literal_resolve
+from utils.assertion.assert_control import Assert
+from utils.cache_process.cache_control import CacheHandler
+from utils.logging_tool.log_control import INFO
+from utils.logging_tool.phase_timer import phase_timer
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    计算分位数，values 需要已经按从小到大排序，相邻两个值之间线性插值
+    :param values: 已排序的数据
+    :param percent: 百分位，如 99 表示 p99
+    :return:
+    """
+    if not values:
+        return 0.0
+    _index = (len(values) - 1) * percent / 100
+    _lower = int(_index)
+    _upper = min(_lower + 1, len(values) - 1)
+    return values[_lower] + (values[_upper] - values[_lower]) * (_index - _lower)
+
+
+class CaseStats:
+    """ 单个用例的压测结果 """
+
+    def __init__(self):
+        self.elapsed: List[float] = []
+        self.errors = 0
+        # 只保留前几条错误信息，避免大量相同的错误占用内存
+        self.error_samples: List[Text] = []
+
+    def add(self, elapsed: float, error: Union[BaseException, None] = None) -> None:
+        self.elapsed.append(elapsed)
+        if error is not None:
+            self.errors += 1
+            if len(self.error_samples) < 5:
+                self.error_samples.append(repr(error))
+
+    def summary(self, duration: float) -> Dict:
+        """ 汇总吞吐量、错误率和响应耗时分位数，耗时单位为毫秒 """
+        _elapsed = sorted(self.elapsed)
+        _count = len(_elapsed)
+        return {
+            "requests": _count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / _count, 4) if _count else 0.0,
+            "throughput": round(_count / duration, 2) if duration else 0.0,
+            "min": round(_elapsed[0], 2) if _elapsed else 0.0,
+            "avg": round(sum(_elapsed) / _count, 2) if _count else 0.0,
+            "p50": round(percentile(_elapsed, 50), 2),
+            "p90": round(percentile(_elapsed, 90), 2),
+            "p99": round(percentile(_elapsed, 99), 2),
+            "max": round(_elapsed[-1], 2) if _elapsed else 0.0,
+            "error_samples": self.error_samples
+        }
+
+
+class LoadTestRunner:
+    """
+    压测执行器，每个虚拟用户按 case_ids 的顺序循环执行用例
+    用例仍然走 RequestControl 的完整流程，依赖用例、缓存数据替换、断言与正常执行保持一致
+    """
+
+    def __init__(
+            self,
+            case_ids: List[Text],
+            users: int = 1,
+            ramp_up: float = 0,
+            duration: Union[float, None] = None,
+            iterations: Union[int, None] = None,
+            assert_switch: bool = True,
+            teardown_switch: bool = False):
+        """
+        :param case_ids: 参与压测的用例ID
+        :param users: 虚拟用户数
+        :param ramp_up: 加压时间，单位为秒，虚拟用户在该时间内均匀启动
+        :param duration: 压测时长，单位为秒，与 iterations 二选一
+        :param iterations: 每个虚拟用户执行的轮数，与 duration 二选一
+        :param assert_switch: 是否执行断言，断言失败计为错误
+        :param teardown_switch: 是否执行后置处理
+        """
+        if duration is None and iterations is None:
+            raise ValueError("压测时长 duration 和执行轮数 iterations 至少需要设置一个")
+        self.case_ids = case_ids
+        self.users = max(users, 1)
+        self.ramp_up = ramp_up
+        self.duration = duration
+        self.iterations = iterations
+        self.assert_switch = assert_switch
+        self.teardown_switch = teardown_switch
+        self._stats: Dict[Text, CaseStats] = {i: CaseStats() for i in case_ids}
+        self._lock = threading.Lock()
+        self._deadline: Union[float, None] = None
+
+    def run_case(self, case_id: Text) -> None:
+        """
+        执行单条用例，记录响应耗时以及是否执行失败
+        响应耗时使用接口本身的耗时(res_time)，不包含依赖用例、数据替换、断言和后置处理的耗时，请求未完成时使用已经执行的时长
+        """
+        # 每次执行都复制一份用例再替换 ${{}} 函数占位符，与依赖用例的处理方式一致，虚拟用户之间不共享修改后的用例
+        _case = literal_resolve(copy.deepcopy(CacheHandler.get_cache(case_id)), func_switch=True)
+        _error = None
+        _elapsed = None
+        _start = time.perf_counter()
+        try:
+            res = RequestControl(_case).http_request()
+            if res is not None:
+                _elapsed = res.res_time
+                if self.teardown_switch:
+                    TearDownHandler(res).teardown_handle()
+                if self.assert_switch:
+                    Assert(assert_data=_case['assert_data'],
+                           sql_data=res.sql_data,
+                           request_data=res.body,
+                           response_data=res.response_data,
+                           status_code=res.status_code,
+                           response=res).assert_type_handle()
+        except Exception as exc:
+            _error = exc
+        if _elapsed is None:
+            _elapsed = (time.perf_counter() - _start) * 1000
+        with self._lock:
+            self._stats[case_id].add(_elapsed, _error)
+
+    def _finished(self, iteration: int) -> bool:
+        if self.iterations is not None and iteration >= self.iterations:
+            return True
+        return self._deadline is not None and time.perf_counter() >= self._deadline
+
+    def _virtual_user(self, index: int, start: float) -> None:
+        """ 虚拟用户，按加压时间延迟启动后，循环执行所有用例 """
+        _delay = start + self.ramp_up * index / self.users - time.perf_counter()
+        if _delay > 0:
+            time.sleep(_delay)
+        iteration = 0
+        while not self._finished(iteration):
+            for case_id in self.case_ids:
+                if self._deadline is not None and time.perf_counter() >= self._deadline:
+                    return
+                self.run_case(case_id)
+            iteration += 1
+
+    def run(self) -> Dict:
+        """ 启动所有虚拟用户，等待压测结束后返回压测报告 """
+        _start = time.perf_counter()
+        if self.duration is not None:
+            self._deadline = _start + self.duration
+        # 虚拟用户线程中的耗时记录到调用 run 的用例下，不在 pytest 中执行时记录到 session 下
+        _virtual_user = phase_timer.bound(self._virtual_user)
+        threads = [
+            threading.Thread(target=_virtual_user, args=(i, _start), name=f"vu-{i}", daemon=True)
+            for i in range(self.users)
+        ]
+        for i in threads:
+            i.start()
+        for i in threads:
+            i.join()
+        _duration = time.perf_counter() - _start
+        # 开启延迟后置处理时，后置处理在后台队列中执行，压测结束后等待全部执行完成
+        if self.teardown_switch:
+            teardown_queue.drain()
+        return self.report(_duration)
+
+    def report(self, duration: float) -> Dict:
+        """ 生成压测报告，包含每个用例以及整体的统计数据 """
+        _total = CaseStats()
+        for i in self._stats.values():
+            _total.elapsed.extend(i.elapsed)
+            _total.errors += i.errors
+        return {
+            "users": self.users,
+            "ramp_up": self.ramp_up,
+            "duration": round(duration, 2),
+            "cases": {k: v.summary(duration) for k, v in self._stats.items()},
+            "total": _total.summary(duration)
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="压测模式，复用 yaml 中的用例")
+    parser.add_argument("--case-ids", nargs="+", required=True, help="参与压测的用例ID，每个虚拟用户按顺序循环执行")
+    parser.add_argument("--users", type=int, default=10, help="虚拟用户数")
+    parser.add_argument("--ramp-up", type=float, default=0, help="加压时间，单位为秒")
+    _group = parser.add_mutually_exclusive_group(required=True)
+    _group.add_argument("--duration", type=float, help="压测时长，单位为秒")
+    _group.add_argument("--iterations", type=int, help="每个虚拟用户执行的轮数")
+    parser.add_argument("--no-assert", action="store_true", help="不执行断言")
+    parser.add_argument("--teardown", action="store_true", help="执行后置处理")
+    parser.add_argument("--output", default=None, help="压测报告路径，默认为 report/load_test/load_test_时间.json")
+    args = parser.parse_args()
+
+    # 导入 test_case 时将所有用例写入用例池(开启懒加载时建立用例索引)
+    import test_case
+    from common.setting import ensure_path_sep
+
+    report = LoadTestRunner(
+        case_ids=args.case_ids,
+        users=args.users,
+        ramp_up=args.ramp_up,
+        duration=args.duration,
+        iterations=args.iterations,
+        assert_switch=not args.no_assert,
+        teardown_switch=args.teardown
+    ).run()
+    _output = args.output or ensure_path_sep(f"\\report\\load_test\\load_test_{time.strftime('%Y%m%d%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(_output)), exist_ok=True)
+    with open(_output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=4)
+
+    print(f"{'case_id':<30}{'请求数':>10}{'错误率':>10}{'吞吐量':>12}{'p50':>12}{'p90':>12}{'p99':>12}")
+    for case_id, i in list(report['cases'].items()) + [("total", report['total'])]:
+        print(f"{case_id:<30}{i['requests']:>10}{i['error_rate']:>10.2%}{i['throughput']:>12}"
+              f"{i['p50']:>12}{i['p90']:>12}{i['p99']:>12}")
+    INFO.logger.info("压测完成，压测报告: %s", _output)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,10 @@
-import ast
+import hashlib
+import json
 import os
 import random
 import time
 import urllib
+from contextlib import ExitStack
 from typing import Tuple, Dict, Union, Text
 import requests
 import urllib3
@@ -10,11 +12,15 @@ from requests_toolbelt import MultipartEncoder
 from common.setting import ensure_path_sep
 from utils.other_tools.models import RequestType
 from utils.logging_tool.log_decorator import log_decorator
+from utils.logging_tool.log_control import WARNING
 from utils.mysql_tool.mysql_control import AssertExecution
 from utils.logging_tool.run_time_decorator import execution_duration
-from utils.other_tools.allure_data.allure_tools import allure_step, allure_step_no, allure_attach
-from utils.other_tools.read_files_tools.regular_control import cache_regular
+from utils.logging_tool.phase_timer import phase_timer
+from utils.other_tools.allure_data.allure_tools import allure_step, allure_step_no
+from utils.other_tools.read_files_tools.regular_control import cache_regular, literal_resolve
 from utils.other_tools.requests_tool.set_current_request_cache import SetCurrentRequestCache
+from utils.other_tools.requests_tool.session_control import session_pool
+from utils.other_tools.requests_tool.upload_control import UploadFile
 from utils.other_tools.models import TestCase, ResponseData
 from utils import config
 
@@ -27,7 +33,12 @@ class RequestControl:
     """ 封装请求 """
 
     def __init__(self, yaml_case):
-        self.__yaml_case = TestCase(**yaml_case)
+        with phase_timer.phase("model"):
+            self.__yaml_case = TestCase(**yaml_case)
+        # 导出文件的下载结果，非导出类型的请求为 None
+        self._export_result: Union[Dict, None] = None
+        # 当前请求上传的文件
+        self._upload_files = []
 
     def file_data_exit(
             self,
@@ -36,7 +47,7 @@ class RequestControl:
         # 兼容又要上传文件，又要上传其他类型参数
         try:
             _data = self.__yaml_case.data
-            for key, value in ast.literal_eval(cache_regular(str(_data)))['data'].items():
+            for key, value in literal_resolve(_data)['data'].items():
                 if "multipart/form-data" in str(self.__yaml_case.headers.values()):
                     file_data[key] = str(value)
                 else:
@@ -63,7 +74,7 @@ class RequestControl:
         兼容用户未填写headers或者header值为int
         @return:
         """
-        headers = ast.literal_eval(cache_regular(str(headers)))
+        headers = literal_resolve(headers)
         if headers is None:
             headers = {"headers": None}
         else:
@@ -78,8 +89,8 @@ class RequestControl:
             request_data: Dict,
             header: Dict):
         """ 判断处理header为 Content-Type: multipart/form-data"""
-        header = ast.literal_eval(cache_regular(str(header)))
-        request_data = ast.literal_eval(cache_regular(str(request_data)))
+        header = literal_resolve(header)
+        request_data = literal_resolve(request_data)
 
         if header is None:
             header = {"headers": None}
@@ -109,6 +120,18 @@ class RequestControl:
             params = None
         return params
 
+    @classmethod
+    @phase_timer.timed("http")
+    def send_request(
+            cls,
+            method: Text,
+            url: Text,
+            **kwargs):
+        """ 发送请求，开启连接池时，同一个 host 复用长连接 """
+        if config.http_pool.switch:
+            return session_pool.request(method=method, url=url, **kwargs)
+        return requests.request(method=method, url=url, **kwargs)
+
     @classmethod
     def text_encode(
             cls,
@@ -127,9 +150,11 @@ class RequestControl:
             return 0.00
 
     def upload_file(
-            self) -> Tuple:
+            self,
+            stack: ExitStack) -> Tuple:
         """
         判断处理上传文件
+        :param stack: 管理上传文件生命周期的 ExitStack，请求发送完成后关闭所有文件
         :return:
         """
         # 处理上传多个文件的情况
@@ -138,16 +163,24 @@ class RequestControl:
         # 兼容又要上传文件，又要上传其他类型参数
         self.file_data_exit(file_data)
         _data = self.__yaml_case.data
-        for key, value in ast.literal_eval(cache_regular(str(_data)))['file'].items():
+        for key, value in literal_resolve(_data)['file'].items():
             file_path = ensure_path_sep("\\Files\\" + value)
-            file_data[key] = (value, open(file_path, 'rb'), 'application/octet-stream')
-            _files.append(file_data)
-            # allure中展示该附件
-            allure_attach(source=file_path, name=value, extension=value)
+            # 文件内容由 MultipartEncoder 在发送请求时分块读取，allure 附件在请求发送完成后展示
+            _file = UploadFile(
+                stack,
+                file_path,
+                name=value,
+                mmap_threshold=config.upload.mmap_threshold,
+                attachment=config.upload.attachment,
+                preview_size=config.upload.preview_size
+            )
+            file_data[key] = (value, _file, 'application/octet-stream')
+            _files.append(_file)
+        self._upload_files = _files
         multipart = self.multipart_data(file_data)
         # ast.literal_eval(cache_regular(str(_headers)))['Content-Type'] = multipart.content_type
         self.__yaml_case.headers['Content-Type'] = multipart.content_type
-        params_data = ast.literal_eval(cache_regular(str(self.file_prams_exit())))
+        params_data = literal_resolve(self.file_prams_exit())
         return multipart, params_data, self.__yaml_case
 
     def request_type_for_json(
@@ -159,10 +192,10 @@ class RequestControl:
         _headers = self.check_headers_str_null(headers)
         _data = self.__yaml_case.data
         _url = self.__yaml_case.url
-        res = requests.request(
+        res = self.send_request(
             method=method,
             url=cache_regular(str(_url)),
-            json=ast.literal_eval(cache_regular(str(_data))),
+            json=literal_resolve(_data),
             data={},
             headers=_headers,
             verify=False,
@@ -179,7 +212,7 @@ class RequestControl:
         """判断 requestType 为 None"""
         _headers = self.check_headers_str_null(headers)
         _url = self.__yaml_case.url
-        res = requests.request(
+        res = self.send_request(
             method=method,
             url=cache_regular(_url),
             data=None,
@@ -209,7 +242,7 @@ class RequestControl:
                     params_data += (key + "=" + str(value) + "&")
             url = self.__yaml_case.url + params_data[:-1]
         _headers = self.check_headers_str_null(headers)
-        res = requests.request(
+        res = self.send_request(
             method=method,
             url=cache_regular(url),
             headers=_headers,
@@ -225,19 +258,24 @@ class RequestControl:
             headers,
             **kwargs):
         """处理 requestType 为 file 类型"""
-        multipart = self.upload_file()
-        yaml_data = multipart[2]
-        _headers = multipart[2].headers
-        _headers = self.check_headers_str_null(_headers)
-        res = requests.request(
-            method=method,
-            url=cache_regular(yaml_data.url),
-            data=multipart[0],
-            params=multipart[1],
-            headers=ast.literal_eval(cache_regular(str(_headers))),
-            verify=False,
-            **kwargs
-        )
+        # 上传文件在请求发送完成后统一关闭
+        with ExitStack() as stack:
+            multipart = self.upload_file(stack)
+            yaml_data = multipart[2]
+            _headers = multipart[2].headers
+            _headers = self.check_headers_str_null(_headers)
+            res = self.send_request(
+                method=method,
+                url=cache_regular(yaml_data.url),
+                data=multipart[0],
+                params=multipart[1],
+                headers=literal_resolve(_headers),
+                verify=False,
+                **kwargs
+            )
+            # allure中展示上传的附件
+            for i in self._upload_files:
+                i.attach()
         return res
 
     def request_type_for_data(
@@ -248,11 +286,11 @@ class RequestControl:
         """判断 requestType 为 data 类型"""
         data = self.__yaml_case.data
         _data, _headers = self.multipart_in_headers(
-            ast.literal_eval(cache_regular(str(data))),
+            literal_resolve(data),
             headers
         )
         _url = self.__yaml_case.url
-        res = requests.request(
+        res = self.send_request(
             method=method,
             url=cache_regular(_url),
             data=_data,
@@ -270,6 +308,50 @@ class RequestControl:
         filename = urllib.parse.unquote(filename_code)  # url解码
         return filename
 
+    @classmethod
+    def stream_to_file(
+            cls,
+            res,
+            filepath: Text,
+            chunk_size: int,
+            hash_algorithm: Union[Text, None] = None) -> Dict:
+        """
+        将响应内容分块写入文件，不在内存中保存完整的响应内容
+        :param res: stream=True 发送请求得到的响应
+        :param filepath: 文件保存路径
+        :param chunk_size: 每次读取、写入的字节数
+        :param hash_algorithm: 计算文件哈希使用的算法，为 None 时不计算
+        :return: 文件名称、路径、大小和哈希
+        """
+        _hash = hashlib.new(hash_algorithm) if hash_algorithm else None
+        _size = 0
+        # 先写入临时文件，下载完成后再替换，避免下载中断时留下不完整的文件
+        _tmp_path = f"{filepath}.part"
+        try:
+            with open(_tmp_path, 'wb') as file:
+                for chunk in res.iter_content(chunk_size=chunk_size):
+                    file.write(chunk)
+                    _size += len(chunk)
+                    if _hash is not None:
+                        _hash.update(chunk)
+        except BaseException:
+            if os.path.exists(_tmp_path):
+                os.remove(_tmp_path)
+            raise
+        finally:
+            res.close()
+        if _size:
+            os.replace(_tmp_path, filepath)
+        else:
+            os.remove(_tmp_path)
+            WARNING.logger.warning("导出文件为空, 文件路径: %s", filepath)
+        return {
+            "file_name": os.path.basename(filepath),
+            "file_path": filepath,
+            "file_size": _size,
+            "file_hash": _hash.hexdigest() if _hash is not None else None
+        }
+
     def request_type_for_export(
             self,
             headers: Dict,
@@ -279,24 +361,24 @@ class RequestControl:
         _headers = self.check_headers_str_null(headers)
         _data = self.__yaml_case.data
         _url = self.__yaml_case.url
-        res = requests.request(
+        res = self.send_request(
             method=method,
             url=cache_regular(_url),
-            json=ast.literal_eval(cache_regular(str(_data))),
+            json=literal_resolve(_data),
             headers=_headers,
             verify=False,
-            stream=False,
+            stream=True,
             data={},
             **kwargs)
-        filepath = os.path.join(ensure_path_sep("\\Files\\"), self.get_export_api_filename(res))  # 拼接路径
         if res.status_code == 200:
-            if res.text:  # 判断文件内容是否为空
-                with open(filepath, 'wb') as file:
-                    # iter_content循环读取信息写入，chunk_size设置文件大小
-                    for chunk in res.iter_content(chunk_size=1):
-                        file.write(chunk)
-            else:
-                print("文件为空")
+            filepath = os.path.join(ensure_path_sep("\\Files\\"), self.get_export_api_filename(res))  # 拼接路径
+            # 下载结果作为响应内容，可以通过 $.file_size、$.file_hash 断言文件大小和内容
+            self._export_result = self.stream_to_file(
+                res,
+                filepath,
+                chunk_size=config.export.chunk_size,
+                hash_algorithm=config.export.hash_algorithm
+            )
 
         return res
 
@@ -309,13 +391,13 @@ class RequestControl:
             return data
 
     @classmethod
-    def _sql_data_handler(cls, sql_data, res):
+    def _sql_data_handler(cls, sql_data, res: "ResponseData"):
         """处理 sql 参数 """
         # 判断数据库开关，开启状态，则返回对应的数据
         if config.mysql_db.switch and sql_data is not None:
             sql_data = AssertExecution().assert_execution(
                 sql=sql_data,
-                resp=res.json()
+                resp=res.response_json
             )
 
         else:
@@ -327,18 +409,20 @@ class RequestControl:
             res,
             yaml_data: "TestCase",
     ) -> "ResponseData":
-        data = ast.literal_eval(cache_regular(str(yaml_data.data)))
+        data = literal_resolve(yaml_data.data)
         _data = {
             "url": res.url,
             "is_run": yaml_data.is_run,
             "detail": yaml_data.detail,
-            "response_data": res.text,
+            # 导出文件的响应内容已经写入文件，使用下载结果代替
+            "response_data": res.text if self._export_result is None
+            else json.dumps(self._export_result, ensure_ascii=False),
             # 这个用于日志专用，判断如果是get请求，直接打印url
             "request_body": self._request_body_handler(
                 data, yaml_data.requestType
             ),
             "method": res.request.method,
-            "sql_data": self._sql_data_handler(sql_data=ast.literal_eval(cache_regular(str(yaml_data.sql))), res=res),
+            "sql_data": {"sql": None},
             "yaml_data": yaml_data,
             "headers": res.request.headers,
             "cookie": res.cookies,
@@ -350,7 +434,10 @@ class RequestControl:
             "body": data
         }
         # 抽离出通用模块，判断 http_request 方法中的一些数据校验
-        return ResponseData(**_data)
+        _res_data = ResponseData(**_data)
+        # 数据库断言与后续的处理共用同一个解析后的响应结果
+        _res_data.sql_data = self._sql_data_handler(sql_data=literal_resolve(yaml_data.sql), res=_res_data)
+        return _res_data
 
     @classmethod
     def api_allure_step(
@@ -388,7 +475,7 @@ class RequestControl:
         :param kwargs:
         :return:
         """
-        from utils.requests_tool.dependent_case import DependentCase
+        from utils.other_tools.requests_tool.dependent_case import DependentCase
         requests_type_mapping = {
             RequestType.JSON.value: self.request_type_for_json,
             RequestType.NONE.value: self.request_type_for_none,
@@ -398,40 +485,46 @@ class RequestControl:
             RequestType.EXPORT.value: self.request_type_for_export
         }
 
-        is_run = ast.literal_eval(cache_regular(str(self.__yaml_case.is_run)))
+        is_run = literal_resolve(self.__yaml_case.is_run)
         # 判断用例是否执行
         if is_run is True or is_run is None:
             # 处理多业务逻辑
             if dependent_switch is True:
                 DependentCase(self.__yaml_case).get_dependent_data()
 
-            res = requests_type_mapping.get(self.__yaml_case.requestType)(
-                headers=self.__yaml_case.headers,
-                method=self.__yaml_case.method,
-                **kwargs
-            )
+            # 组装请求数据的耗时计入 request 阶段，发送请求的耗时计入 http 阶段
+            with phase_timer.phase("request"):
+                res = requests_type_mapping.get(self.__yaml_case.requestType)(
+                    headers=self.__yaml_case.headers,
+                    method=self.__yaml_case.method,
+                    **kwargs
+                )
 
             if self.__yaml_case.sleep is not None:
-                time.sleep(self.__yaml_case.sleep)
-
-            _res_data = self._check_params(
-                res=res,
-                yaml_data=self.__yaml_case)
-
-            self.api_allure_step(
-                url=_res_data.url,
-                headers=str(_res_data.headers),
-                method=_res_data.method,
-                data=str(_res_data.body),
-                assert_data=str(_res_data.assert_data),
-                res_time=str(_res_data.res_time),
-                res=_res_data.response_data
-            )
+                with phase_timer.phase("sleep"):
+                    time.sleep(self.__yaml_case.sleep)
+
+            with phase_timer.phase("model"):
+                _res_data = self._check_params(
+                    res=res,
+                    yaml_data=self.__yaml_case)
+
+            with phase_timer.phase("allure"):
+                self.api_allure_step(
+                    url=_res_data.url,
+                    headers=str(_res_data.headers),
+                    method=_res_data.method,
+                    data=str(_res_data.body),
+                    assert_data=str(_res_data.assert_data),
+                    res_time=str(_res_data.res_time),
+                    res=_res_data.response_data
+                )
             # 将当前请求数据存入缓存中
-            SetCurrentRequestCache(
-                current_request_set_cache=self.__yaml_case.current_request_set_cache,
-                request_data=self.__yaml_case.data,
-                response_data=res
-            ).set_caches_main()
+            with phase_timer.phase("cache"):
+                SetCurrentRequestCache(
+                    current_request_set_cache=self.__yaml_case.current_request_set_cache,
+                    request_data=self.__yaml_case.data,
+                    response_data=_res_data
+                ).set_caches_main()
 
             return _res_data
@@ -0,0 +1,134 @@
+"""
+# @describe: http 连接池，同一个 host 复用同一个 session，保持长连接
+"""
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Text
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from utils.logging_tool.log_control import INFO
+
+
+class HttpSessionPool:
+    """ 按 host 维护 requests.Session，所有请求共用底层连接池 """
+
+    def __init__(
+            self,
+            pool_connections: int = 10,
+            pool_maxsize: int = 10,
+            max_retries: int = 0,
+            pool_block: bool = False,
+            keep_alive: bool = True):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self._sessions: Dict[Text, requests.Session] = {}
+        self._request_count: Dict[Text, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_host(cls, url: Text) -> Text:
+        """ 获取 url 中的 scheme + host，作为 session 的 key """
+        _url = urlsplit(url)
+        return f"{_url.scheme}://{_url.netloc}"
+
+    def _create_session(self) -> requests.Session:
+        """ 创建 session，并挂载指定大小的连接池 """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.max_retries,
+            pool_block=self.pool_block
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        # session 只用于复用连接，不保存响应中的 cookie，避免登录等用例的 cookie 被同一个 host 的其他用例自动带上，与 requests.request 的行为保持一致
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        if self.keep_alive:
+            session.headers['Connection'] = 'keep-alive'
+        else:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def get_session(self, url: Text) -> requests.Session:
+        """ 获取 url 对应 host 的 session，不存在则创建 """
+        host = self.get_host(url)
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._create_session()
+                self._sessions[host] = session
+                self._request_count[host] = 0
+            self._request_count[host] += 1
+        return session
+
+    def request(self, method: Text, url: Text, **kwargs) -> requests.Response:
+        """
+        通过连接池发送请求，参数与 requests.request 保持一致
+        :param method: 请求方式
+        :param url: 请求地址
+        :param kwargs: requests 支持的其他参数
+        :return:
+        """
+        return self.get_session(url).request(method=method, url=url, **kwargs)
+
+    def pool_stats(self) -> Dict:
+        """
+        统计每个 host 的连接池使用情况
+        requests: 发出的请求数
+        connections: 实际新建的 tcp 连接数
+        reused: 复用连接的请求数
+        """
+        stats = {}
+        with self._lock:
+            for host, session in self._sessions.items():
+                connections = 0
+                pool_requests = 0
+                adapter = session.get_adapter(host)
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+                        pool_requests += pool.num_requests
+                stats[host] = {
+                    "requests": self._request_count.get(host, 0),
+                    "connections": connections,
+                    "reused": max(pool_requests - connections, 0)
+                }
+        return stats
+
+    def close(self) -> Dict:
+        """ 关闭所有 session，返回关闭前的连接池统计数据 """
+        stats = self.pool_stats()
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._request_count.clear()
+        for host, value in stats.items():
+            INFO.logger.info(
+                "连接池统计 %s: 请求数 %s, 新建连接数 %s, 复用连接数 %s",
+                host, value['requests'], value['connections'], value['reused']
+            )
+        return stats
+
+
+def _init_session_pool() -> HttpSessionPool:
+    """ 读取配置文件中的连接池配置 """
+    from utils import config
+    _pool = config.http_pool
+    return HttpSessionPool(
+        pool_connections=_pool.pool_connections,
+        pool_maxsize=_pool.pool_maxsize,
+        max_retries=_pool.max_retries,
+        pool_block=_pool.pool_block,
+        keep_alive=_pool.keep_alive
+    )
+
+
+session_pool = _init_session_pool()
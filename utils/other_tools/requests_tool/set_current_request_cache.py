@@ -1,6 +1,5 @@
-import json
 from typing import Text
-from jsonpath import jsonpath
+from utils.other_tools.jsonpath_cache import jsonpath
 from utils.other_tools.exceptions import ValueNotFoundError
 from utils.cache_process.cache_control import CacheHandler
 
@@ -16,7 +15,8 @@ class SetCurrentRequestCache:
     ):
         self.current_request_set_cache = current_request_set_cache
         self.request_data = {"data": request_data}
-        self.response_data = response_data.text
+        # response_data 为 ResponseData，直接使用其中解析后的响应结果
+        self.response_data = response_data
 
     def set_request_cache(
             self,
@@ -43,13 +43,13 @@ class SetCurrentRequestCache:
             cache_name
     ):
         """将响应结果存入缓存"""
-        _response_data = jsonpath(json.loads(self.response_data), jsonpath_value)
+        _response_data = jsonpath(self.response_data.response_json, jsonpath_value)
         if _response_data is not False:
             CacheHandler.update_cache(cache_name=cache_name, value=_response_data[0])
             # cache(cache_name).set_caches(_response_data[0])
         else:
             raise ValueNotFoundError("缓存设置失败，程序中未检测到需要缓存的数据。"
-                                     f"请求参数: {self.response_data}"
+                                     f"请求参数: {self.response_data.response_data}"
                                      f"提取的 jsonpath 内容: {jsonpath_value}")
 
     def set_caches_main(self):
@@ -1,15 +1,17 @@
 """
 # @describe: 请求后置处理
 """
-import ast
-import json
+import copy
 from typing import Dict, Text
-from jsonpath import jsonpath
+from utils.other_tools.jsonpath_cache import jsonpath
 from utils.other_tools.requests_tool.request_control import RequestControl
-from utils.other_tools.read_files_tools.regular_control import cache_regular, sql_regular, regular
+from utils.other_tools.read_files_tools.regular_control import cache_regular, sql_regular, literal_resolve
 from utils.other_tools.jsonpath_date_replace import jsonpath_replace
 from utils.mysql_tool.mysql_control import MysqlDB
+from utils.other_tools.requests_tool.teardown_queue import teardown_queue
+from utils.other_tools.requests_tool.dependency_scheduler import CaseDependencyGraph
 from utils.logging_tool.log_control import WARNING
+from utils.logging_tool.phase_timer import phase_timer
 from utils.other_tools.models import ResponseData, TearDown, SendRequest, ParamPrepare
 from utils.other_tools.exceptions import JsonpathExtractionFailed, ValueNotFoundError
 from utils.cache_process.cache_control import CacheHandler
@@ -63,9 +65,7 @@ class TearDownHandler:
     @classmethod
     def regular_testcase(cls, teardown_case: Dict) -> Dict:
         """处理测试用例中的动态数据"""
-        test_case = regular(str(teardown_case))
-        test_case = ast.literal_eval(cache_regular(str(test_case)))
-        return test_case
+        return literal_resolve(teardown_case, func_switch=True)
 
     @classmethod
     def teardown_http_requests(cls, teardown_case: Dict) -> "ResponseData":
@@ -219,7 +219,8 @@ class TearDownHandler:
         _send_request = data.send_request
         _case_id = data.case_id
         # _teardown_case = ast.literal_eval(cache('case_process').get_cache())[_case_id]
-        _teardown_case = CacheHandler.get_cache(_case_id)
+        # 下面的 exec 会修改后置用例的内容，这里复制一份，避免修改用例池中共享的用例(多个线程同时执行后置处理时会互相覆盖)
+        _teardown_case = copy.deepcopy(CacheHandler.get_cache(_case_id))
         for i in _send_request:
             if i.dependent_type == 'cache':
                 exec(self.dependent_type_cache(teardown_case=i))
@@ -261,10 +262,49 @@ class TearDownHandler:
                 self.dependent_self_response(
                     teardown_case_data=i,
                     resp_data=resp_data,
-                    res=json.loads(res.response_data)
+                    res=res.response_json
                 )
 
+    @classmethod
+    def writes_cache(cls, res: "ResponseData") -> bool:
+        """
+        后置处理是否会写入缓存: param_prepare、send_request 中的 set_cache、$set_cache{}，
+        以及后置用例自身的 current_request_set_cache、dependence_case_data 中的 set_cache
+        """
+        for i in res.teardown or []:
+            if i.param_prepare:
+                return True
+            for j in i.send_request or []:
+                if j.set_cache or (j.replace_key and "$set_cache{" in j.replace_key):
+                    return True
+            try:
+                _teardown_case = CacheHandler.get_cache(i.case_id)
+            except ValueNotFoundError:
+                continue
+            if CaseDependencyGraph.is_case(_teardown_case) and CaseDependencyGraph.cache_names(_teardown_case):
+                return True
+        return False
+
     def teardown_handle(self) -> None:
+        """
+        执行后置处理，开启延迟后置处理时，放到后台队列中执行，同一资源上的后置处理保持用例的执行顺序
+        会写入缓存的后置处理与后续用例存在数据竞争，始终在当前线程中同步执行
+        """
+        if config.teardown_queue.switch:
+            _resources = teardown_queue.resources(self._res)
+            if not self.writes_cache(self._res):
+                teardown_queue.submit(
+                    func=self.execute_teardown,
+                    resources=_resources,
+                    nodeid=phase_timer.current_nodeid()
+                )
+                return
+            # 同步执行前，先等待同一资源上已经提交的后置处理执行完成，保持执行顺序
+            teardown_queue.wait_resources(_resources)
+        self.execute_teardown()
+
+    @phase_timer.timed("teardown")
+    def execute_teardown(self) -> None:
         """
         为什么在这里需要单独区分 param_prepare 和 send_request
         假设此时我们有用例A，teardown中我们需要执行用例B
@@ -276,8 +316,8 @@ class TearDownHandler:
         """
         # 拿到用例信息
         _teardown_data = self._res.teardown
-        # 获取接口的响应内容
-        _resp_data = self._res.response_data
+        # 获取接口解析后的响应内容，没有后置请求时不解析
+        _resp_data = self._res.response_json if _teardown_data else None
         # 获取接口的请求参数
         _request_data = self._res.yaml_data.data
         # 判断如果没有 teardown
@@ -287,13 +327,13 @@ class TearDownHandler:
                 if _data.param_prepare is not None:
                     self.param_prepare_request_handler(
                         data=_data,
-                        resp_data=json.loads(_resp_data)
+                        resp_data=_resp_data
                     )
                 elif _data.send_request is not None:
                     self.send_request_handler(
                         data=_data,
                         request_data=_request_data,
-                        resp_data=json.loads(_resp_data)
+                        resp_data=_resp_data
                     )
         self.teardown_sql()
 
@@ -301,11 +341,19 @@ class TearDownHandler:
         """处理后置sql"""
 
         sql_data = self._res.teardown_sql
-        _response_data = self._res.response_data
         if sql_data is not None:
+            if not config.mysql_db.switch:
+                for i in sql_data:
+                    WARNING.logger.warning("程序中检查到您数据库开关为关闭状态，已为您跳过删除sql: %s", i)
+                return
+            # 数据库开关开启时才解析响应内容，响应内容不是 json 时不影响跳过后置 sql
+            _response_data = self._res.response_json
+            # 开启批量模式时，当前用例的所有后置 sql 在同一个事务中执行，任意一条失败时整体回滚
+            if config.mysql_db.batch:
+                MysqlDB().execute_batch([
+                    cache_regular(sql_regular(value=i, res=_response_data)) for i in sql_data
+                ])
+                return
             for i in sql_data:
-                if config.mysql_db.switch:
-                    _sql_data = sql_regular(value=i, res=json.loads(_response_data))
-                    MysqlDB().execute(cache_regular(_sql_data))
-                else:
-                    WARNING.logger.warning("程序中检查到您数据库开关为关闭状态，已为您跳过删除sql: %s", i)
\ No newline at end of file
+                _sql_data = sql_regular(value=i, res=_response_data)
+                MysqlDB().execute(cache_regular(_sql_data))
\ No newline at end of file
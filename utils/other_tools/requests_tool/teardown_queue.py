@@ -0,0 +1,102 @@
+"""
+# @describe: 延迟后置处理队列，用例执行完成后将后置请求、后置 sql 放到后台线程池中执行，测试结束前统一等待完成
+"""
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, List, Set, Text, Tuple, Union
+from utils.logging_tool.log_control import ERROR, INFO
+from utils.logging_tool.phase_timer import phase_timer
+from utils.other_tools.models import ResponseData
+
+
+class DeferredTeardownQueue:
+    """
+    延迟后置处理队列
+    同一个资源上的后置处理按提交顺序依次执行，不同资源之间并发执行
+    资源为后置用例的 case_id 以及后置 sql 中涉及的表名
+    """
+
+    table_pattern = re.compile(r"\b(?:from|into|update|table|join)\s+`?([\w.]+)`?", re.I)
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(max_workers, 1)
+        self._executor: Union[ThreadPoolExecutor, None] = None
+        self._lock = threading.Lock()
+        # 每个资源上最后一次提交的后置处理
+        self._last = {}
+        self._futures: List[Future] = []
+        self.failures: List[Tuple[Text, BaseException]] = []
+
+    @classmethod
+    def resources(cls, res: "ResponseData") -> Set[Text]:
+        """ 获取后置处理涉及的资源 """
+        _resources = set()
+        for i in res.teardown or []:
+            _resources.add(f"case:{i.case_id}")
+        for i in res.teardown_sql or []:
+            for table in cls.table_pattern.findall(i):
+                _resources.add(f"table:{table.lower()}")
+        return _resources
+
+    def submit(self, func: Callable[[], None], resources: Iterable[Text], nodeid: Text) -> Future:
+        """
+        提交后置处理
+        :param func: 后置处理方法
+        :param resources: 后置处理涉及的资源
+        :param nodeid: 发起后置处理的用例，执行失败时用于定位用例
+        :return:
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="teardown"
+                )
+            _resources = set(resources)
+            _depends = [self._last[i] for i in _resources if i in self._last]
+            future = self._executor.submit(self._run, func, _depends, nodeid)
+            for i in _resources:
+                self._last[i] = future
+            self._futures.append(future)
+        return future
+
+    def _run(self, func: Callable[[], None], depends: List[Future], nodeid: Text) -> None:
+        """ 等待同一资源上先提交的后置处理执行完成后，再执行当前后置处理 """
+        # 先提交的任务一定先从线程池队列中取出，因此这里的等待不会造成死锁
+        wait(depends)
+        try:
+            # 后台线程中的耗时记录到发起后置处理的用例下
+            with phase_timer.bind(nodeid):
+                func()
+        except Exception as exc:
+            ERROR.logger.error("用例 %s 的延迟后置处理执行失败，失败原因: %r", nodeid, exc)
+            with self._lock:
+                self.failures.append((nodeid, exc))
+
+    def wait_resources(self, resources: Iterable[Text]) -> None:
+        """ 等待 resources 上已经提交的后置处理执行完成，用于需要在当前线程中同步执行的后置处理 """
+        with self._lock:
+            _futures = [self._last[i] for i in set(resources) if i in self._last]
+        wait(_futures)
+
+    def drain(self) -> List[Tuple[Text, BaseException]]:
+        """ 等待所有后置处理执行完成，返回执行失败的用例和异常 """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            _count = len(self._futures)
+            self._futures, self._last = [], {}
+        if executor is not None:
+            executor.shutdown(wait=True)
+            INFO.logger.info(
+                "延迟后置处理执行完成: 共 %s 个, 失败 %s 个", _count, len(self.failures)
+            )
+        return self.failures
+
+
+def _init_teardown_queue() -> DeferredTeardownQueue:
+    """ 读取配置文件中的延迟后置处理配置 """
+    from utils import config
+    return DeferredTeardownQueue(max_workers=config.teardown_queue.max_workers)
+
+
+teardown_queue = _init_teardown_queue()
@@ -0,0 +1,131 @@
+"""
+# @describe: 上传文件处理，文件在请求发送完成后统一关闭，较大的文件通过 mmap 读取
+"""
+import hashlib
+import mmap
+import os
+import threading
+from contextlib import ExitStack
+from typing import Dict, Text
+from utils.other_tools.allure_data.allure_tools import allure_attach, allure_attach_content, allure_step_no
+from utils.logging_tool.log_control import INFO, WARNING
+
+
+class UploadFileStats:
+    """ 上传文件的文件描述符统计 """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.closed = 0
+        self.mmapped = 0
+        self.peak = 0
+        self.bytes_read = 0
+
+    def on_open(self, use_mmap: bool) -> None:
+        with self._lock:
+            self.opened += 1
+            self.mmapped += int(use_mmap)
+            self.peak = max(self.peak, self.opened - self.closed)
+
+    def on_close(self) -> None:
+        with self._lock:
+            self.closed += 1
+
+    def on_read(self, size: int) -> None:
+        with self._lock:
+            self.bytes_read += size
+
+    def stats(self) -> Dict:
+        """ 上传文件统计数据 """
+        return {
+            "opened": self.opened,
+            "closed": self.closed,
+            "leaked": self.opened - self.closed,
+            "peak": self.peak,
+            "mmapped": self.mmapped,
+            "bytes_read": self.bytes_read
+        }
+
+    def log_stats(self) -> None:
+        """ 将上传文件统计数据记录到日志中，存在未关闭的文件时记录警告 """
+        _stats = self.stats()
+        INFO.logger.info(
+            "上传文件统计: 打开 %s 个, 关闭 %s 个, 同时打开最多 %s 个, 使用 mmap %s 个, 读取 %s 字节",
+            _stats['opened'], _stats['closed'], _stats['peak'], _stats['mmapped'], _stats['bytes_read']
+        )
+        if _stats['leaked']:
+            WARNING.logger.warning("上传文件中有 %s 个文件未关闭", _stats['leaked'])
+
+
+upload_stats = UploadFileStats()
+
+
+class UploadFile:
+    """
+    上传文件，MultipartEncoder 分块读取文件内容时，同时计算文件哈希、保存预览内容
+    文件由 ExitStack 管理，退出上下文时关闭
+    """
+
+    def __init__(
+            self,
+            stack: ExitStack,
+            file_path: Text,
+            name: Text,
+            mmap_threshold: int = 0,
+            attachment: Text = "file",
+            preview_size: int = 1024):
+        """
+        :param stack: 管理文件生命周期的 ExitStack，请求发送完成后退出
+        :param file_path: 文件路径
+        :param name: 文件名称
+        :param mmap_threshold: 文件大小达到该值时使用 mmap 读取，0 表示不使用
+        :param attachment: allure 附件展示方式，file 上传完整文件、hash 只展示文件大小和哈希、preview 展示文件开头的内容、skip 不展示
+        :param preview_size: preview 方式展示的字节数
+        """
+        self.file_path = file_path
+        self.name = name
+        self.attachment = attachment
+        self.preview_size = preview_size
+        _file = open(file_path, 'rb')
+        # ExitStack 按注册的相反顺序执行，先关闭 mmap，再关闭文件，最后记录关闭次数
+        stack.callback(upload_stats.on_close)
+        stack.callback(_file.close)
+        self.size = os.fstat(_file.fileno()).st_size
+        _use_mmap = bool(mmap_threshold) and self.size >= mmap_threshold
+        upload_stats.on_open(_use_mmap)
+        self._fd = _file
+        if _use_mmap:
+            self._fd = mmap.mmap(_file.fileno(), 0, access=mmap.ACCESS_READ)
+            stack.callback(self._fd.close)
+        self._hash = hashlib.sha256() if attachment == "hash" else None
+        self._preview = b""
+
+    def read(self, size: int = -1) -> bytes:
+        """ 读取文件内容，供 MultipartEncoder 分块读取 """
+        data = self._fd.read(size)
+        upload_stats.on_read(len(data))
+        if self._hash is not None:
+            self._hash.update(data)
+        if self.attachment == "preview" and len(self._preview) < self.preview_size:
+            self._preview += data[:self.preview_size - len(self._preview)]
+        return data
+
+    def tell(self) -> int:
+        return self._fd.tell()
+
+    @property
+    def len(self) -> int:
+        """ 剩余未读取的字节数，MultipartEncoder 通过该属性计算请求体长度、判断文件是否读取完成 """
+        return self.size - self._fd.tell()
+
+    def attach(self) -> None:
+        """ 请求发送完成后，按配置的方式在 allure 中展示上传的文件 """
+        if self.attachment == "file":
+            allure_attach(source=self.file_path, name=self.name, extension=self.name)
+        elif self.attachment == "hash":
+            # 请求未读取完整文件时(如请求失败)，哈希不完整，不展示
+            _hash = self._hash.hexdigest() if self.tell() == self.size else None
+            allure_step_no(f"上传文件: {self.name}, 大小: {self.size} 字节, sha256: {_hash}")
+        elif self.attachment == "preview":
+            allure_attach_content(body=self._preview, name=self.name, extension=self.name)